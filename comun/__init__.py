@@ -0,0 +1,2 @@
+# comun/__init__.py
+"""Módulos compartidos entre los proyectos de la materia."""
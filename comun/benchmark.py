@@ -0,0 +1,384 @@
+# comun/benchmark.py
+# Banco de pruebas de rendimiento sin pantalla: corre el pipeline de
+# proyecto3.py, el entrenamiento y la predicción de proyecto2.py y la carga y
+# los gráficos de dashboard4.py sobre datos sintéticos fijos (misma semilla,
+# mismo tamaño). Cada objetivo se ejecuta en un proceso aparte con
+# MPLBACKEND=Agg y los tiempos por etapa salen de las trazas de
+# comun/rendimiento.py. Las medianas se comparan con una línea base JSON y el
+# proceso termina con código 1 si alguna etapa empeora más que el umbral, o
+# con código 2 si la línea base se midió con otros parámetros (no se compara).
+#
+# Uso por línea de comandos:
+#   python -m comun.benchmark                      # compara con la línea base (la crea si no existe)
+#   python -m comun.benchmark --actualizar         # guarda los resultados como nueva línea base
+#   python -m comun.benchmark --objetivos proyecto3 dashboard4 --facturas 50000 --umbral 0.3
+#   python -m comun.benchmark --objetivos arranque  # solo el costo de importación de los dashboards
+#   PYTHONTRACEMALLOC=1 python -m comun.benchmark  # con el pico de memoria de cada etapa (más lento)
+
+import os
+import sys
+import json
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+OBJETIVOS = {
+    'proyecto3': os.path.join(RAIZ, 'proyecto3', 'proyecto3.py'),
+    'proyecto2': os.path.join(RAIZ, 'proyecto2', 'proyecto2.py'),
+    'dashboard4': os.path.join(RAIZ, 'proyecto4', 'dashboard4.py'),
+}
+# Arranque en frío de los dashboards: `python -X importtime` de una corrida sin servidor
+ARRANQUE = {
+    'dashboard2': os.path.join(RAIZ, 'proyecto2', 'dashboard2.py'),
+    'dashboard4': OBJETIVOS['dashboard4'],
+}
+PAQUETES_ARRANQUE = ['streamlit', 'pandas', 'numpy', 'pyarrow', 'plotly', 'matplotlib',
+                     'seaborn', 'sklearn', 'scipy', 'joblib']
+TODOS_LOS_OBJETIVOS = list(OBJETIVOS) + ['arranque']
+RUTA_BASE = os.path.join(RAIZ, 'benchmarks', 'linea_base.json')
+RUTA_ULTIMO = os.path.join(RAIZ, 'benchmarks', 'ultimo.json')
+CARPETA_DATOS = os.path.join(tempfile.gettempdir(), 'benchmark_proyectos')
+FACTURAS = 20_000
+CLIENTES_PROMOCIONES = 5_000
+SEMILLA = 42
+# Mismo período que los datos reales (proyecto3 grafica solo Ene-Mar)
+PERIODO = ("2025-01-01", "2025-03-31")
+REPETICIONES = 3
+UMBRAL = 0.25          # 25 % más lento que la línea base
+MINIMO_SEGUNDOS = 0.1   # diferencias menores se consideran ruido
+SEGUNDOS_LIMITE = 1800
+
+
+# ==============================
+# DATOS SINTÉTICOS FIJOS
+# ==============================
+def generar_clientes_promociones(filas=CLIENTES_PROMOCIONES, semilla=SEMILLA):
+    """Tabla con las columnas del Excel de proyecto2 y una recompra que depende de ellas"""
+    rng = np.random.default_rng(semilla)
+    recibio = rng.random(filas) < 0.5
+    edad = rng.integers(18, 76, filas)
+    compras = rng.integers(1, 9, filas)
+    ingreso = rng.integers(4, 17, filas) * 5000
+    monto = np.where(recibio, rng.integers(2, 21, filas) * 50, 0)
+    puntaje = 0.9 * recibio + 0.35 * (compras - 3) + (ingreso - 40000) / 40000 - (edad - 45) / 60
+    recompra = rng.random(filas) < 1 / (1 + np.exp(-puntaje))
+    return pd.DataFrame({
+        'Cliente_ID': np.arange(1, filas + 1),
+        'Genero': rng.choice(['F', 'M'], filas),
+        'Edad': edad,
+        'Recibio_Promo': np.where(recibio, 'Si', 'No'),
+        'Monto_Promo': monto,
+        'Recompra': np.where(recompra, 'Si', 'No'),
+        'Total_Compras': compras,
+        'Ingreso_Mensual': ingreso,
+    })
+
+
+def preparar_datos(carpeta=CARPETA_DATOS, facturas=FACTURAS, semilla=SEMILLA):
+    """Genera (o reutiliza) las tablas de ventas y el Excel de promociones"""
+    from comun.generador_esquema import esquema_ventas, generar_tablas, escribir_tablas
+
+    parametros = {'facturas': facturas, 'semilla': semilla, 'periodo': list(PERIODO),
+                  'clientes_promociones': CLIENTES_PROMOCIONES}
+    carpeta = os.path.join(carpeta, f"f{facturas}_s{semilla}")
+    ruta_parametros = os.path.join(carpeta, 'parametros.json')
+    if os.path.exists(ruta_parametros):
+        with open(ruta_parametros, encoding='utf-8') as archivo:
+            if json.load(archivo) == parametros:
+                return carpeta
+
+    print(f"🧪 Generando datos sintéticos ({facturas:,} facturas, semilla {semilla})...")
+    shutil.rmtree(carpeta, ignore_errors=True)
+    tablas = generar_tablas(esquema_ventas(facturas=facturas, inicio=PERIODO[0], fin=PERIODO[1]), semilla=semilla)
+    escribir_tablas(tablas, os.path.join(carpeta, 'datos'))
+    generar_clientes_promociones(semilla=semilla).to_excel(
+        os.path.join(carpeta, 'Clientes_Promociones_Sinteticos.xlsx'), index=False
+    )
+    with open(ruta_parametros, 'w', encoding='utf-8') as archivo:
+        json.dump(parametros, archivo)
+    return carpeta
+
+
+def _carpeta_trabajo(objetivo, carpeta_datos):
+    """Carpeta temporal con solo los archivos de entrada que lee el objetivo"""
+    trabajo = tempfile.mkdtemp(prefix=f"benchmark_{objetivo}_")
+    if objetivo == 'proyecto2':
+        shutil.copy(os.path.join(carpeta_datos, 'Clientes_Promociones_Sinteticos.xlsx'), trabajo)
+    else:
+        shutil.copytree(os.path.join(carpeta_datos, 'datos'), os.path.join(trabajo, 'datos'))
+    return trabajo
+
+
+# ==============================
+# EJECUCIÓN DE LOS OBJETIVOS
+# ==============================
+def ejercitar_dashboard4():
+    """Carga de dashboard4 y todos sus gráficos, sin servidor (modo 'bare' de Streamlit)"""
+    sys.path.insert(0, os.path.dirname(OBJETIVOS['dashboard4']))
+    import dashboard4 as d4
+
+    datos = d4.cargar_datos_completos()
+    if datos is None:
+        raise RuntimeError("dashboard4 no pudo cargar los datos")
+    version_filtros, tablas_filtros = d4.tablas_versionadas(datos, d4.TABLAS_FILTROS)
+    indice_filtros = d4.obtener_indice_filtros(version_filtros, *tablas_filtros)
+    version_top, tablas_top = d4.tablas_versionadas(datos, d4.TABLAS_TOP)
+    indice_top = d4.obtener_indice_top(version_top, *tablas_top)
+    with d4.medir('resolver_filtros', len(indice_filtros.facturas)) as medicion:
+        seleccion = indice_filtros.resolver(None, None, [], [])
+        medicion.filas_salida = seleccion.cantidad_filas()
+
+    for crear in (d4.crear_grafico_ventas_mensuales, d4.crear_grafico_ventas_sucursal,
+                  d4.crear_grafico_ventas_tipo_iva, d4.crear_grafico_ventas_rubro,
+                  d4.crear_grafico_ventas_semanales, d4.crear_grafico_ventas_mensuales_lineas,
+                  d4.crear_grafico_ventas_anuales, d4.crear_grafico_tendencia_ventas_completo):
+        crear(seleccion)
+    d4.crear_grafico_top_productos_ventas(indice_top, datos['productos'], seleccion)
+    d4.crear_grafico_productos_mas_vendidos(indice_top, datos['productos'], seleccion)
+    d4.crear_grafico_stock_rubro(datos['productos_completos'])
+
+
+def _medicion(segundos):
+    return {'segundos': segundos, 'cpu_segundos': None, 'memoria_mb': None, 'memoria_pico_mb': None}
+
+
+def _correr(nombre, comando, trabajo, **variables):
+    """Corre el comando sin pantalla; devuelve (proceso, segundos) o error si falla"""
+    entorno = dict(os.environ, MPLBACKEND='Agg', PYTHONIOENCODING='utf-8',
+                   PYTHONPATH=os.pathsep.join(filter(None, [RAIZ, os.environ.get('PYTHONPATH')])),
+                   **variables)
+    entorno.pop('DISPLAY', None)
+    inicio = time.perf_counter()
+    proceso = subprocess.run(comando, cwd=trabajo, env=entorno, capture_output=True,
+                             text=True, encoding='utf-8', errors='replace', timeout=SEGUNDOS_LIMITE)
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode != 0:
+        salida = (proceso.stderr or proceso.stdout).strip().splitlines()[-15:]
+        raise RuntimeError(f"{nombre} terminó con código {proceso.returncode}:\n" + "\n".join(salida))
+    return proceso, segundos
+
+
+def leer_importtime(texto):
+    """Segundos de importación propios por paquete raíz, a partir de la salida de -X importtime"""
+    paquetes = {}
+    for linea in texto.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, _, modulo = linea[len('import time:'):].split('|')
+        paquete = modulo.strip().split('.')[0]
+        paquetes[paquete] = paquetes.get(paquete, 0.0) + int(propio) / 1e6
+    return paquetes
+
+
+def medir_arranque(carpeta_datos):
+    """Importaciones y tiempo total de abrir cada dashboard en un proceso nuevo"""
+    trabajo = _carpeta_trabajo('arranque', carpeta_datos)
+    etapas = {}
+    try:
+        for nombre, script in ARRANQUE.items():
+            proceso, total = _correr(nombre, [sys.executable, '-X', 'importtime', script], trabajo)
+            paquetes = leer_importtime(proceso.stderr)
+            etapas[f"arranque/{nombre}/total"] = _medicion(total)
+            etapas[f"arranque/{nombre}/importaciones"] = _medicion(sum(paquetes.values()))
+            # Siempre las mismas etapas: un paquete que deja de importarse queda en 0
+            for paquete in PAQUETES_ARRANQUE:
+                etapas[f"arranque/{nombre}/import {paquete}"] = _medicion(paquetes.get(paquete, 0.0))
+        return etapas
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+
+def ejecutar_objetivo(objetivo, carpeta_datos):
+    """Una corrida en un proceso nuevo; devuelve {etapa: medición} con el total incluido"""
+    if objetivo == 'arranque':
+        return medir_arranque(carpeta_datos)
+    trabajo = _carpeta_trabajo(objetivo, carpeta_datos)
+    ruta_traza = os.path.join(trabajo, 'traza.jsonl')
+    if objetivo == 'dashboard4':
+        comando = [sys.executable, '-m', 'comun.benchmark', '--interno', objetivo]
+    else:
+        comando = [sys.executable, OBJETIVOS[objetivo]]
+
+    try:
+        _, total = _correr(objetivo, comando, trabajo, TRAZA_RENDIMIENTO=ruta_traza)
+        etapas = {f"{objetivo}/total": _medicion(total)}
+        with open(ruta_traza, encoding='utf-8') as archivo:
+            for linea in archivo:
+                registro = json.loads(linea)
+                if registro['error']:
+                    raise RuntimeError(f"{objetivo}: la etapa '{registro['etapa']}' falló ({registro['error']})")
+                # Una etapa puede repetirse en la corrida (un gráfico por modelo): se suman
+                etapa = etapas.setdefault(f"{objetivo}/{registro['etapa']}",
+                                          {'segundos': 0.0, 'cpu_segundos': 0.0,
+                                           'memoria_mb': None, 'memoria_pico_mb': None})
+                etapa['segundos'] += registro['segundos']
+                etapa['cpu_segundos'] += registro['cpu_segundos']
+                # La memoria residente que deja cada llamada se suma; de los picos vale el mayor
+                if registro.get('memoria_mb') is not None:
+                    etapa['memoria_mb'] = (etapa['memoria_mb'] or 0.0) + registro['memoria_mb']
+                if registro.get('memoria_pico_mb') is not None:
+                    etapa['memoria_pico_mb'] = max(etapa['memoria_pico_mb'] or 0.0, registro['memoria_pico_mb'])
+        return etapas
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+
+def medir_objetivos(objetivos, carpeta_datos, repeticiones=REPETICIONES):
+    """Medianas por etapa de varias corridas de cada objetivo; los fallos quedan en 'errores'"""
+    corridas, errores = {}, {}
+    for objetivo in objetivos:
+        for numero in range(repeticiones):
+            print(f"⏱️ {objetivo} ({numero + 1}/{repeticiones})...", flush=True)
+            try:
+                etapas = ejecutar_objetivo(objetivo, carpeta_datos)
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                errores[objetivo] = str(e)
+                print(f"❌ {e}")
+                break
+            for nombre, medicion in etapas.items():
+                corridas.setdefault(nombre, []).append(medicion)
+
+    resultados = {}
+    for nombre, mediciones in corridas.items():
+        segundos = [m['segundos'] for m in mediciones]
+        cpu = [m['cpu_segundos'] for m in mediciones if m['cpu_segundos'] is not None]
+        memoria = [m['memoria_mb'] for m in mediciones if m.get('memoria_mb') is not None]
+        picos = [m['memoria_pico_mb'] for m in mediciones if m['memoria_pico_mb'] is not None]
+        resultados[nombre] = {
+            'segundos': round(statistics.median(segundos), 4),
+            'minimo': round(min(segundos), 4),
+            'maximo': round(max(segundos), 4),
+            'cpu_segundos': round(statistics.median(cpu), 4) if cpu else None,
+            'memoria_mb': round(statistics.median(memoria), 2) if memoria else None,
+            'memoria_pico_mb': round(max(picos), 2) if picos else None,
+            'corridas': len(segundos),
+        }
+    return resultados, errores
+
+
+# ==============================
+# LÍNEA BASE Y COMPARACIÓN
+# ==============================
+def comparar(resultados, base, umbral=UMBRAL, minimo_segundos=MINIMO_SEGUNDOS):
+    """Filas de comparación por etapa; 'regresion' indica si superó el umbral"""
+    filas = []
+    for nombre, anterior in base['etapas'].items():
+        actual = resultados.get(nombre)
+        if actual is None:
+            filas.append({'etapa': nombre, 'base': anterior['segundos'], 'actual': None,
+                          'cambio': None, 'regresion': True})
+            continue
+        diferencia = actual['segundos'] - anterior['segundos']
+        if anterior['segundos'] > 0:
+            cambio = diferencia / anterior['segundos']
+        else:
+            cambio = float('inf') if diferencia > 0 else 0.0
+        filas.append({
+            'etapa': nombre,
+            'base': anterior['segundos'],
+            'actual': actual['segundos'],
+            'cambio': round(cambio, 4),
+            'regresion': cambio > umbral and diferencia > minimo_segundos,
+        })
+    for nombre in resultados.keys() - base['etapas'].keys():
+        filas.append({'etapa': nombre, 'base': None, 'actual': resultados[nombre]['segundos'],
+                      'cambio': None, 'regresion': False})
+    return sorted(filas, key=lambda f: f['etapa'])
+
+
+def _documento(resultados, errores, args):
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'maquina': {'sistema': platform.platform(), 'python': platform.python_version(),
+                    'procesador': platform.processor() or platform.machine(), 'cpus': os.cpu_count()},
+        'parametros': {'facturas': args.facturas, 'semilla': args.semilla, 'repeticiones': args.repeticiones},
+        'etapas': resultados,
+        'errores': errores,
+    }
+
+
+def _guardar(documento, ruta):
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(documento, archivo, ensure_ascii=False, indent=2)
+
+
+def _mostrar_comparacion(filas):
+    print(f"\n{'Etapa':<55} {'Base':>9} {'Actual':>9} {'Cambio':>8}")
+    print("-" * 84)
+    for f in filas:
+        base = f"{f['base']:.3f}" if f['base'] is not None else "-"
+        actual = f"{f['actual']:.3f}" if f['actual'] is not None else "falta"
+        cambio = f"{f['cambio']:+.0%}" if f['cambio'] is not None else "nuevo" if f['base'] is None else "-"
+        marca = "  ❌" if f['regresion'] else ""
+        print(f"{f['etapa']:<55} {base:>9} {actual:>9} {cambio:>8}{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sin pantalla de proyecto3, proyecto2 y dashboard4")
+    parser.add_argument('--objetivos', nargs='+', choices=TODOS_LOS_OBJETIVOS, default=TODOS_LOS_OBJETIVOS)
+    parser.add_argument('--facturas', type=int, default=FACTURAS, help="Facturas del esquema sintético")
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES, help="Corridas por objetivo (se usa la mediana)")
+    parser.add_argument('--umbral', type=float, default=UMBRAL, help="Regresión permitida (0.25 = 25 %%)")
+    parser.add_argument('--minimo', type=float, default=MINIMO_SEGUNDOS, help="Diferencia mínima en segundos para contar")
+    parser.add_argument('--base', default=RUTA_BASE, help="Archivo JSON de la línea base")
+    parser.add_argument('--salida', default=RUTA_ULTIMO, help="Archivo JSON con los resultados de esta corrida")
+    parser.add_argument('--datos', default=CARPETA_DATOS, help="Carpeta donde se guardan los datos sintéticos")
+    parser.add_argument('--actualizar', action='store_true', help="Guardar los resultados como línea base")
+    parser.add_argument('--interno', choices=['dashboard4'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno == 'dashboard4':
+        ejercitar_dashboard4()
+        return 0
+
+    carpeta_datos = preparar_datos(args.datos, args.facturas, args.semilla)
+    resultados, errores = medir_objetivos(args.objetivos, carpeta_datos, args.repeticiones)
+    documento = _documento(resultados, errores, args)
+    _guardar(documento, args.salida)
+    print(f"\n💾 Resultados en {args.salida}")
+
+    if errores:
+        print(f"❌ Fallaron: {', '.join(errores)}")
+        return 1
+    if args.actualizar or not os.path.exists(args.base):
+        _guardar(documento, args.base)
+        print(f"📌 Línea base guardada en {args.base}")
+        return 0
+
+    with open(args.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    if base['parametros'] != documento['parametros']:
+        # Con otro tamaño, semilla o repeticiones los tiempos no son comparables
+        print(f"❌ La línea base se midió con otros parámetros: {base['parametros']} "
+              f"(esta corrida: {documento['parametros']}). Repetí con los mismos o usá --actualizar")
+        return 2
+    # Solo se comparan los objetivos que se corrieron
+    base['etapas'] = {k: v for k, v in base['etapas'].items() if k.split('/')[0] in args.objetivos}
+    filas = comparar(resultados, base, args.umbral, args.minimo)
+    _mostrar_comparacion(filas)
+
+    regresiones = [f['etapa'] for f in filas if f['regresion']]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} etapa(s) empeoraron más de {args.umbral:.0%}: {', '.join(regresiones)}")
+        return 1
+    print(f"\n✅ Sin regresiones (umbral {args.umbral:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
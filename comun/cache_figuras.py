@@ -0,0 +1,72 @@
+# comun/cache_figuras.py
+# Cache de figuras Plotly compartido por todas las sesiones del proceso. Guarda
+# cada figura ya construida bajo una clave (gráfico, versión de los datos,
+# filtros) y, si la clave se repite, devuelve la misma figura: no se vuelven a
+# agregar los datos ni a armar la figura (st.plotly_chart valida de nuevo un
+# dict o un JSON, pero de una figura armada solo toma una copia). El tamaño de
+# cada figura se mide por su JSON; al superar el límite se expulsan las menos
+# usadas.
+
+import os
+import threading
+from collections import OrderedDict
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+MB = 1024**2
+LIMITE_CACHE_MB = int(os.environ.get('LIMITE_CACHE_FIGURAS_MB', 64))
+
+
+class CacheFiguras:
+    """LRU de figuras, acotado en bytes (por el tamaño de su JSON)"""
+
+    def __init__(self, limite_bytes=LIMITE_CACHE_MB * MB):
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self._figuras = OrderedDict()  # clave -> (figura, bytes del JSON)
+        self._bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener_o_crear(self, clave, crear):
+        """Devuelve la figura de la clave; si no está, la crea con crear() y la guarda.
+        La figura es compartida: se muestra, no se modifica."""
+        with self._lock:
+            guardada = self._figuras.get(clave)
+            if guardada is not None:
+                self._figuras.move_to_end(clave)
+                self.aciertos += 1
+                return guardada[0]
+
+        figura = crear()
+        # Las figuras vacías son las de error: no se guardan para reintentar
+        if not figura.data:
+            return figura
+        tamano = len(figura.to_json())
+        with self._lock:
+            self.fallos += 1
+            anterior = self._figuras.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            if tamano <= self.limite_bytes:
+                self._figuras[clave] = (figura, tamano)
+                self._bytes += tamano
+                while self._bytes > self.limite_bytes:
+                    _, (_, expulsada) = self._figuras.popitem(last=False)
+                    self._bytes -= expulsada
+        return figura
+
+    def limpiar(self):
+        with self._lock:
+            self._figuras.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'figuras': len(self._figuras),
+                'bytes': self._bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+            }
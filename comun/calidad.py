@@ -0,0 +1,270 @@
+# comun/calidad.py
+# Validación de calidad de las once tablas de ventas en una sola pasada
+# vectorizada. Cada regla produce una máscara booleana sobre la tabla entera
+# (isin, duplicated, comparaciones de columnas), así que el costo es lineal y
+# sirve para validar millones de filas en cada carga.
+#
+# Reglas:
+# - Clave primaria: sin vacíos ni duplicados (se queda la primera aparición).
+# - Claves foráneas: cada referencia apunta a una fila válida de su tabla. Las
+#   claves y referencias salen del esquema del generador (comun/generador_esquema.py)
+#   y las tablas se validan en orden, así una factura en cuarentena arrastra
+#   a sus líneas y ventas.
+# - Fechas: se pueden interpretar como fecha.
+# - Cuentas en centavos exactos (comun/dinero.py): subtotal_linea = cantidad ×
+#   precio_unitario, total_venta = subtotal + iva, y lo cobrado en ventas
+#   (suma de monto por factura) = total_venta.
+#
+# Las filas que violan alguna regla van a cuarentena y a las limpias se les
+# vuelve a aplicar el registro de tipos; el informe lista cada violación con su
+# tabla, regla, clave y valor. Una edición confirmada se valida antes de
+# guardarse junto con sus tablas relacionadas (tablas_relacionadas).
+#
+# Uso por línea de comandos:
+#   python -m comun.calidad --datos proyecto4/datos --salida proyecto4/calidad
+
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from comun.dinero import a_centavos
+from comun.esquemas import ESQUEMAS, FECHA, aplicar_esquema
+from comun.generador_esquema import esquema_ventas
+from comun.vigilante import GrafoDependencias
+
+# ==============================
+# REGLAS
+# ==============================
+ESQUEMA_VENTAS = esquema_ventas()
+CLAVES = {tabla: especificacion['clave'] for tabla, especificacion in ESQUEMA_VENTAS.items()}
+REFERENCIAS = {
+    tabla: {columna: spec['referencia'].split('.')[0]
+            for columna, spec in especificacion['columnas'].items() if spec['tipo'] == 'fk'}
+    for tabla, especificacion in ESQUEMA_VENTAS.items()
+}
+# Cada tabla después de las que referencia
+GRAFO_REFERENCIAS = GrafoDependencias({tabla: list(refs.values()) for tabla, refs in REFERENCIAS.items()})
+ORDEN = GRAFO_REFERENCIAS.orden()
+
+# Cuentas por tabla: (columna, regla, columnas que usa, importe esperado en centavos)
+CUENTAS = {
+    'facturas_detalle': [
+        ('subtotal_linea', 'subtotal_linea = cantidad × precio_unitario', ['cantidad', 'precio_unitario'],
+         lambda df: _centavos(df['precio_unitario']) * pd.to_numeric(df['cantidad'], errors='coerce')),
+    ],
+    'facturas_encabezado': [
+        ('total_venta', 'total_venta = subtotal + iva', ['subtotal', 'iva'],
+         lambda df: _centavos(df['subtotal']) + _centavos(df['iva'])),
+    ],
+}
+REGLA_COBRADO = 'suma de ventas.monto = total_venta'
+CARPETA_CUARENTENA = 'cuarentena'
+ARCHIVO_VIOLACIONES = 'violaciones.csv'
+COLUMNAS_VIOLACIONES = ['tabla', 'regla', 'clave', 'columna', 'valor']
+
+
+def _centavos(serie):
+    """Importe en centavos; lo que no es número queda como faltante"""
+    return a_centavos(pd.to_numeric(serie, errors='coerce'))
+
+
+def _distintos(esperado, real):
+    """Máscara numpy de filas donde no coinciden (un faltante cuenta como distinto)"""
+    return esperado.ne(real).fillna(True).to_numpy(dtype=bool)
+
+
+def columnas_faltantes(datos, tablas):
+    """{tabla: columnas clave que le faltan} para las tablas pedidas"""
+    faltantes = {}
+    for tabla in tablas:
+        requeridas = [CLAVES[tabla], *REFERENCIAS.get(tabla, {})]
+        ausentes = [col for col in requeridas if col not in datos[tabla].columns]
+        if ausentes:
+            faltantes[tabla] = ausentes
+    return faltantes
+
+def tablas_relacionadas(tablas):
+    """Tablas a validar si cambian `tablas`: ellas, las que las referencian (una
+    fila puede quedar sin su referencia) y las que referencian todas esas"""
+    relacionadas = set(tablas) | set(GRAFO_REFERENCIAS.afectadas(tablas))
+    for tabla in list(relacionadas):
+        relacionadas.update(REFERENCIAS.get(tabla, {}).values())
+    return [tabla for tabla in ORDEN if tabla in relacionadas]
+
+# ==============================
+# VALIDACIÓN
+# ==============================
+class _Tabla:
+    """Máscara de filas malas de una tabla y las violaciones encontradas"""
+
+    def __init__(self, nombre, df):
+        self.nombre = nombre
+        self.df = df
+        self.malas = np.zeros(len(df), dtype=bool)
+        self.violaciones = []
+
+    def marcar(self, regla, mascara, columna):
+        if not mascara.any():
+            return
+        self.malas |= mascara
+        filas = self.df.loc[mascara]
+        clave = CLAVES[self.nombre]
+        self.violaciones.append(pd.DataFrame({
+            'tabla': self.nombre,
+            'regla': regla,
+            'clave': filas[clave].to_numpy() if clave in filas.columns else pd.NA,
+            'columna': columna,
+            'valor': filas[columna].astype(str).to_numpy() if columna in filas.columns else '',
+        }))
+
+    def falta_columna(self, columna):
+        self.violaciones.append(pd.DataFrame([{
+            'tabla': self.nombre, 'regla': 'columna faltante', 'clave': pd.NA, 'columna': columna, 'valor': '',
+        }]))
+
+
+def _validar_tabla(nombre, df, validas):
+    tabla = _Tabla(nombre, df)
+    clave = CLAVES[nombre]
+
+    # Clave primaria
+    if clave in df.columns:
+        tabla.marcar('clave vacía', df[clave].isna().to_numpy(), clave)
+        tabla.marcar('clave duplicada', (df[clave].duplicated(keep='first') & df[clave].notna()).to_numpy(), clave)
+    else:
+        tabla.falta_columna(clave)
+
+    # Fechas
+    for columna, tipo in ESQUEMAS.get(nombre, {}).items():
+        if tipo != FECHA or columna not in df.columns:
+            continue
+        fechas = df[columna]
+        if not pd.api.types.is_datetime64_any_dtype(fechas):
+            fechas = pd.to_datetime(fechas, errors='coerce')
+        tabla.marcar('fecha inválida', fechas.isna().to_numpy(), columna)
+
+    # Cuentas
+    for columna, regla, usadas, esperado in CUENTAS.get(nombre, []):
+        ausentes = [col for col in [columna, *usadas] if col not in df.columns]
+        if ausentes:
+            for col in ausentes:
+                tabla.falta_columna(col)
+            continue
+        tabla.marcar(regla, _distintos(esperado(df), _centavos(df[columna])), columna)
+
+    # Claves foráneas contra las filas válidas de la tabla referida
+    for columna, referida in REFERENCIAS.get(nombre, {}).items():
+        if columna not in df.columns:
+            tabla.falta_columna(columna)
+        elif referida in validas:
+            tabla.marcar(f'{columna} sin fila válida en {referida}',
+                         ~df[columna].isin(validas[referida]).to_numpy(), columna)
+    return tabla
+
+
+def _validar_cobrado(tabla, encabezado):
+    """Ventas de las facturas cuyo cobrado no coincide con total_venta"""
+    df = tabla.df
+    if encabezado is None or not {'id_factura', 'monto'} <= set(df.columns) \
+            or 'total_venta' not in encabezado.columns:
+        return
+    sanas = ~tabla.malas
+    montos = _centavos(df['monto'])
+    tabla.marcar('monto inválido', montos.isna().to_numpy() & sanas, 'monto')
+    sanas &= ~tabla.malas
+    cobrado = montos[sanas].groupby(df['id_factura'][sanas]).sum()
+    total = _centavos(encabezado['total_venta']).set_axis(encabezado['id_factura'])
+    descuadradas = cobrado.index[_distintos(total.reindex(cobrado.index), cobrado)]
+    tabla.marcar(REGLA_COBRADO, df['id_factura'].isin(descuadradas).to_numpy() & sanas, 'monto')
+
+
+def validar(datos):
+    """Valida las tablas de ventas presentes en `datos` -> ResultadoValidacion"""
+    inicio = time.perf_counter()
+    validas, limpias, cuarentena, violaciones = {}, {}, {}, []
+    for nombre in ORDEN:
+        if nombre not in datos:
+            continue
+        df = datos[nombre]
+        tabla = _validar_tabla(nombre, df, validas)
+        if nombre == 'ventas':
+            _validar_cobrado(tabla, limpias.get('facturas_encabezado'))
+        violaciones.extend(tabla.violaciones)
+        if tabla.malas.any():
+            # Un valor malo deja sin convertir toda su columna (una fecha inválida
+            # la deja como texto): sin esas filas, las limpias ya admiten el esquema
+            limpias[nombre] = aplicar_esquema(df.loc[~tabla.malas].reset_index(drop=True), nombre)
+            cuarentena[nombre] = df.loc[tabla.malas].reset_index(drop=True)
+        else:
+            limpias[nombre] = df
+        if CLAVES[nombre] in df.columns:
+            validas[nombre] = pd.Index(limpias[nombre][CLAVES[nombre]])
+    violaciones = (pd.concat(violaciones, ignore_index=True) if violaciones
+                   else pd.DataFrame(columns=COLUMNAS_VIOLACIONES))
+    return ResultadoValidacion(violaciones, limpias, cuarentena, time.perf_counter() - inicio)
+
+
+class ResultadoValidacion:
+    """Tablas limpias, filas en cuarentena y violaciones de una validación"""
+
+    def __init__(self, violaciones, limpias, cuarentena, segundos):
+        self.violaciones = violaciones
+        self.limpias = limpias
+        self.cuarentena = cuarentena
+        self.segundos = segundos
+
+    def filas_en_cuarentena(self):
+        return sum(len(df) for df in self.cuarentena.values())
+
+    def resumen(self):
+        """Cantidad de violaciones por tabla y regla"""
+        if self.violaciones.empty:
+            return pd.DataFrame(columns=['tabla', 'regla', 'violaciones'])
+        return (self.violaciones.groupby(['tabla', 'regla'], sort=False).size()
+                .rename('violaciones').reset_index())
+
+    def texto(self):
+        if self.violaciones.empty:
+            return f"🧪 Calidad de datos: sin violaciones ({self.segundos:.2f} s)"
+        return (f"🧪 Calidad de datos: {len(self.violaciones)} violaciones, "
+                f"{self.filas_en_cuarentena()} filas en cuarentena ({self.segundos:.2f} s)")
+
+    def guardar(self, carpeta):
+        """Escribe el informe de violaciones y un CSV por tabla con las filas en cuarentena"""
+        carpeta_cuarentena = os.path.join(carpeta, CARPETA_CUARENTENA)
+        os.makedirs(carpeta_cuarentena, exist_ok=True)
+        self.violaciones.to_csv(os.path.join(carpeta, ARCHIVO_VIOLACIONES), index=False)
+        for archivo in os.listdir(carpeta_cuarentena):
+            # Las cuarentenas de una validación anterior ya no aplican
+            if archivo.endswith('.csv') and archivo[:-4] not in self.cuarentena:
+                os.remove(os.path.join(carpeta_cuarentena, archivo))
+        for nombre, df in self.cuarentena.items():
+            df.to_csv(os.path.join(carpeta_cuarentena, f"{nombre}.csv"), index=False)
+
+# ==============================
+# LÍNEA DE COMANDOS
+# ==============================
+def main():
+    parser = argparse.ArgumentParser(description="Valida las tablas de ventas y separa las filas inválidas")
+    parser.add_argument('--datos', default='datos', help="Carpeta con los CSV de origen")
+    parser.add_argument('--salida', default='calidad', help="Carpeta del informe y la cuarentena")
+    args = parser.parse_args()
+
+    datos = {}
+    for nombre in ORDEN:
+        ruta = os.path.join(args.datos, f"{nombre}.csv")
+        if os.path.exists(ruta):
+            datos[nombre] = aplicar_esquema(pd.read_csv(ruta), nombre)
+    resultado = validar(datos)
+    resultado.guardar(args.salida)
+    print(resultado.texto())
+    if not resultado.violaciones.empty:
+        print(resultado.resumen().to_string(index=False))
+    print(f"✅ Informe guardado en {args.salida}/")
+
+
+if __name__ == "__main__":
+    main()
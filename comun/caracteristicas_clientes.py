@@ -0,0 +1,184 @@
+# comun/caracteristicas_clientes.py
+# Almacén de características por cliente (RFM y ticket promedio) calculadas
+# desde facturas_encabezado. Cada característica es un arreglo de numpy
+# indexado directamente por id_cliente, así que consultar un cliente es O(1)
+# y exportar a todos es una sola operación vectorizada. Se actualiza solo con
+# las facturas posteriores a la última procesada.
+#
+# Uso por línea de comandos:
+#   python -m comun.caracteristicas_clientes --datos proyecto4/datos --salida caracteristicas_clientes.csv
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from comun.dinero import CENTAVOS, a_centavos, a_pesos, promedio
+from comun.esquemas import aplicar_esquema
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+# Valores iniciales: así np.minimum/np.maximum no necesitan casos especiales
+SIN_PRIMERA = np.iinfo('int32').max
+SIN_COMPRAS = np.iinfo('int32').min
+DIAS_POR_MES = 30.4375
+CAPACIDAD_INICIAL = 1024
+
+
+def _a_dias(fechas):
+    """Fechas -> días desde 1970-01-01 (int32)"""
+    return pd.to_datetime(fechas).to_numpy(dtype='datetime64[D]').astype('int32')
+
+
+class AlmacenCaracteristicas:
+    """Recencia, frecuencia, monto, ticket promedio y cantidad de facturas por cliente"""
+
+    def __init__(self, capacidad=CAPACIDAD_INICIAL):
+        self.primera_compra = np.full(capacidad, SIN_PRIMERA, dtype='int32')
+        self.ultima_compra = np.full(capacidad, SIN_COMPRAS, dtype='int32')
+        self.cantidad_facturas = np.zeros(capacidad, dtype='int32')
+        self.monto_centavos = np.zeros(capacidad, dtype=CENTAVOS)
+        self.ultima_factura = 0
+        self.ultimo_dia = SIN_COMPRAS
+
+    # ------------------------------
+    # Actualización
+    # ------------------------------
+    def _asegurar_capacidad(self, id_maximo):
+        capacidad = len(self.cantidad_facturas)
+        if id_maximo < capacidad:
+            return
+        nueva = max(capacidad * 2, id_maximo + 1)
+        extra = nueva - capacidad
+        self.primera_compra = np.concatenate([self.primera_compra, np.full(extra, SIN_PRIMERA, dtype='int32')])
+        self.ultima_compra = np.concatenate([self.ultima_compra, np.full(extra, SIN_COMPRAS, dtype='int32')])
+        self.cantidad_facturas = np.concatenate([self.cantidad_facturas, np.zeros(extra, dtype='int32')])
+        self.monto_centavos = np.concatenate([self.monto_centavos, np.zeros(extra, dtype=CENTAVOS)])
+
+    def actualizar(self, encabezado, desde=None):
+        """Incorpora las facturas con id_factura posterior a `desde` (por defecto la
+        última procesada). Con `desde` la marca no avanza: al leer un archivo por
+        bloques desordenados la marca se fija una vez, al terminar el archivo.
+        Las facturas sin fecha válida se ignoran: como días serían 1970-01-01."""
+        tope = self.ultima_factura if desde is None else desde
+        posteriores = encabezado[encabezado['id_factura'] > tope]
+        if posteriores.empty:
+            return 0
+        if desde is None:
+            self.ultima_factura = max(self.ultima_factura, int(posteriores['id_factura'].max()))
+        nuevas = posteriores[pd.to_datetime(posteriores['fecha'], errors='coerce').notna()]
+        if nuevas.empty:
+            return 0
+        clientes = nuevas['id_cliente'].to_numpy(dtype='int64')
+        dias = _a_dias(nuevas['fecha'])
+        self._asegurar_capacidad(int(clientes.max()))
+
+        np.minimum.at(self.primera_compra, clientes, dias)
+        np.maximum.at(self.ultima_compra, clientes, dias)
+        np.add.at(self.cantidad_facturas, clientes, 1)
+        np.add.at(self.monto_centavos, clientes, a_centavos(nuevas['total_venta'].to_numpy(dtype='float64')))
+
+        self.ultimo_dia = max(self.ultimo_dia, int(dias.max()))
+        return len(nuevas)
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def _referencia(self, fecha_referencia):
+        if fecha_referencia is None:
+            return self.ultimo_dia
+        return int(_a_dias(pd.Series([fecha_referencia]))[0])
+
+    def _calcular(self, ids, referencia):
+        cantidad = self.cantidad_facturas[ids]
+        monto = self.monto_centavos[ids]
+        meses_activo = np.maximum((referencia - self.primera_compra[ids]) / DIAS_POR_MES, 1.0)
+        return {
+            'recencia_dias': referencia - self.ultima_compra[ids],
+            'frecuencia_mensual': np.round(cantidad / meses_activo, 4),
+            'monto_total': a_pesos(monto),
+            'ticket_promedio': promedio(monto, cantidad),
+            'cantidad_facturas': cantidad,
+        }
+
+    def obtener(self, id_cliente, fecha_referencia=None):
+        """Características de un cliente (None si todavía no compró)"""
+        if id_cliente >= len(self.cantidad_facturas) or self.cantidad_facturas[id_cliente] == 0:
+            return None
+        valores = self._calcular(np.array([id_cliente]), self._referencia(fecha_referencia))
+        return {nombre: valor[0].item() for nombre, valor in valores.items()}
+
+    def exportar(self, fecha_referencia=None):
+        """DataFrame con las características de todos los clientes con compras"""
+        ids = np.flatnonzero(self.cantidad_facturas)
+        df = pd.DataFrame(self._calcular(ids, self._referencia(fecha_referencia)))
+        df.insert(0, 'id_cliente', ids)
+        return df
+
+    # ------------------------------
+    # Persistencia
+    # ------------------------------
+    def guardar(self, ruta):
+        np.savez_compressed(
+            ruta,
+            primera_compra=self.primera_compra,
+            ultima_compra=self.ultima_compra,
+            cantidad_facturas=self.cantidad_facturas,
+            monto_centavos=self.monto_centavos,
+            marcas=np.array([self.ultima_factura, self.ultimo_dia], dtype='int64'),
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as datos:
+            almacen = cls(capacidad=0)
+            almacen.primera_compra = datos['primera_compra']
+            almacen.ultima_compra = datos['ultima_compra']
+            almacen.cantidad_facturas = datos['cantidad_facturas']
+            if 'monto_centavos' in datos:
+                almacen.monto_centavos = datos['monto_centavos']
+            else:
+                # Almacenes guardados antes de los centavos (monto en pesos float)
+                almacen.monto_centavos = a_centavos(datos['monto_total'])
+            almacen.ultima_factura, almacen.ultimo_dia = (int(v) for v in datos['marcas'])
+        return almacen
+
+
+# ==============================
+# EJECUCIÓN
+# ==============================
+def main():
+    parser = argparse.ArgumentParser(description="Exporta las características RFM de cada cliente")
+    parser.add_argument('--datos', default='datos', help="Carpeta con facturas_encabezado.csv")
+    parser.add_argument('--salida', default='caracteristicas_clientes.csv', help="CSV a generar")
+    parser.add_argument('--almacen', default=None, help="Archivo .npz para guardar/retomar el almacén")
+    parser.add_argument('--referencia', default=None, help="Fecha de referencia para la recencia (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    try:
+        almacen = AlmacenCaracteristicas.cargar(args.almacen) if args.almacen else AlmacenCaracteristicas()
+    except FileNotFoundError:
+        almacen = AlmacenCaracteristicas()
+
+    nuevas = leidas = 0
+    desde = maxima = almacen.ultima_factura
+    for bloque in pd.read_csv(f"{args.datos}/facturas_encabezado.csv", chunksize=500_000):
+        bloque = aplicar_esquema(bloque, 'facturas_encabezado')
+        nuevas += almacen.actualizar(bloque, desde=desde)
+        leidas += int((bloque['id_factura'] > desde).sum())
+        if not bloque.empty:
+            maxima = max(maxima, int(bloque['id_factura'].max()))
+    almacen.ultima_factura = maxima
+    if args.almacen:
+        almacen.guardar(args.almacen)
+
+    df = almacen.exportar(args.referencia)
+    df.to_csv(args.salida, index=False)
+    if leidas > nuevas:
+        print(f"⚠️ {leidas - nuevas} facturas sin fecha válida ignoradas")
+    print(f"✅ {nuevas} facturas nuevas procesadas; {len(df)} clientes exportados a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
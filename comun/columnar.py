@@ -0,0 +1,413 @@
+# comun/columnar.py
+# Almacén columnar en disco para las tablas de hechos (facturas_encabezado,
+# facturas_detalle y ventas). Cada tabla es una carpeta con un .npy por
+# columna, un diccionario de textos y un archivo con la cantidad de filas:
+#
+#   .columnar/facturas_encabezado/
+#       _tabla.json          tipos de las columnas y cantidad de filas
+#       _diccionario.json    valores de las columnas de texto
+#       id_factura.npy  fecha.npy  numero.npy  total_venta.npy  ...
+#
+# - Importes: int64 en centavos (comun/dinero.py), así las sumas son exactas.
+# - Fechas: datetime64[s].
+# - Textos: códigos int32 que apuntan al diccionario (-1 = vacío).
+#
+# Las columnas se abren con np.memmap (np.load con mmap_mode): las sumas y
+# agrupaciones son reducciones de numpy sobre las páginas del archivo, sin
+# armar DataFrames, y esas páginas quedan en el cache del sistema operativo
+# compartidas por todos los procesos que abren el almacén.
+#
+# agregar() escribe las filas nuevas al final de cada .npy y reescribe solo el
+# encabezado (numpy deja lugar para que la forma crezca). La cantidad de filas
+# de _tabla.json se actualiza al final: si algo falla a mitad de camino, lo
+# escrito de más se ignora y se pisa en la próxima escritura. Una tabla que hay
+# que reescribir entera se arma en una carpeta temporal al lado y se cambia por
+# la anterior con renombres; si algo falla, la anterior queda como estaba.
+#
+# Uso por línea de comandos:
+#   python -m comun.columnar --datos proyecto4/datos --salida proyecto4/.columnar
+
+import io
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from comun.dinero import CENTAVOS, a_centavos, a_pesos
+from comun.esquemas import ESQUEMAS, IMPORTE, aplicar_esquema
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+TABLAS_HECHOS = ['facturas_encabezado', 'facturas_detalle', 'ventas']
+ARCHIVO_TABLA = '_tabla.json'
+ARCHIVO_DICCIONARIO = '_diccionario.json'
+ARCHIVO_BLOQUEO = '.bloqueo'
+# Carpetas de una tabla que se está reescribiendo (junto a la carpeta de la tabla)
+SUFIJO_NUEVA = '.nueva-'
+SUFIJO_VIEJA = '.vieja-'
+SEGUNDOS_BLOQUEO = 30
+SIN_TEXTO = -1
+
+# Tipos de columna del almacén
+TIPO_CENTAVOS = 'centavos'
+TIPO_FECHA = 'fecha'
+TIPO_TEXTO = 'texto'
+TIPO_NUMERO = 'numero'
+FECHA_NPY = 'datetime64[s]'
+CODIGO_TEXTO = 'int32'
+
+
+def _tipo_columna(tabla, columna, serie):
+    if ESQUEMAS.get(tabla, {}).get(columna) == IMPORTE:
+        return TIPO_CENTAVOS
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return TIPO_FECHA
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return TIPO_NUMERO
+    return TIPO_TEXTO
+
+
+def _valores(serie, tipo, diccionario):
+    """Columna de pandas -> arreglo numpy del almacén (extiende el diccionario si hace falta)"""
+    if tipo == TIPO_CENTAVOS:
+        centavos = a_centavos(serie)
+        if centavos.isna().any():
+            raise ValueError(f"La columna {serie.name} tiene importes vacíos")
+        return centavos.to_numpy(dtype=CENTAVOS)
+    if tipo == TIPO_FECHA:
+        return pd.to_datetime(serie).to_numpy(dtype=FECHA_NPY)
+    if tipo == TIPO_NUMERO:
+        if serie.isna().any() and not pd.api.types.is_float_dtype(serie):
+            raise ValueError(f"La columna {serie.name} tiene valores vacíos")
+        return serie.to_numpy(dtype=getattr(serie.dtype, 'numpy_dtype', None))
+    # Texto: códigos al diccionario, agregando los valores que no estaban
+    vacios = serie.isna().to_numpy()
+    textos = serie.astype(str)
+    nuevos = pd.Index(textos[~vacios].unique()).difference(pd.Index(diccionario), sort=False)
+    diccionario.extend(nuevos.tolist())
+    codigos = pd.Index(diccionario).get_indexer(textos).astype(CODIGO_TEXTO)
+    codigos[vacios] = SIN_TEXTO
+    return codigos
+
+# ==============================
+# ARCHIVOS .NPY
+# ==============================
+def _encabezado(dtype, filas):
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buffer, {
+        'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (filas,)
+    })
+    return buffer.getvalue()
+
+
+def _agregar_npy(ruta, valores, filas):
+    """Escribe `valores` a partir de la fila `filas` del .npy y actualiza su forma"""
+    with open(ruta, 'r+b') as archivo:
+        np.lib.format.read_magic(archivo)
+        _, _, dtype = np.lib.format.read_array_header_1_0(archivo)
+        inicio = archivo.tell()
+        valores = np.ascontiguousarray(valores.astype(dtype, casting='same_kind', copy=False))
+        encabezado = _encabezado(dtype, filas + len(valores))
+        if len(encabezado) != inicio:
+            # No entra la forma nueva en el encabezado: se reescribe el archivo
+            anteriores = np.load(ruta, mmap_mode='r')[:filas]
+            completo = np.concatenate([anteriores, valores])
+            del anteriores
+            archivo.close()
+            np.save(ruta, completo)
+            return
+        archivo.seek(inicio + filas * dtype.itemsize)
+        archivo.write(valores.tobytes())
+        archivo.truncate()
+        archivo.seek(0)
+        archivo.write(encabezado)
+
+
+def _leer_json(ruta, defecto):
+    if not os.path.exists(ruta):
+        return defecto
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_json(ruta, datos):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+# ==============================
+# TABLA
+# ==============================
+class TablaColumnar:
+    """Una tabla del almacén: columnas mapeadas en memoria y reducciones sobre ellas"""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        meta = _leer_json(os.path.join(carpeta, ARCHIVO_TABLA), {'columnas': {}, 'filas': 0})
+        self.tipos = meta['columnas']
+        self.filas = meta['filas']
+        self._diccionario = None
+        self._mapas = {}
+
+    @property
+    def columnas(self):
+        return list(self.tipos)
+
+    def _ruta(self, columna):
+        return os.path.join(self.carpeta, f"{columna}.npy")
+
+    def diccionario(self, columna):
+        if self._diccionario is None:
+            self._diccionario = _leer_json(os.path.join(self.carpeta, ARCHIVO_DICCIONARIO), {})
+        return self._diccionario.get(columna, [])
+
+    # ------------------------------
+    # Lectura
+    # ------------------------------
+    def columna(self, nombre):
+        """Arreglo de la columna tal como está en disco (np.memmap de solo lectura)"""
+        if nombre not in self._mapas:
+            if nombre not in self.tipos:
+                raise KeyError(f"La tabla no tiene la columna {nombre}")
+            self._mapas[nombre] = np.load(self._ruta(nombre), mmap_mode='r')[:self.filas]
+        return self._mapas[nombre]
+
+    def textos(self, nombre):
+        """Columna de texto decodificada (arma un arreglo nuevo)"""
+        valores = np.asarray(self.diccionario(nombre) + [None], dtype=object)
+        return valores[self.columna(nombre)]
+
+    def a_pandas(self, columnas=None):
+        """DataFrame con las columnas pedidas (importes en pesos); copia los datos"""
+        datos = {}
+        for nombre in columnas or self.columnas:
+            tipo = self.tipos[nombre]
+            if tipo == TIPO_TEXTO:
+                datos[nombre] = self.textos(nombre)
+            elif tipo == TIPO_CENTAVOS:
+                datos[nombre] = a_pesos(self.columna(nombre))
+            else:
+                datos[nombre] = np.array(self.columna(nombre))
+        return pd.DataFrame(datos)
+
+    # ------------------------------
+    # Reducciones
+    # ------------------------------
+    def _en_unidades(self, nombre, valores):
+        return a_pesos(valores) if self.tipos[nombre] == TIPO_CENTAVOS else valores
+
+    def suma(self, nombre, mascara=None):
+        """Suma de la columna (los importes, exacta y en pesos)"""
+        valores = self.columna(nombre)
+        if mascara is not None:
+            valores = valores[mascara]
+        return self._en_unidades(nombre, valores.sum())
+
+    def _grupos(self, clave):
+        """(posición de grupo por fila, etiquetas de los grupos) para agrupar por `clave`"""
+        valores = self.columna(clave)
+        if self.tipos[clave] == TIPO_TEXTO:
+            return valores + 1, np.asarray([None] + self.diccionario(clave), dtype=object)
+        if self.tipos[clave] == TIPO_FECHA:
+            valores = valores.astype('datetime64[D]')
+        minimo = valores.min() if len(valores) else 0
+        posiciones = (valores - minimo).astype('int64')
+        return posiciones, minimo + np.arange(posiciones.max() + 1 if len(posiciones) else 0)
+
+    def suma_por(self, nombre, clave, mascara=None):
+        """Series clave -> suma de la columna, solo con los grupos que tienen filas"""
+        posiciones, etiquetas = self._grupos(clave)
+        valores = self.columna(nombre)
+        if mascara is not None:
+            posiciones, valores = posiciones[mascara], valores[mascara]
+        totales = np.zeros(len(etiquetas), dtype=valores.dtype)
+        np.add.at(totales, posiciones, valores)
+        presentes = np.bincount(posiciones, minlength=len(etiquetas)) > 0
+        return pd.Series(self._en_unidades(nombre, totales[presentes]), index=etiquetas[presentes],
+                         name=nombre).rename_axis(clave)
+
+    def suma_por_mes(self, nombre, fecha='fecha', mascara=None):
+        """Series mes -> suma de la columna"""
+        meses = self.columna(fecha).astype('datetime64[M]')
+        valores = self.columna(nombre)
+        if mascara is not None:
+            meses, valores = meses[mascara], valores[mascara]
+        etiquetas, posiciones = np.unique(meses, return_inverse=True)
+        totales = np.zeros(len(etiquetas), dtype=valores.dtype)
+        np.add.at(totales, posiciones, valores)
+        return pd.Series(self._en_unidades(nombre, totales), index=pd.DatetimeIndex(etiquetas), name=nombre)
+
+    def bytes(self):
+        return sum(os.path.getsize(self._ruta(nombre)) for nombre in self.tipos)
+
+    # ------------------------------
+    # Escritura
+    # ------------------------------
+    def _convertir(self, tabla, df):
+        tipos = self.tipos or {col: _tipo_columna(tabla, col, df[col]) for col in df.columns}
+        faltantes = [col for col in tipos if col not in df.columns]
+        if faltantes:
+            raise ValueError(f"A las filas nuevas les faltan columnas: {faltantes}")
+        diccionario = {col: list(self.diccionario(col)) for col, tipo in tipos.items() if tipo == TIPO_TEXTO}
+        valores = {col: _valores(df[col], tipo, diccionario.get(col)) for col, tipo in tipos.items()}
+        return tipos, diccionario, valores
+
+    def agregar(self, tabla, df):
+        """Escribe las filas de df al final de la tabla (la crea si no existe)"""
+        if df.empty and self.tipos:
+            return 0
+        tipos, diccionario, valores = self._convertir(tabla, df)
+        os.makedirs(self.carpeta, exist_ok=True)
+        # Primero el diccionario: los códigos nuevos tienen que poder resolverse
+        _escribir_json(os.path.join(self.carpeta, ARCHIVO_DICCIONARIO), diccionario)
+        for col, arreglo in valores.items():
+            if self.filas == 0 and not os.path.exists(self._ruta(col)):
+                np.save(self._ruta(col), arreglo)
+            else:
+                _agregar_npy(self._ruta(col), arreglo, self.filas)
+        self.filas += len(df)
+        self.tipos = tipos
+        _escribir_json(os.path.join(self.carpeta, ARCHIVO_TABLA), {'columnas': tipos, 'filas': self.filas})
+        self._diccionario = diccionario
+        self._mapas = {}
+        return len(df)
+
+    def coincide(self, tabla, df):
+        """True si las primeras filas de df son exactamente las que ya tiene la tabla"""
+        if not self.tipos or len(df) < self.filas or set(self.tipos) - set(df.columns):
+            return False
+        try:
+            _, _, valores = self._convertir(tabla, df.iloc[:self.filas])
+        except (ValueError, TypeError, OverflowError):
+            return False
+        return all(np.array_equal(self.columna(col), valores[col]) for col in self.tipos)
+
+# ==============================
+# ALMACÉN
+# ==============================
+class AlmacenColumnar:
+    """Carpeta con las tablas de hechos en formato columnar"""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self._lock = threading.Lock()
+        self._tablas = {}
+
+    def _carpeta_tabla(self, nombre):
+        return os.path.join(self.carpeta, nombre)
+
+    def tabla(self, nombre):
+        if nombre not in self._tablas:
+            self._tablas[nombre] = TablaColumnar(self._carpeta_tabla(nombre))
+        return self._tablas[nombre]
+
+    @contextmanager
+    def _bloqueo(self):
+        """Exclusión entre hilos y procesos que escriben en la misma carpeta"""
+        os.makedirs(self.carpeta, exist_ok=True)
+        ruta = os.path.join(self.carpeta, ARCHIVO_BLOQUEO)
+        limite = time.monotonic() + SEGUNDOS_BLOQUEO
+        with self._lock:
+            while True:
+                try:
+                    descriptor = os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    if time.monotonic() > limite:
+                        raise TimeoutError(f"El almacén {self.carpeta} está bloqueado (borrar {ruta} si quedó de más)")
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                os.close(descriptor)
+                os.remove(ruta)
+
+    def agregar(self, nombre, df):
+        """Agrega filas al final de una tabla; devuelve cuántas se escribieron"""
+        with self._bloqueo():
+            tabla = TablaColumnar(self._carpeta_tabla(nombre))
+            agregadas = tabla.agregar(nombre, df)
+            self._tablas[nombre] = tabla
+            return agregadas
+
+    def _temporales(self, nombre):
+        """Carpetas que dejó una reescritura de la tabla interrumpida"""
+        prefijos = (f"{nombre}{SUFIJO_NUEVA}", f"{nombre}{SUFIJO_VIEJA}")
+        return [os.path.join(self.carpeta, entrada) for entrada in os.listdir(self.carpeta)
+                if entrada.startswith(prefijos)]
+
+    def _reescribir(self, nombre, df):
+        """Arma la tabla en una carpeta temporal y la cambia por la actual"""
+        destino = self._carpeta_tabla(nombre)
+        sufijo = f"{os.getpid()}-{threading.get_ident()}"
+        nueva, vieja = f"{destino}{SUFIJO_NUEVA}{sufijo}", f"{destino}{SUFIJO_VIEJA}{sufijo}"
+        try:
+            escritas = TablaColumnar(nueva).agregar(nombre, df)
+        except BaseException:
+            if os.path.isdir(nueva):
+                shutil.rmtree(nueva)
+            raise
+        # Suelta los mapas de este proceso: en Windows no se puede mover ni
+        # borrar un archivo mapeado
+        self._tablas.pop(nombre, None)
+        if os.path.isdir(destino):
+            os.rename(destino, vieja)
+        os.rename(nueva, destino)
+        if os.path.isdir(vieja):
+            shutil.rmtree(vieja)
+        return escritas
+
+    def sincronizar(self, tablas):
+        """Deja el almacén igual a los DataFrames de `tablas`.
+
+        Si una tabla solo creció se agregan las filas nuevas; si cambió alguna
+        fila ya guardada se reescribe entera. Devuelve {tabla: filas escritas}.
+        """
+        escritas = {}
+        with self._bloqueo():
+            for nombre, df in tablas.items():
+                for temporal in self._temporales(nombre):
+                    shutil.rmtree(temporal)
+                tabla = TablaColumnar(self._carpeta_tabla(nombre))
+                if tabla.coincide(nombre, df):
+                    escritas[nombre] = tabla.agregar(nombre, df.iloc[tabla.filas:])
+                else:
+                    del tabla
+                    escritas[nombre] = self._reescribir(nombre, df)
+                    tabla = TablaColumnar(self._carpeta_tabla(nombre))
+                self._tablas[nombre] = tabla
+        return escritas
+
+    def bytes(self):
+        return sum(self.tabla(nombre).bytes() for nombre in TABLAS_HECHOS
+                   if self.tabla(nombre).tipos)
+
+
+# ==============================
+# LÍNEA DE COMANDOS
+# ==============================
+def main():
+    parser = argparse.ArgumentParser(description="Convierte las tablas de hechos a columnas .npy")
+    parser.add_argument('--datos', default='datos', help="Carpeta con los CSV de origen")
+    parser.add_argument('--salida', default='.columnar', help="Carpeta del almacén")
+    args = parser.parse_args()
+
+    almacen = AlmacenColumnar(args.salida)
+    tablas = {nombre: aplicar_esquema(pd.read_csv(os.path.join(args.datos, f"{nombre}.csv")), nombre)
+              for nombre in TABLAS_HECHOS}
+    escritas = almacen.sincronizar(tablas)
+    for nombre, filas in escritas.items():
+        print(f"✅ {nombre}: {filas} filas escritas ({almacen.tabla(nombre).filas} en total)")
+    print(f"💾 Almacén columnar: {almacen.bytes() / 1024**2:,.2f} MB en {args.salida}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# comun/consultas_sql.py
+# Capa SQL embebida sobre las tablas de datos/. Usa DuckDB si está instalado
+# (ejecución vectorizada y en paralelo, vistas directas sobre los Parquet/CSV
+# o sobre DataFrames ya cargados, sin copiarlos) y si no, SQLite en memoria
+# (cada tabla se copia la primera vez que una consulta la nombra y las
+# consultas corren en un solo hilo).
+# Solo se aceptan consultas de lectura; los resultados se piden por páginas.
+# Desde la primera consulta DuckDB no puede leer más archivos que los
+# registrados (ej. read_csv('/etc/passwd') dentro de un SELECT falla).
+#
+# Uso por línea de comandos:
+#   python -m comun.consultas_sql --datos proyecto4/datos "SELECT * FROM rubros"
+#   python -m comun.consultas_sql --datos proyecto3/datos --filas 50 "SELECT ..."
+
+import os
+import re
+import sqlite3
+import argparse
+import threading
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+TABLAS = [
+    'clientes', 'productos', 'facturas_encabezado', 'facturas_detalle', 'rubros', 'sucursales',
+    'condicion_iva', 'localidades', 'proveedores', 'provincias', 'ventas'
+]
+FILAS_PAGINA = 100
+FILAS_BLOQUE_SQLITE = 100_000
+
+_LECTURA = re.compile(r'^\s*(select|with|values)\b', re.IGNORECASE)
+
+
+def _texto_sql(texto):
+    """Literal de texto SQL con las comillas escapadas"""
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def validar_consulta(sql):
+    """Consulta sin ';' final; error si no es de solo lectura"""
+    sql = sql.strip().rstrip(';').strip()
+    if not _LECTURA.match(sql):
+        raise ValueError("Solo se permiten consultas SELECT / WITH")
+    if ';' in sql:
+        raise ValueError("Solo se permite una consulta por vez")
+    return sql
+
+
+class MotorSQL:
+    """Conexión SQL embebida con las tablas registradas como vistas"""
+
+    def __init__(self, motor='auto'):
+        if motor == 'auto':
+            motor = 'duckdb' if duckdb is not None else 'sqlite'
+        if motor == 'duckdb' and duckdb is None:
+            raise ImportError("DuckDB no está instalado (pip install duckdb)")
+        self.motor = motor
+        self._lock = threading.Lock()
+        self._tablas = {}
+        # DuckDB: acceso a archivos cerrado (se cierra antes de la primera consulta)
+        self._bloqueado = False
+        # SQLite: nombre -> DataFrame o ruta, se copian cuando una consulta las nombra
+        self._pendientes = {}
+        # DuckDB: los DataFrames registrados son vistas de cada conexión, así que
+        # se vuelven a registrar (sin copiarlos) en el cursor de cada consulta
+        self._dataframes = {}
+        if motor == 'duckdb':
+            self._con = duckdb.connect(':memory:')
+            self._con.execute(f"SET threads TO {os.cpu_count() or 1}")
+        else:
+            self._con = sqlite3.connect(':memory:', check_same_thread=False)
+            self._con.execute("PRAGMA query_only = ON")
+
+    # ------------------------------
+    # Registro de tablas
+    # ------------------------------
+    def registrar_archivo(self, nombre, ruta):
+        """Vista sobre un CSV o Parquet (en SQLite se carga por bloques al consultarla)"""
+        ruta = os.path.abspath(ruta)
+        with self._lock:
+            if self.motor == 'duckdb':
+                if self._bloqueado:
+                    raise ValueError("Los archivos se registran antes de la primera consulta")
+                lector = 'read_parquet' if ruta.endswith('.parquet') else 'read_csv_auto'
+                self._con.execute(f'CREATE OR REPLACE VIEW "{nombre}" AS SELECT * FROM {lector}({_texto_sql(ruta)})')
+            else:
+                self._pendientes[nombre] = ruta
+            self._tablas[nombre] = ruta
+
+    def registrar_tabla(self, nombre, df):
+        """Vista sobre un DataFrame ya cargado (DuckDB lo lee sin copiarlo)"""
+        with self._lock:
+            if self.motor == 'duckdb':
+                self._dataframes[nombre] = df
+            else:
+                self._pendientes[nombre] = df
+            self._tablas[nombre] = 'DataFrame'
+
+    def tablas(self):
+        return list(self._tablas)
+
+    def columnas(self, nombre):
+        # SQLite: las tablas todavía sin copiar se responden sin copiarlas
+        origen = self._pendientes.get(nombre)
+        if isinstance(origen, pd.DataFrame):
+            return list(origen.columns)
+        if isinstance(origen, str) and not origen.endswith('.parquet'):
+            return list(pd.read_csv(origen, nrows=0).columns)
+        return list(self.pagina(f'SELECT * FROM "{nombre}"', 0, 1)[0].columns)
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def _bloquear(self):
+        """DuckDB: solo quedan accesibles los archivos registrados. No se puede
+        deshacer mientras la base está abierta, ni siquiera con un SET."""
+        with self._lock:
+            if self._bloqueado:
+                return
+            rutas = [ruta for ruta in self._tablas.values() if ruta != 'DataFrame']
+            if rutas:
+                self._con.execute(f"SET allowed_paths = [{', '.join(_texto_sql(r) for r in rutas)}]")
+            self._con.execute("SET enable_external_access = false")
+            self._bloqueado = True
+
+    def _copiar_nombradas(self, sql):
+        """SQLite: copia las tablas pendientes que aparecen en la consulta"""
+        nombradas = [nombre for nombre in self._pendientes
+                     if re.search(rf'\b{re.escape(nombre)}\b', sql, re.IGNORECASE)]
+        if not nombradas:
+            return
+        self._con.execute("PRAGMA query_only = OFF")
+        try:
+            for nombre in nombradas:
+                origen = self._pendientes.pop(nombre)
+                self._con.execute(f'DROP TABLE IF EXISTS "{nombre}"')
+                if isinstance(origen, pd.DataFrame):
+                    bloques = [origen]
+                elif origen.endswith('.parquet'):
+                    bloques = [pd.read_parquet(origen)]
+                else:
+                    bloques = pd.read_csv(origen, chunksize=FILAS_BLOQUE_SQLITE)
+                for bloque in bloques:
+                    bloque.to_sql(nombre, self._con, if_exists='append', index=False, chunksize=FILAS_BLOQUE_SQLITE)
+        finally:
+            self._con.execute("PRAGMA query_only = ON")
+
+    def _ejecutar(self, sql, parametros=()):
+        if self.motor == 'duckdb':
+            self._bloquear()
+            # Un cursor por consulta: la conexión se comparte entre hilos
+            cursor = self._con.cursor()
+            for nombre, df in list(self._dataframes.items()):
+                cursor.register(nombre, df)
+            cursor.execute(sql, list(parametros))
+            return cursor
+        with self._lock:
+            self._copiar_nombradas(sql)
+            cursor = self._con.cursor()
+            cursor.execute(sql, parametros)
+            return cursor
+
+    def pagina(self, sql, numero, filas_pagina=FILAS_PAGINA):
+        """Página `numero` (desde 0) del resultado; devuelve (DataFrame, hay_mas)"""
+        sql = validar_consulta(sql)
+        cursor = self._ejecutar(
+            f"SELECT * FROM ({sql}) AS consulta LIMIT ? OFFSET ?",
+            (filas_pagina + 1, numero * filas_pagina)
+        )
+        filas = cursor.fetchall()
+        columnas = [d[0] for d in cursor.description]
+        df = pd.DataFrame(filas[:filas_pagina], columns=columnas)
+        return df, len(filas) > filas_pagina
+
+    def paginas(self, sql, filas_pagina=FILAS_PAGINA):
+        """Recorre todo el resultado de a una página, sin materializarlo entero"""
+        sql = validar_consulta(sql)
+        cursor = self._ejecutar(sql)
+        columnas = [d[0] for d in cursor.description]
+        while True:
+            filas = cursor.fetchmany(filas_pagina)
+            if not filas:
+                return
+            yield pd.DataFrame(filas, columns=columnas)
+
+
+def abrir_carpeta(carpeta_datos, motor='auto'):
+    """Motor con las tablas de la carpeta (usa el Parquet si existe, si no el CSV)"""
+    sql = MotorSQL(motor)
+    for nombre in TABLAS:
+        ruta = os.path.join(carpeta_datos, f"{nombre}.parquet")
+        if not os.path.exists(ruta):
+            ruta = os.path.join(carpeta_datos, f"{nombre}.csv")
+        if os.path.exists(ruta):
+            sql.registrar_archivo(nombre, ruta)
+    return sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta una consulta SQL sobre las tablas de datos/")
+    parser.add_argument('consulta', help="Consulta SELECT / WITH")
+    parser.add_argument('--datos', default='datos', help="Carpeta con los CSV o Parquet")
+    parser.add_argument('--filas', type=int, default=FILAS_PAGINA, help="Filas por página")
+    parser.add_argument('--motor', choices=['auto', 'duckdb', 'sqlite'], default='auto')
+    args = parser.parse_args()
+
+    sql = abrir_carpeta(args.datos, args.motor)
+    print(f"🔎 Motor: {sql.motor} · tablas: {', '.join(sql.tablas())}")
+    total = 0
+    for numero, pagina in enumerate(sql.paginas(args.consulta, args.filas)):
+        print(f"\n📄 Página {numero + 1}")
+        print(pagina.to_string(index=False))
+        total += len(pagina)
+    print(f"\n✅ {total} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# comun/dinero.py
+# Importes en centavos enteros (int64) para las agregaciones de dinero. Los
+# CSV traen pesos con dos decimales y pandas los lee como float64; sumarlos así
+# acumula error (888.6700000000001) y redondear al final no siempre lo corrige.
+# Acá cada importe se pasa una vez a centavos exactos, las sumas se hacen con
+# reducciones int64 de numpy y recién el resultado vuelve a pesos: centavos/100
+# da el float más cercano al decimal, así que se imprime 888.67.
+#
+# La conversión float -> centavos es exacta mientras |importe| < MAXIMO_PESOS
+# (unos 9 billones de pesos): ahí el error de lectura del float es mucho menor
+# a medio centavo y np.rint lo descarta. Más allá, a_centavos avisa.
+
+import numpy as np
+import pandas as pd
+
+from comun.esquemas import ESQUEMAS, IMPORTE
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+ESCALA = 100
+MAXIMO_PESOS = 2**53 // ESCALA // 10
+CENTAVOS = 'int64'
+
+
+def columnas_importe(tabla):
+    """Columnas de la tabla declaradas como importe en el registro de esquemas"""
+    return [col for col, tipo in ESQUEMAS.get(tabla, {}).items() if tipo == IMPORTE]
+
+# ==============================
+# CONVERSIONES
+# ==============================
+def _centavos_float(valores):
+    if len(valores) and np.nanmax(np.abs(valores), initial=0) >= MAXIMO_PESOS:
+        raise OverflowError(f"Importe fuera del rango exacto en centavos (±{MAXIMO_PESOS:,} pesos)")
+    return np.rint(valores * ESCALA)
+
+
+def a_centavos(importes):
+    """Pesos (float, int o texto numérico) -> centavos int64.
+
+    Series devuelve Series (con faltantes, Int64 nullable); escalares y
+    arreglos devuelven numpy."""
+    if isinstance(importes, pd.Series):
+        centavos = _centavos_float(pd.to_numeric(importes).to_numpy(dtype='float64', na_value=np.nan))
+        if np.isnan(centavos).any():
+            return pd.Series(centavos, index=importes.index, name=importes.name).astype('Int64')
+        return pd.Series(centavos.astype(CENTAVOS), index=importes.index, name=importes.name)
+    centavos = _centavos_float(np.atleast_1d(np.asarray(importes, dtype='float64'))).astype(CENTAVOS)
+    return centavos if np.ndim(importes) else int(centavos[0])
+
+
+def a_pesos(centavos):
+    """Centavos enteros -> pesos float64 (el float más cercano al decimal exacto)"""
+    if isinstance(centavos, (pd.Series, pd.DataFrame)):
+        return centavos.astype('float64') / ESCALA
+    if np.ndim(centavos):
+        return np.asarray(centavos, dtype='float64') / ESCALA
+    return int(centavos) / ESCALA
+
+
+def promedio(centavos, cantidad):
+    """Promedio en pesos redondeado al centavo"""
+    por_unidad = np.rint(np.asarray(centavos, dtype='float64') / np.maximum(cantidad, 1))
+    return a_pesos(por_unidad.astype(CENTAVOS))
+
+# ==============================
+# AGREGACIONES EXACTAS
+# ==============================
+def sumar(importes):
+    """Suma exacta de una columna de pesos; devuelve pesos"""
+    centavos = a_centavos(importes)
+    if isinstance(centavos, pd.Series):
+        return a_pesos(int(centavos.sum()))
+    return a_pesos(int(np.sum(centavos)))
+
+
+def sumar_por(importes, claves):
+    """Suma exacta por grupo (como importes.groupby(claves).sum()); devuelve pesos"""
+    return a_pesos(a_centavos(importes).groupby(claves).sum())
@@ -0,0 +1,204 @@
+# comun/esquemas.py
+# Registro de tipos de todas las tablas que cargan los proyectos: para cada
+# columna de las once tablas de datos/ y del dataset de promociones declara el
+# dtype más angosto que admite (ids int32, cantidades y edades en enteros
+# chicos, textos repetidos como category, fechas como datetime64). Los
+# cargadores lo aplican al leer y el informe de memoria muestra cuánto se ahorró.
+#
+# Los importes de las ventas quedan en float64: en float32 un total como
+# 467060.00 ya no conserva los centavos.
+
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ==============================
+# TIPOS DEL REGISTRO
+# ==============================
+ID = 'int32'
+IMPORTE = 'float64'
+CATEGORIA = 'category'
+FECHA = 'datetime64'
+TEXTO = None  # texto libre (casi sin repetidos): se deja como lo lee pandas
+
+ESQUEMAS = {
+    'provincias': {'id_provincia': ID, 'nombre': CATEGORIA},
+    'localidades': {'id_localidad': ID, 'nombre': CATEGORIA, 'id_provincia': ID},
+    'condicion_iva': {'id_condicion_iva': ID, 'descripcion': CATEGORIA},
+    'rubros': {'id_rubro': ID, 'descripcion': CATEGORIA},
+    'proveedores': {'id_proveedor': ID, 'nombre': CATEGORIA, 'telefono': TEXTO, 'email': TEXTO},
+    'sucursales': {'id_sucursal': ID, 'nombre': CATEGORIA, 'id_localidad': ID,
+                   'direccion': TEXTO, 'telefono': TEXTO},
+    'clientes': {'id_cliente': ID, 'nombre': CATEGORIA, 'apellido': CATEGORIA, 'email': TEXTO,
+                 'telefono': TEXTO, 'id_localidad': ID, 'domicilio': TEXTO},
+    'productos': {'id_producto': ID, 'descripcion': TEXTO, 'precio': IMPORTE,
+                  'id_proveedor': ID, 'id_rubro': ID, 'stock': 'int32'},
+    'facturas_encabezado': {'id_factura': ID, 'numero': TEXTO, 'fecha': FECHA, 'id_cliente': ID,
+                            'id_condicion_iva': ID, 'id_sucursal': ID,
+                            'subtotal': IMPORTE, 'iva': IMPORTE, 'total_venta': IMPORTE},
+    'facturas_detalle': {'id_factura_detalle': ID, 'id_factura': ID, 'id_producto': ID,
+                         'cantidad': 'int16', 'precio_unitario': IMPORTE, 'subtotal_linea': IMPORTE},
+    'ventas': {'id_venta': ID, 'id_factura': ID, 'monto': IMPORTE, 'fecha_venta': FECHA},
+    # Proyecto 2: Excel original y dataset codificado. Montos e ingresos vienen en
+    # pesos enteros; si alguno trae centavos la columna queda como la leyó pandas.
+    'clientes_promociones': {'Cliente_ID': ID, 'Genero': CATEGORIA, 'Edad': 'uint8',
+                             'Recibio_Promo': CATEGORIA, 'Monto_Promo': 'int32',
+                             'Recompra': CATEGORIA, 'Total_Compras': 'uint16',
+                             'Ingreso_Mensual': 'int32'},
+    'dataset_procesado': {'Cliente_ID': ID, 'Genero': 'int8', 'Edad': 'uint8',
+                          'Recibio_Promo': 'int8', 'Monto_Promo': 'int32', 'Recompra': 'int8',
+                          'Total_Compras': 'uint16', 'Ingreso_Mensual': 'int32'},
+}
+
+
+def firma(tabla):
+    """Hash corto del esquema de la tabla (para invalidar archivos convertidos con otro)"""
+    esquema = ESQUEMAS.get(tabla, {})
+    texto = ';'.join(f"{col}={tipo}" for col, tipo in sorted(esquema.items()))
+    return hashlib.sha256(texto.encode()).hexdigest()[:16]
+
+
+def medir_bytes(df):
+    """Memoria real del DataFrame, incluyendo el contenido de los textos"""
+    return int(df.memory_usage(deep=True).sum())
+
+# ==============================
+# CONVERSIÓN DE COLUMNAS
+# ==============================
+def entero_nullable(tipo):
+    """Entero nullable de pandas del mismo ancho (int32 -> Int32, uint8 -> UInt8)"""
+    return str(tipo).capitalize().replace('Uint', 'UInt')
+
+
+def _convertir_entero(serie, tipo):
+    """Entero del ancho pedido; con faltantes usa el entero nullable de pandas"""
+    if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        serie = pd.to_numeric(serie)
+    valores = serie.dropna()
+    if pd.api.types.is_float_dtype(valores) and not (valores == np.floor(valores)).all():
+        raise ValueError("tiene decimales")
+    limites = np.iinfo(tipo)
+    if len(valores) and (valores.min() < limites.min or valores.max() > limites.max):
+        raise OverflowError(f"no entra en {tipo}")
+    if len(valores) < len(serie):
+        return serie.astype(entero_nullable(tipo))
+    return serie.astype(tipo)
+
+
+def _convertir(serie, tipo):
+    if tipo == CATEGORIA:
+        return serie.astype(CATEGORIA)
+    if tipo == FECHA:
+        return pd.to_datetime(serie)
+    if np.dtype(tipo).kind in 'iu':
+        return _convertir_entero(serie, tipo)
+    return serie.astype(tipo)
+
+
+def _tiene_tipo(serie, tipo):
+    if tipo == FECHA:
+        return pd.api.types.is_datetime64_any_dtype(serie)
+    if tipo == CATEGORIA:
+        return isinstance(serie.dtype, pd.CategoricalDtype)
+    return serie.dtype == np.dtype(tipo) or str(serie.dtype).lower() == tipo
+
+
+def aplicar_esquema(df, tabla, omitir=(), informe=None):
+    """DataFrame con los tipos del registro para `tabla`.
+
+    Las columnas que no están en el esquema o que no se pueden convertir (texto
+    en una columna numérica, decimales en una entera, fechas inválidas) quedan
+    como estaban y se informan en `informe` junto con los bytes ahorrados.
+    `omitir` deja afuera tipos del registro (ej. CATEGORIA en un editor, donde
+    una columna category solo admite los valores que ya tiene)."""
+    esquema = ESQUEMAS.get(tabla)
+    if not esquema:
+        return df
+    antes = medir_bytes(df) if informe is not None else None
+    convertidas, fallidas = {}, []
+    for col, tipo in esquema.items():
+        if tipo is TEXTO or tipo in omitir or col not in df.columns:
+            continue
+        if _tiene_tipo(df[col], tipo):
+            continue
+        try:
+            convertidas[col] = _convertir(df[col], tipo)
+        except (ValueError, TypeError, OverflowError):
+            fallidas.append(col)
+    if convertidas:
+        df = df.assign(**convertidas)
+    if informe is not None:
+        informe.registrar(tabla, antes, medir_bytes(df), fallidas)
+    return df
+
+
+def columnas_sin_convertir(df, tabla, omitir=()):
+    """Columnas del esquema presentes en df que no quedaron con el tipo declarado"""
+    return [
+        col for col, tipo in ESQUEMAS.get(tabla, {}).items()
+        if tipo is not TEXTO and tipo not in omitir and col in df.columns
+        and not _tiene_tipo(df[col], tipo)
+    ]
+
+
+def sin_categorias(df):
+    """Copia liviana con las columnas category vueltas a sus valores (para editarlas)"""
+    categoricas = [col for col, tipo in df.dtypes.items() if isinstance(tipo, pd.CategoricalDtype)]
+    if not categoricas:
+        return df
+    return df.assign(**{col: df[col].astype(df[col].cat.categories.dtype) for col in categoricas})
+
+# ==============================
+# INFORME DE MEMORIA
+# ==============================
+def _tamano(cantidad_bytes):
+    if cantidad_bytes < 1024**2:
+        return f"{cantidad_bytes / 1024:,.1f} KB"
+    return f"{cantidad_bytes / 1024**2:,.2f} MB"
+
+
+class InformeMemoria:
+    """Bytes antes y después del esquema por tabla, compartido por todo el proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tablas = {}
+
+    def registrar(self, tabla, antes, despues, fallidas=()):
+        with self._lock:
+            self._tablas[tabla] = {'antes': antes, 'despues': despues, 'sin_convertir': list(fallidas)}
+
+    def resumen(self):
+        """DataFrame con MB antes/después, ahorro y columnas sin convertir por tabla"""
+        with self._lock:
+            filas = [
+                {'tabla': tabla,
+                 'mb_antes': round(datos['antes'] / 1024**2, 3),
+                 'mb_despues': round(datos['despues'] / 1024**2, 3),
+                 'ahorro_%': round(100 * (1 - datos['despues'] / datos['antes']), 1) if datos['antes'] else 0.0,
+                 'sin_convertir': ', '.join(datos['sin_convertir'])}
+                for tabla, datos in self._tablas.items()
+            ]
+        return pd.DataFrame(filas, columns=['tabla', 'mb_antes', 'mb_despues', 'ahorro_%', 'sin_convertir'])
+
+    def totales(self):
+        """(bytes antes, bytes después) sumando todas las tablas"""
+        with self._lock:
+            return (sum(d['antes'] for d in self._tablas.values()),
+                    sum(d['despues'] for d in self._tablas.values()))
+
+    def texto(self):
+        antes, despues = self.totales()
+        if not antes:
+            return "💾 Esquema de tipos: sin tablas cargadas"
+        return (f"💾 Esquema de tipos: {_tamano(antes)} → {_tamano(despues)} "
+                f"({100 * (1 - despues / antes):.0f}% menos)")
+
+    def columnas_sin_convertir(self):
+        with self._lock:
+            return {tabla: d['sin_convertir'] for tabla, d in self._tablas.items() if d['sin_convertir']}
+
+
+INFORME = InformeMemoria()
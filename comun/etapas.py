@@ -0,0 +1,306 @@
+# comun/etapas.py
+# Motor de etapas para los scripts de análisis (proyecto2, proyecto3). Cada
+# etapa es una función que declara qué etapas usa y qué archivos lee; recibe
+# los resultados de esas etapas como argumentos con su nombre. El resultado se
+# guarda en .cache_etapas/ bajo una clave que resume el código de la etapa, el
+# contenido de sus archivos y las claves de las etapas que usa: si nada de eso
+# cambió, la etapa no se vuelve a correr. Las etapas independientes corren en
+# paralelo en procesos separados (toman sus entradas del cache).
+#
+# Uso desde un script:
+#   pipeline = Pipeline('proyecto3')
+#
+#   @pipeline.etapa(archivos=['datos/clientes.csv'])
+#   def carga_csv(): ...
+#
+#   @pipeline.etapa(usa=['carga_csv'])
+#   def merges(carga_csv): ...
+#
+#   if __name__ == "__main__":
+#       sys.exit(pipeline.main())
+#
+# Opciones de línea de comandos: --only, --from, --forzar, --procesos, --lista
+
+import os
+import json
+import pickle
+import hashlib
+import inspect
+import argparse
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from comun.vigilante import GrafoDependencias
+from comun.rendimiento import TRAZADOR, medir, contar_filas
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+CARPETA_CACHE = '.cache_etapas'
+BLOQUE_HASH = 1024 * 1024
+
+# Pipelines por nombre: los procesos hijos buscan acá la etapa a correr (no se
+# serializa el pipeline, que puede tener lambdas)
+_PIPELINES = {}
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido del archivo"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(BLOQUE_HASH), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _codigo(funcion):
+    try:
+        return inspect.getsource(funcion)
+    except (OSError, TypeError):
+        return funcion.__code__.co_code.hex()
+
+
+class Etapa:
+    """Función del pipeline con las etapas y archivos de los que depende"""
+
+    def __init__(self, nombre, funcion, usa=(), archivos=(), codigo=(), cache=True, genera_archivos=False):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.usa = list(usa)
+        self.archivos = archivos  # lista de rutas o función que la devuelve
+        self.codigo = [funcion] + list(codigo)  # funciones cuyo código entra en la clave
+        self.cache = cache
+        # Si es True, la etapa devuelve la lista de archivos que escribió y el
+        # cache solo vale mientras esos archivos existan
+        self.genera_archivos = genera_archivos
+
+    def rutas_entrada(self):
+        return list(self.archivos() if callable(self.archivos) else self.archivos)
+
+
+class Pipeline:
+    """Grafo de etapas con cache por clave de entrada"""
+
+    def __init__(self, nombre, carpeta_cache=CARPETA_CACHE):
+        self.nombre = nombre
+        self.carpeta_cache = carpeta_cache
+        self.etapas = {}
+        _PIPELINES[nombre] = self
+
+    def etapa(self, nombre=None, usa=(), archivos=(), codigo=(), cache=True, genera_archivos=False):
+        """Decorador que registra la función como etapa"""
+        def decorador(funcion):
+            self.agregar(Etapa(nombre or funcion.__name__, funcion, usa, archivos, codigo, cache, genera_archivos))
+            return funcion
+        return decorador
+
+    def agregar(self, etapa):
+        # Las etapas usadas tienen que estar definidas antes: el grafo no puede tener ciclos
+        faltantes = [d for d in etapa.usa if d not in self.etapas]
+        if faltantes:
+            raise ValueError(f"La etapa '{etapa.nombre}' usa etapas no definidas: {faltantes}")
+        self.etapas[etapa.nombre] = etapa
+
+    @property
+    def grafo(self):
+        return GrafoDependencias({nombre: e.usa for nombre, e in self.etapas.items()})
+
+    def ancestros(self, nombres):
+        resultado, pendientes = set(), list(nombres)
+        while pendientes:
+            for dependencia in self.etapas[pendientes.pop()].usa:
+                if dependencia not in resultado:
+                    resultado.add(dependencia)
+                    pendientes.append(dependencia)
+        return resultado
+
+    # ------------------------------
+    # Claves y cache
+    # ------------------------------
+    def claves(self, nombres=None):
+        """Clave de entrada de cada etapa (código + archivos + claves de las etapas que usa)"""
+        claves = {}
+        for nombre in self.grafo.orden():
+            etapa = self.etapas[nombre]
+            h = hashlib.sha256(nombre.encode())
+            for funcion in etapa.codigo:
+                h.update(_codigo(funcion).encode())
+            if nombres is None or nombre in nombres:
+                for ruta in etapa.rutas_entrada():
+                    h.update(ruta.encode())
+                    h.update(hash_archivo(ruta).encode() if os.path.exists(ruta) else b'faltante')
+            for dependencia in etapa.usa:
+                h.update(claves[dependencia].encode())
+            claves[nombre] = h.hexdigest()
+        return claves
+
+    def _ruta_cache(self, nombre, extension):
+        return os.path.join(self.carpeta_cache, self.nombre, f"{nombre}.{extension}")
+
+    def cache_valido(self, nombre, clave):
+        etapa = self.etapas[nombre]
+        if not etapa.cache:
+            return False
+        try:
+            with open(self._ruta_cache(nombre, 'json'), encoding='utf-8') as archivo:
+                registro = json.load(archivo)
+        except (OSError, ValueError):
+            return False
+        if registro.get('clave') != clave or not os.path.exists(self._ruta_cache(nombre, 'pkl')):
+            return False
+        return all(os.path.exists(ruta) for ruta in registro.get('archivos', []))
+
+    def leer_cache(self, nombre):
+        with open(self._ruta_cache(nombre, 'pkl'), 'rb') as archivo:
+            return pickle.load(archivo)
+
+    def _guardar_cache(self, nombre, clave, resultado):
+        os.makedirs(os.path.join(self.carpeta_cache, self.nombre), exist_ok=True)
+        ruta = self._ruta_cache(nombre, 'pkl')
+        with open(ruta + '.tmp', 'wb') as archivo:
+            pickle.dump(resultado, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(ruta + '.tmp', ruta)
+        # El .json se escribe último: sin él la entrada no cuenta como válida
+        archivos = list(resultado) if self.etapas[nombre].genera_archivos else []
+        with open(self._ruta_cache(nombre, 'json') + '.tmp', 'w', encoding='utf-8') as archivo:
+            json.dump({'clave': clave, 'archivos': archivos}, archivo)
+        os.replace(self._ruta_cache(nombre, 'json') + '.tmp', self._ruta_cache(nombre, 'json'))
+
+    # ------------------------------
+    # Ejecución
+    # ------------------------------
+    def _correr(self, nombre, clave, entradas):
+        """Ejecuta la etapa midiendo su tiempo y guarda el resultado en el cache"""
+        with medir(nombre, contar_filas(list(entradas.values()))) as medicion:
+            resultado = self.etapas[nombre].funcion(**entradas)
+            medicion.filas_salida = contar_filas(resultado)
+        if self.etapas[nombre].cache:
+            self._guardar_cache(nombre, clave, resultado)
+        return resultado
+
+    def plan(self, solo=(), desde=None, forzar=False):
+        """(etapas a considerar, etapas a correr sí o sí) según --only / --from / --forzar"""
+        objetivos = set(self.etapas)
+        forzadas = set()
+        if solo:
+            objetivos = set(solo) | self.ancestros(solo)
+            forzadas |= set(solo)
+        if desde:
+            forzadas |= ({desde} | set(self.grafo.afectadas([desde]))) & objetivos
+        if forzar:
+            forzadas = set(objetivos)
+        return objetivos, forzadas
+
+    def ejecutar(self, solo=(), desde=None, forzar=False, procesos=None):
+        """Corre las etapas necesarias; devuelve {etapa: 'ejecutada' | 'en cache' | 'error' | 'omitida'}"""
+        objetivos, forzadas = self.plan(solo, desde, forzar)
+        claves = self.claves(objetivos)
+        orden = [n for n in self.grafo.orden() if n in objetivos]
+        estado = {n: 'en cache' for n in orden if n not in forzadas and self.cache_valido(n, claves[n])}
+        pendientes = [n for n in orden if n not in estado]
+        resultados = {}
+        procesos = procesos or os.cpu_count() or 1
+
+        def entrada(dependencia):
+            if dependencia not in resultados:
+                resultados[dependencia] = self.leer_cache(dependencia)
+            return resultados[dependencia]
+
+        def en_proceso(nombre):
+            # Solo si todo lo que usa está en disco (las etapas sin cache corren acá)
+            etapa = self.etapas[nombre]
+            return procesos > 1 and etapa.cache and all(self.etapas[d].cache for d in etapa.usa)
+
+        if estado:
+            print(f"⏭️ En cache: {', '.join(n for n in orden if n in estado)}")
+
+        pool = ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context()) if procesos > 1 else None
+        en_curso = {}
+        try:
+            while pendientes or en_curso:
+                cantidad = len(pendientes)
+                for nombre in list(pendientes):
+                    usa = self.etapas[nombre].usa
+                    if any(estado.get(d) in ('error', 'omitida') for d in usa):
+                        estado[nombre] = 'omitida'
+                        pendientes.remove(nombre)
+                    elif all(estado.get(d) in ('ejecutada', 'en cache') for d in usa):
+                        pendientes.remove(nombre)
+                        if en_proceso(nombre):
+                            futuro = pool.submit(_correr_en_proceso, self.nombre, self.carpeta_cache, nombre, claves[nombre])
+                            en_curso[futuro] = nombre
+                            continue
+                        try:
+                            resultados[nombre] = self._correr(nombre, claves[nombre], {d: entrada(d) for d in usa})
+                            estado[nombre] = 'ejecutada'
+                        except Exception:
+                            estado[nombre] = 'error'
+                            print(f"❌ Error en la etapa '{nombre}':\n{traceback.format_exc()}")
+                if not en_curso:
+                    if len(pendientes) == cantidad:
+                        break  # nada más se puede correr
+                    continue
+                listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    nombre = en_curso.pop(futuro)
+                    try:
+                        TRAZADOR.agregar(futuro.result())
+                        estado[nombre] = 'ejecutada'
+                    except Exception as e:
+                        estado[nombre] = 'error'
+                        print(f"❌ Error en la etapa '{nombre}':\n{''.join(traceback.format_exception(e))}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return estado
+
+    # ------------------------------
+    # Línea de comandos
+    # ------------------------------
+    def listar(self):
+        claves = self.claves()
+        for nombre in self.grafo.orden():
+            etapa = self.etapas[nombre]
+            marca = "✅" if self.cache_valido(nombre, claves[nombre]) else "🔄" if etapa.cache else "▶️"
+            usa = f" ← {', '.join(etapa.usa)}" if etapa.usa else ""
+            print(f"{marca} {nombre}{usa}")
+        print("\n✅ en cache · 🔄 a recalcular · ▶️ sin cache (corre siempre)")
+
+    def main(self, argv=None):
+        parser = argparse.ArgumentParser(description=f"Etapas de {self.nombre} con cache por clave de entrada")
+        nombres = list(self.etapas)
+        parser.add_argument('--only', nargs='+', choices=nombres, metavar='ETAPA',
+                            help="Correr solo estas etapas (lo que usan sale del cache si está al día)")
+        parser.add_argument('--from', dest='desde', choices=nombres, metavar='ETAPA',
+                            help="Volver a correr esta etapa y todas las que dependen de ella")
+        parser.add_argument('--forzar', action='store_true', help="Ignorar el cache")
+        parser.add_argument('--procesos', type=int, default=None, help="Procesos para etapas en paralelo")
+        parser.add_argument('--cache', default=self.carpeta_cache, help="Carpeta del cache")
+        parser.add_argument('--lista', action='store_true', help="Mostrar las etapas y su estado")
+        args = parser.parse_args(argv)
+
+        self.carpeta_cache = args.cache
+        if args.lista:
+            self.listar()
+            return 0
+        estado = self.ejecutar(args.only or (), args.desde, args.forzar, args.procesos)
+        conteo = {}
+        for valor in estado.values():
+            conteo[valor] = conteo.get(valor, 0) + 1
+        print(f"\n🧩 Etapas: {', '.join(f'{v} {k}' for k, v in conteo.items())}")
+        fallidas = [n for n, v in estado.items() if v == 'error']
+        if fallidas:
+            print(f"❌ Fallaron: {', '.join(fallidas)} (al volver a correr, lo demás sale del cache)")
+            return 1
+        return 0
+
+
+def _correr_en_proceso(nombre_pipeline, carpeta_cache, nombre, clave):
+    """Etapa en un proceso del pool: lee las entradas del cache y devuelve las trazas nuevas"""
+    pipeline = _PIPELINES[nombre_pipeline]
+    pipeline.carpeta_cache = carpeta_cache
+    entradas = {d: pipeline.leer_cache(d) for d in pipeline.etapas[nombre].usa}
+    antes = len(TRAZADOR.registros())
+    pipeline._correr(nombre, clave, entradas)
+    return TRAZADOR.registros()[antes:]
@@ -0,0 +1,362 @@
+# comun/generador_esquema.py
+# Generador de tablas sintéticas relacionales a partir de un esquema: claves
+# primarias secuenciales, claves foráneas consistentes, cardinalidades "por
+# padre" y columnas derivadas (búsquedas, productos, sumas por clave).
+#
+# Uso por línea de comandos:
+#   python -m comun.generador_esquema --salida datos_sinteticos --facturas 1000000 --semilla 42
+
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from comun.generadores import MotorGenerador, CIUDADES, PRODUCTOS, FORMATOS_SALIDA
+
+# ==============================
+# CATÁLOGOS DEL ESQUEMA DE VENTAS
+# ==============================
+PROVINCIAS = ["Buenos Aires", "Cordoba", "Santa Fe", "Mendoza", "Tucuman", "Salta", "Entre Rios",
+              "Misiones", "Chaco", "Corrientes", "Santiago del Estero", "San Juan", "Jujuy",
+              "Rio Negro", "Neuquen", "Formosa", "Chubut", "San Luis", "Catamarca", "La Rioja",
+              "La Pampa", "Santa Cruz", "Tierra del Fuego", "Ciudad de Buenos Aires"]
+RUBROS = ["Electronica", "Ropa", "Alimentos", "Muebles", "Deportes", "Libros"]
+CONDICIONES_IVA = ["Responsable Inscripto", "Monotributista", "Consumidor Final"]
+PROVEEDORES = ["ElectroMax", "ModaCenter", "Supermercado Don Pepe", "Muebles Hogar SA",
+               "Deportes Total", "Distribuidora Sur", "Mayorista Centro", "Importadora Norte"]
+NOMBRES_PILA = ["Juan", "Maria", "Carlos", "Lucía", "Martín", "Ana", "Federico", "Sofía",
+                "Diego", "Laura", "Pedro", "Valentina", "Jorge", "Camila", "Luis", "Martina"]
+APELLIDOS = ["Perez", "Lopez", "Gomez", "Fernández", "Rodríguez", "Torres", "Herrera",
+             "Martinez", "Garcia", "Sánchez", "Díaz", "Romero", "Álvarez", "Ruiz"]
+TASA_IVA = 0.21
+
+
+# ==============================
+# CONSTRUCTORES DE ESPECIFICACIÓN
+# ==============================
+def gen(tipo, **opciones):
+    """Columna generada por MotorGenerador"""
+    return {'tipo': 'generador', 'generador': tipo, 'opciones': opciones}
+
+def lista(valores):
+    """Columna que toma los valores en orden (tablas de catálogo fijo)"""
+    return {'tipo': 'lista', 'valores': list(valores)}
+
+def fk(referencia):
+    """Clave foránea 'tabla.columna' hacia la clave primaria de otra tabla"""
+    return {'tipo': 'fk', 'referencia': referencia}
+
+def por(tabla_padre, minimo, maximo):
+    """Cardinalidad: entre minimo y maximo filas por cada fila del padre"""
+    return {'padre': tabla_padre, 'minimo': minimo, 'maximo': maximo}
+
+def busqueda(referencia, via):
+    """Copia 'tabla.columna' del padre apuntado por la clave foránea via"""
+    return {'tipo': 'busqueda', 'referencia': referencia, 'via': via}
+
+def suma(referencia, via):
+    """Suma 'tabla.columna' de las filas hijas agrupadas por su clave foránea via"""
+    return {'tipo': 'suma', 'referencia': referencia, 'via': via}
+
+def producto(*columnas):
+    """Producto fila a fila de columnas de la misma tabla, redondeado a centavos"""
+    return {'tipo': 'producto', 'columnas': list(columnas)}
+
+def escala(columna, factor):
+    """Columna multiplicada por un factor, redondeada a centavos"""
+    return {'tipo': 'escala', 'columna': columna, 'factor': factor}
+
+def suma_columnas(*columnas):
+    """Suma fila a fila de columnas de la misma tabla, redondeada a centavos"""
+    return {'tipo': 'suma_columnas', 'columnas': list(columnas)}
+
+def prefijo(texto, columna, ancho=0):
+    """Texto fijo seguido del valor de una columna entera rellenado con ceros"""
+    return {'tipo': 'prefijo', 'texto': texto, 'columna': columna, 'ancho': ancho}
+
+
+def esquema_ventas(clientes=1000, productos=200, facturas=10_000, lineas_por_factura=(1, 5),
+                   sucursales=10, localidades=50, proveedores=len(PROVEEDORES),
+                   inicio="2020-01-01", fin="2024-12-31"):
+    """Esquema de las once tablas de datos/ con el tamaño pedido"""
+    return {
+        'provincias': {
+            'filas': len(PROVINCIAS), 'clave': 'id_provincia',
+            'columnas': {'nombre': lista(PROVINCIAS)},
+        },
+        'localidades': {
+            'filas': localidades, 'clave': 'id_localidad',
+            'columnas': {'nombre': gen('catalogo', valores=CIUDADES),
+                         'id_provincia': fk('provincias.id_provincia')},
+        },
+        'condicion_iva': {
+            'filas': len(CONDICIONES_IVA), 'clave': 'id_condicion_iva',
+            'columnas': {'descripcion': lista(CONDICIONES_IVA)},
+        },
+        'rubros': {
+            'filas': len(RUBROS), 'clave': 'id_rubro',
+            'columnas': {'descripcion': lista(RUBROS)},
+        },
+        'proveedores': {
+            'filas': proveedores, 'clave': 'id_proveedor',
+            'columnas': {'nombre': lista(PROVEEDORES),
+                         'telefono': gen('telefonos'),
+                         'email': gen('emails')},
+        },
+        'sucursales': {
+            'filas': sucursales, 'clave': 'id_sucursal',
+            'columnas': {'nombre': prefijo('Sucursal ', 'id_sucursal'),
+                         'id_localidad': fk('localidades.id_localidad'),
+                         'direccion': gen('direcciones'),
+                         'telefono': gen('telefonos')},
+        },
+        'clientes': {
+            'filas': clientes, 'clave': 'id_cliente',
+            'columnas': {'nombre': gen('catalogo', valores=NOMBRES_PILA),
+                         'apellido': gen('catalogo', valores=APELLIDOS),
+                         'email': gen('emails'),
+                         'telefono': gen('telefonos'),
+                         'id_localidad': fk('localidades.id_localidad'),
+                         'domicilio': gen('direcciones')},
+        },
+        'productos': {
+            'filas': productos, 'clave': 'id_producto',
+            'columnas': {'descripcion': gen('catalogo', valores=PRODUCTOS),
+                         'precio': gen('numeros', minimo=500, maximo=500_000, decimales=True),
+                         'id_proveedor': fk('proveedores.id_proveedor'),
+                         'id_rubro': fk('rubros.id_rubro'),
+                         'stock': gen('numeros', minimo=0, maximo=500)},
+        },
+        'facturas_encabezado': {
+            'filas': facturas, 'clave': 'id_factura',
+            'columnas': {'numero': prefijo('F0001-', 'id_factura', 7),
+                         'fecha': gen('fechas', inicio=inicio, fin=fin),
+                         'id_cliente': fk('clientes.id_cliente'),
+                         'id_condicion_iva': fk('condicion_iva.id_condicion_iva'),
+                         'id_sucursal': fk('sucursales.id_sucursal'),
+                         'subtotal': suma('facturas_detalle.subtotal_linea', 'id_factura'),
+                         'iva': escala('subtotal', TASA_IVA),
+                         'total_venta': suma_columnas('subtotal', 'iva')},
+        },
+        'facturas_detalle': {
+            'filas': por('facturas_encabezado', *lineas_por_factura), 'clave': 'id_factura_detalle',
+            'columnas': {'id_factura': fk('facturas_encabezado.id_factura'),
+                         'id_producto': fk('productos.id_producto'),
+                         'cantidad': gen('numeros', minimo=1, maximo=10),
+                         'precio_unitario': busqueda('productos.precio', 'id_producto'),
+                         'subtotal_linea': producto('cantidad', 'precio_unitario')},
+        },
+        'ventas': {
+            'filas': por('facturas_encabezado', 1, 1), 'clave': 'id_venta',
+            'columnas': {'id_factura': fk('facturas_encabezado.id_factura'),
+                         'monto': busqueda('facturas_encabezado.total_venta', 'id_factura'),
+                         'fecha_venta': busqueda('facturas_encabezado.fecha', 'id_factura')},
+        },
+    }
+
+
+# ==============================
+# CONSTRUCCIÓN DE LAS TABLAS
+# ==============================
+COLUMNAS_BASE = ('generador', 'lista', 'fk')
+
+
+def _separar(referencia):
+    tabla, columna = referencia.split('.')
+    return tabla, columna
+
+
+def _dependencias(tabla, especificacion):
+    """Columnas (tabla, columna) que necesita una columna derivada"""
+    tipo = especificacion['tipo']
+    if tipo == 'busqueda':
+        return [_separar(especificacion['referencia']), (tabla, especificacion['via'])]
+    if tipo == 'suma':
+        tabla_hija, columna = _separar(especificacion['referencia'])
+        return [(tabla_hija, columna), (tabla_hija, especificacion['via'])]
+    if tipo in ('producto', 'suma_columnas'):
+        return [(tabla, columna) for columna in especificacion['columnas']]
+    if tipo in ('escala', 'prefijo'):
+        return [(tabla, especificacion['columna'])]
+    raise ValueError(f"Tipo de columna desconocido: {tipo}")
+
+
+def _resolver_filas(esquema, generadores):
+    """Cantidad de filas por tabla; las cardinalidades 'por' devuelven también los conteos"""
+    filas, conteos = {}, {}
+
+    def resolver(tabla, visitadas=()):
+        if tabla in filas:
+            return filas[tabla]
+        if tabla in visitadas:
+            raise ValueError(f"Cardinalidad circular en la tabla {tabla}")
+        cardinalidad = esquema[tabla]['filas']
+        if isinstance(cardinalidad, dict):
+            filas_padre = resolver(cardinalidad['padre'], visitadas + (tabla,))
+            conteos[tabla] = generadores[tabla].rng.integers(
+                cardinalidad['minimo'], cardinalidad['maximo'] + 1, size=filas_padre)
+            filas[tabla] = int(conteos[tabla].sum())
+        else:
+            filas[tabla] = int(cardinalidad)
+        return filas[tabla]
+
+    for tabla in esquema:
+        resolver(tabla)
+    return filas, conteos
+
+
+def _columnas_base(tabla, esquema, filas, conteos, generador):
+    """Clave primaria, columnas generadas y claves foráneas de una tabla"""
+    definicion = esquema[tabla]
+    n = filas[tabla]
+    columnas = {definicion['clave']: np.arange(1, n + 1, dtype=np.int64)}
+    for nombre, especificacion in definicion['columnas'].items():
+        tipo = especificacion['tipo']
+        if tipo == 'generador':
+            columnas[nombre] = generador.columna(especificacion['generador'], n, **especificacion['opciones'])
+        elif tipo == 'lista':
+            valores = especificacion['valores']
+            columnas[nombre] = np.array([valores[i % len(valores)] for i in range(n)], dtype=object)
+        elif tipo == 'fk':
+            tabla_padre, _ = _separar(especificacion['referencia'])
+            cardinalidad = definicion['filas']
+            if isinstance(cardinalidad, dict) and cardinalidad['padre'] == tabla_padre:
+                # Las filas hijas se reparten entre los padres según los conteos sorteados
+                columnas[nombre] = np.repeat(np.arange(1, filas[tabla_padre] + 1, dtype=np.int64), conteos[tabla])
+            else:
+                columnas[nombre] = generador.rng.integers(1, filas[tabla_padre] + 1, size=n, dtype=np.int64)
+    return columnas
+
+
+def _columna_derivada(tabla, especificacion, columnas, filas):
+    """Calcula una columna derivada; las claves son 1..n, así que posición = clave - 1"""
+    tipo = especificacion['tipo']
+    if tipo == 'busqueda':
+        tabla_padre, columna = _separar(especificacion['referencia'])
+        return np.asarray(columnas[tabla_padre][columna])[columnas[tabla][especificacion['via']] - 1]
+    if tipo == 'suma':
+        tabla_hija, columna = _separar(especificacion['referencia'])
+        totales = np.bincount(columnas[tabla_hija][especificacion['via']] - 1,
+                              weights=columnas[tabla_hija][columna], minlength=filas[tabla])
+        return np.round(totales, 2)
+    if tipo == 'producto':
+        resultado = np.ones(filas[tabla])
+        for columna in especificacion['columnas']:
+            resultado = resultado * columnas[tabla][columna]
+        return np.round(resultado, 2)
+    if tipo == 'suma_columnas':
+        return np.round(sum(columnas[tabla][columna] for columna in especificacion['columnas']), 2)
+    if tipo == 'escala':
+        return np.round(columnas[tabla][especificacion['columna']] * especificacion['factor'], 2)
+    if tipo == 'prefijo':
+        valores = pd.Series(columnas[tabla][especificacion['columna']]).astype(str)
+        return (especificacion['texto'] + valores.str.zfill(especificacion['ancho'])).to_numpy(dtype=object)
+    raise ValueError(f"Tipo de columna desconocido: {tipo}")
+
+
+def _niveles_derivadas(esquema):
+    """Agrupa las columnas derivadas en niveles que se pueden calcular en paralelo"""
+    pendientes = {
+        (tabla, nombre): especificacion
+        for tabla, definicion in esquema.items()
+        for nombre, especificacion in definicion['columnas'].items()
+        if especificacion['tipo'] not in COLUMNAS_BASE
+    }
+    niveles = []
+    while pendientes:
+        nivel = [
+            clave for clave, especificacion in pendientes.items()
+            if not any(dep in pendientes for dep in _dependencias(clave[0], especificacion))
+        ]
+        if not nivel:
+            raise ValueError(f"Dependencias circulares entre columnas: {sorted(pendientes)}")
+        niveles.append([(tabla, nombre, pendientes.pop((tabla, nombre))) for tabla, nombre in nivel])
+    return niveles
+
+
+def generar_tablas(esquema, semilla=None, max_workers=None):
+    """Construye todas las tablas del esquema y devuelve un dict de DataFrames.
+
+    Cada tabla usa su propio generador derivado de la semilla, así que el
+    resultado es reproducible aunque las tablas se construyan en paralelo.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(len(esquema))
+    generadores = {tabla: MotorGenerador(s) for tabla, s in zip(esquema, semillas)}
+    filas, conteos = _resolver_filas(esquema, generadores)
+    niveles = _niveles_derivadas(esquema)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Fase 1: columnas que solo dependen de la cantidad de filas de los padres
+        futuros = {
+            tabla: executor.submit(_columnas_base, tabla, esquema, filas, conteos, generadores[tabla])
+            for tabla in esquema
+        }
+        columnas = {tabla: futuro.result() for tabla, futuro in futuros.items()}
+
+        # Fase 2: columnas derivadas, por niveles de dependencia
+        for nivel in niveles:
+            futuros = {
+                (tabla, nombre): executor.submit(_columna_derivada, tabla, especificacion, columnas, filas)
+                for tabla, nombre, especificacion in nivel
+            }
+            for (tabla, nombre), futuro in futuros.items():
+                columnas[tabla][nombre] = futuro.result()
+
+    tablas = {}
+    for tabla, definicion in esquema.items():
+        orden = [definicion['clave']] + list(definicion['columnas'])
+        tablas[tabla] = pd.DataFrame({nombre: columnas[tabla][nombre] for nombre in orden})
+    return tablas
+
+
+def escribir_tablas(tablas, carpeta, formato='csv', max_workers=None):
+    """Escribe cada tabla como <carpeta>/<tabla>.<formato> en paralelo"""
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato no soportado: {formato}")
+    os.makedirs(carpeta, exist_ok=True)
+
+    def escribir(tabla, df):
+        ruta = os.path.join(carpeta, f"{tabla}.{formato}")
+        if formato == 'csv':
+            df.to_csv(ruta, index=False, float_format='%.2f')
+        else:
+            df.to_parquet(ruta, index=False)
+        return ruta
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda item: escribir(*item), tablas.items()))
+
+
+# ==============================
+# EJECUCIÓN
+# ==============================
+def main():
+    parser = argparse.ArgumentParser(description="Genera el esquema de ventas con datos sintéticos")
+    parser.add_argument('--salida', default='datos_sinteticos', help="Carpeta de salida")
+    parser.add_argument('--formato', choices=FORMATOS_SALIDA, default='csv')
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--productos', type=int, default=200)
+    parser.add_argument('--facturas', type=int, default=10_000)
+    parser.add_argument('--sucursales', type=int, default=10)
+    parser.add_argument('--localidades', type=int, default=50)
+    parser.add_argument('--lineas-min', type=int, default=1)
+    parser.add_argument('--lineas-max', type=int, default=5)
+    args = parser.parse_args()
+
+    esquema = esquema_ventas(
+        clientes=args.clientes, productos=args.productos, facturas=args.facturas,
+        lineas_por_factura=(args.lineas_min, args.lineas_max),
+        sucursales=args.sucursales, localidades=args.localidades
+    )
+    print("🔄 Generando tablas sintéticas...")
+    tablas = generar_tablas(esquema, semilla=args.semilla)
+    for ruta in escribir_tablas(tablas, args.salida, args.formato):
+        print(f"   💾 {ruta}")
+    print(f"✅ {sum(len(df) for df in tablas.values()):,} filas generadas en '{args.salida}/'")
+
+
+if __name__ == "__main__":
+    main()
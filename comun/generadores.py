@@ -0,0 +1,198 @@
+# comun/generadores.py
+# Motor vectorizado de datos sintéticos: cada columna se genera completa con
+# numpy.random.Generator (sin bucles por fila), es reproducible con semilla y
+# se puede volcar por bloques a CSV o Parquet.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# ==============================
+# CATÁLOGOS
+# ==============================
+NOMBRES = ["Juan", "María", "Carlos", "Ana", "Pedro", "Laura", "Diego", "Sofía",
+           "Miguel", "Lucía", "Fernando", "Valentina", "Roberto", "Camila", "Jorge",
+           "Isabella", "Luis", "Martina", "Antonio", "Victoria"]
+APELLIDOS = ["García", "Rodríguez", "Martínez", "López", "González", "Pérez",
+             "Sánchez", "Ramírez", "Torres", "Flores", "Rivera", "Gómez", "Díaz",
+             "Cruz", "Morales", "Reyes", "Jiménez", "Hernández", "Ruiz", "Vargas"]
+USUARIOS_EMAIL = ["user", "contact", "info", "admin", "support", "juan", "maria", "carlos"]
+DOMINIOS = ["gmail.com", "hotmail.com", "yahoo.com", "outlook.com", "empresa.com"]
+CIUDADES = ["Buenos Aires", "Córdoba", "Rosario", "Mendoza", "La Plata", "San Miguel de Tucumán",
+            "Mar del Plata", "Salta", "Santa Fe", "San Juan", "Resistencia", "Neuquén",
+            "Posadas", "Bahía Blanca", "Paraná", "San Salvador de Jujuy"]
+PRODUCTOS = ["Laptop", "Mouse", "Teclado", "Monitor", "Auriculares", "Webcam", "Micrófono",
+             "Tablet", "Smartphone", "Impresora", "Scanner", "Router", "Disco Duro", "USB",
+             "Cable HDMI", "Adaptador", "Cargador", "Batería", "Mousepad", "Soporte"]
+CALLES = ["Av. Mitre", "San Martín", "Belgrano", "Rivadavia", "Av. Corrientes", "Dorrego",
+          "Av. Colón", "San Lorenzo", "Sarmiento", "Moreno", "Av. Libertador", "Urquiza"]
+PALABRAS_LOREM = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit",
+                  "sed", "do", "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore",
+                  "magna", "aliqua"]
+
+FORMATOS_SALIDA = ['csv', 'parquet']
+TIPOS_COLUMNA = ['nombres', 'emails', 'telefonos', 'fechas', 'numeros', 'ciudades',
+                 'productos', 'booleanos', 'lorem', 'catalogo', 'direcciones']
+
+
+def _combinar(*partes):
+    """Producto cartesiano de listas de textos, concatenadas en orden"""
+    resultado = np.array([''], dtype=object)
+    for parte in partes:
+        parte = np.asarray(parte, dtype=object)
+        resultado = (resultado[:, None] + parte[None, :]).ravel()
+    return resultado
+
+
+def _digitos(valores, ancho):
+    """Convierte enteros no negativos en una matriz (n, ancho) de códigos ASCII"""
+    potencias = 10 ** np.arange(ancho - 1, -1, -1, dtype=np.int64)
+    return (valores[:, None] // potencias % 10 + ord('0')).astype(np.uint8)
+
+
+# ==============================
+# MOTOR DE GENERACIÓN
+# ==============================
+class MotorGenerador:
+    """Genera columnas completas de datos sintéticos a partir de una semilla"""
+
+    def __init__(self, semilla=None):
+        self.rng = np.random.default_rng(semilla)
+        # Las combinaciones finitas se precalculan una vez y luego se indexan
+        self._nombres_completos = _combinar(NOMBRES, [" "], APELLIDOS)
+        self._emails = _combinar(USUARIOS_EMAIL, [str(i) for i in range(1, 1000)], ["@"], DOMINIOS)
+        self._lorem_inicial = np.array([p.capitalize() for p in PALABRAS_LOREM], dtype=object)
+        self._lorem = np.array(PALABRAS_LOREM, dtype=object)
+
+    def _elegir(self, catalogo, n):
+        """Elige n valores del catálogo como columna categórica"""
+        codigos = self.rng.integers(0, len(catalogo), size=n, dtype=np.int32)
+        return pd.Categorical.from_codes(codigos, categories=catalogo)
+
+    def nombres(self, n):
+        return self._nombres_completos[self.rng.integers(0, len(self._nombres_completos), size=n)]
+
+    def emails(self, n):
+        return self._emails[self.rng.integers(0, len(self._emails), size=n)]
+
+    def telefonos(self, n):
+        # "+54 9 11 XXXX-XXXX" armado como matriz de bytes de ancho fijo
+        prefijo = np.frombuffer(b"+54 9 11 ", dtype=np.uint8)
+        matriz = np.empty((n, len(prefijo) + 9), dtype=np.uint8)
+        matriz[:, :len(prefijo)] = prefijo
+        matriz[:, len(prefijo):len(prefijo) + 4] = _digitos(self.rng.integers(1000, 10000, size=n), 4)
+        matriz[:, len(prefijo) + 4] = ord('-')
+        matriz[:, len(prefijo) + 5:] = _digitos(self.rng.integers(1000, 10000, size=n), 4)
+        return matriz.view(f'S{matriz.shape[1]}').ravel().astype(str).astype(object)
+
+    def fechas(self, n, inicio="2020-01-01", fin="2024-12-31"):
+        inicio = np.datetime64(inicio, 'D')
+        dias = (np.datetime64(fin, 'D') - inicio).astype(np.int64)
+        return inicio + self.rng.integers(0, dias + 1, size=n)
+
+    def numeros(self, n, minimo=1, maximo=100, decimales=False):
+        if decimales:
+            return np.round(self.rng.uniform(minimo, maximo, size=n), 2)
+        return self.rng.integers(minimo, maximo + 1, size=n)
+
+    def ciudades(self, n):
+        return self._elegir(CIUDADES, n)
+
+    def productos(self, n):
+        return self._elegir(PRODUCTOS, n)
+
+    def booleanos(self, n):
+        return self.rng.random(n) < 0.5
+
+    def catalogo(self, n, valores):
+        return self._elegir(list(dict.fromkeys(valores)), n)
+
+    def direcciones(self, n):
+        calles = np.array(CALLES, dtype=object)[self.rng.integers(0, len(CALLES), size=n)]
+        return calles + " " + self.rng.integers(1, 10000, size=n).astype(str).astype(object)
+
+    def lorem(self, n, minimo=3, maximo=8):
+        largos = self.rng.integers(minimo, maximo + 1, size=n)
+        indices = self.rng.integers(0, len(self._lorem), size=(n, maximo))
+        frases = self._lorem_inicial[indices[:, 0]]
+        # Una concatenación vectorizada por posición, solo en las filas que la usan
+        for posicion in range(1, maximo):
+            activas = largos > posicion
+            frases[activas] = frases[activas] + " " + self._lorem[indices[activas, posicion]]
+        return frases + "."
+
+    # ------------------------------
+    # Tablas completas
+    # ------------------------------
+    def columna(self, tipo, n, **opciones):
+        """Genera una columna a partir del nombre del generador"""
+        if tipo not in TIPOS_COLUMNA:
+            raise ValueError(f"Generador desconocido: {tipo}")
+        return getattr(self, tipo)(n, **opciones)
+
+    def dataframe(self, n, columnas):
+        """Arma un DataFrame; ``columnas`` mapea nombre -> tipo o (tipo, opciones)"""
+        datos = {}
+        for nombre, especificacion in columnas.items():
+            tipo, opciones = (especificacion, {}) if isinstance(especificacion, str) else especificacion
+            datos[nombre] = self.columna(tipo, n, **opciones)
+        return pd.DataFrame(datos)
+
+    def escribir_por_bloques(self, ruta, n_filas, columnas, tamanio_bloque=1_000_000, formato='csv'):
+        """Escribe n_filas en bloques a CSV o Parquet y devuelve la ruta"""
+        if formato not in FORMATOS_SALIDA:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        escritor = None
+        try:
+            for inicio in range(0, n_filas, tamanio_bloque):
+                bloque = self.dataframe(min(tamanio_bloque, n_filas - inicio), columnas)
+                if formato == 'csv':
+                    bloque.to_csv(ruta, mode='w' if inicio == 0 else 'a', header=inicio == 0, index=False)
+                else:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(ruta, tabla.schema)
+                    escritor.write_table(tabla)
+        finally:
+            if escritor is not None:
+                escritor.close()
+        return ruta
+
+
+# ==============================
+# FUNCIONES DE GENERACIÓN
+# ==============================
+def generar_nombres(n, semilla=None):
+    return MotorGenerador(semilla).nombres(n)
+
+def generar_emails(n, semilla=None):
+    return MotorGenerador(semilla).emails(n)
+
+def generar_telefonos(n, semilla=None):
+    return MotorGenerador(semilla).telefonos(n)
+
+def generar_fechas(n, inicio="2020-01-01", fin="2024-12-31", semilla=None):
+    return MotorGenerador(semilla).fechas(n, inicio, fin)
+
+def generar_numeros(n, minimo=1, maximo=100, decimales=False, semilla=None):
+    return MotorGenerador(semilla).numeros(n, minimo, maximo, decimales)
+
+def generar_ciudades(n, semilla=None):
+    return MotorGenerador(semilla).ciudades(n)
+
+def generar_productos(n, semilla=None):
+    return MotorGenerador(semilla).productos(n)
+
+def generar_booleanos(n, semilla=None):
+    return MotorGenerador(semilla).booleanos(n)
+
+def generar_lorem(n, semilla=None):
+    return MotorGenerador(semilla).lorem(n)
@@ -0,0 +1,152 @@
+# comun/indice_claves.py
+# Índices por clave foránea en formato CSR: las claves distintas ordenadas, un
+# arreglo de offsets y las posiciones de las filas agrupadas por clave. Buscar
+# las filas de un cliente, producto, sucursal o factura cuesta O(log n + k)
+# (búsqueda binaria + el tramo de k posiciones), sin recorrer la tabla con una
+# máscara. Las filas agregadas al final van a un tramo pendiente pequeño que se
+# consolida con el índice principal cuando crece; el tramo se ordena por clave
+# en la primera búsqueda después de agregar, así también se busca con
+# búsqueda binaria.
+
+import numpy as np
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+# Columnas indexadas de cada tabla
+CLAVES_INDEXADAS = {
+    'facturas_encabezado': ['id_factura', 'id_cliente', 'id_sucursal'],
+    'facturas_detalle': ['id_factura', 'id_producto'],
+}
+MINIMO_PENDIENTES = 1024
+FRACCION_PENDIENTES = 0.125
+
+SIN_FILAS = np.empty(0, dtype=np.int64)
+
+
+def _rangos(inicios, fines):
+    """Concatenación de arange(inicio, fin) de cada par, sin bucle de Python"""
+    largos = fines - inicios
+    total = int(largos.sum())
+    if total == 0:
+        return SIN_FILAS
+    # Cada elemento es su inicio más su lugar dentro del rango
+    desplazamientos = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+    return desplazamientos + np.arange(total, dtype=np.int64)
+
+
+class IndiceCSR:
+    """Posiciones de filas agrupadas por valor de una columna"""
+
+    def __init__(self, valores):
+        self._construir(np.asarray(valores))
+
+    def _construir(self, valores):
+        orden = np.argsort(valores, kind='stable')
+        self.claves, inicios = np.unique(valores[orden], return_index=True)
+        self.offsets = np.append(inicios, len(valores)).astype(np.int64)
+        self.posiciones = orden.astype(np.int64)
+        self.filas = len(valores)
+        self._pendientes_valores = []
+        self._pendientes_posiciones = []
+        self._pendientes_ordenados = None
+
+    def _pendientes(self):
+        """(valores, posiciones) del tramo pendiente ordenados por valor; se
+        ordena una vez por cada tanda de filas agregadas"""
+        if self._pendientes_ordenados is None:
+            valores = np.concatenate(self._pendientes_valores)
+            orden = np.argsort(valores, kind='stable')
+            self._pendientes_ordenados = (valores[orden], np.concatenate(self._pendientes_posiciones)[orden])
+        return self._pendientes_ordenados
+
+    def buscar(self, clave):
+        """Posiciones (en orden de la tabla) de las filas con esa clave"""
+        i = np.searchsorted(self.claves, clave)
+        filas = SIN_FILAS
+        if i < len(self.claves) and self.claves[i] == clave:
+            filas = self.posiciones[self.offsets[i]:self.offsets[i + 1]]
+        if self._pendientes_valores:
+            valores, posiciones = self._pendientes()
+            inicio, fin = np.searchsorted(valores, clave, 'left'), np.searchsorted(valores, clave, 'right')
+            filas = np.concatenate([filas, posiciones[inicio:fin]])
+        return filas
+
+    def buscar_varias(self, claves):
+        """Posiciones (ordenadas) de las filas de cualquiera de las claves"""
+        claves = np.unique(np.asarray(claves))
+        i = np.searchsorted(self.claves, claves)
+        existe = i < len(self.claves)
+        existe[existe] = self.claves[i[existe]] == claves[existe]
+        encontradas = i[existe]
+        filas = self.posiciones[_rangos(self.offsets[encontradas], self.offsets[encontradas + 1])]
+        if self._pendientes_valores:
+            valores, posiciones = self._pendientes()
+            tramos = _rangos(np.searchsorted(valores, claves, 'left'), np.searchsorted(valores, claves, 'right'))
+            filas = np.concatenate([filas, posiciones[tramos]])
+        return np.sort(filas)
+
+    def conteos(self):
+        """Cantidad de filas por clave (sin las pendientes)"""
+        return self.claves, np.diff(self.offsets)
+
+    def agregar(self, valores):
+        """Indexa filas agregadas al final de la tabla"""
+        valores = np.asarray(valores)
+        if len(valores) == 0:
+            return
+        self._pendientes_valores.append(valores)
+        self._pendientes_posiciones.append(np.arange(self.filas, self.filas + len(valores), dtype=np.int64))
+        self._pendientes_ordenados = None
+        self.filas += len(valores)
+        pendientes = sum(len(v) for v in self._pendientes_valores)
+        if pendientes > max(MINIMO_PENDIENTES, FRACCION_PENDIENTES * self.filas):
+            self._consolidar()
+
+    def _consolidar(self):
+        """Une el tramo pendiente con el índice principal"""
+        valores = np.empty(self.filas, dtype=np.result_type(self.claves, *self._pendientes_valores))
+        principales = self.offsets[-1]
+        valores[self.posiciones] = np.repeat(self.claves, np.diff(self.offsets))
+        valores[principales:] = np.concatenate(self._pendientes_valores)
+        self._construir(valores)
+
+
+class IndicesClaves:
+    """Índices CSR de las claves foráneas de varias tablas"""
+
+    def __init__(self, claves=CLAVES_INDEXADAS):
+        self.claves = claves
+        self._indices = {}
+        self._tablas = {}  # tabla -> DataFrame indexado (para saber si cambió)
+
+    def construir(self, nombre, df):
+        self._indices[nombre] = {col: IndiceCSR(df[col].to_numpy()) for col in self.claves[nombre]}
+        self._tablas[nombre] = df
+
+    def agregar(self, nombre, df, nuevas, anterior):
+        """La tabla df es `anterior` más `nuevas` filas al final. Si los índices
+        no se armaron sobre `anterior` (la tabla se reemplazó después, por
+        ejemplo al recargar el CSV) se reconstruyen con df."""
+        if self._tablas.get(nombre) is not anterior:
+            self.construir(nombre, df)
+            return
+        for col, indice in self._indices[nombre].items():
+            indice.agregar(df[col].to_numpy()[len(df) - nuevas:])
+        self._tablas[nombre] = df
+
+    def sincronizar(self, datos):
+        """Reconstruye los índices de las tablas que fueron reemplazadas"""
+        for nombre in self.claves:
+            if self._tablas.get(nombre) is not datos[nombre]:
+                self.construir(nombre, datos[nombre])
+
+    def indice(self, nombre, columna):
+        return self._indices[nombre][columna]
+
+    def filas(self, nombre, columna, clave):
+        """Filas de la tabla cuya columna vale clave"""
+        return self._tablas[nombre].iloc[self.indice(nombre, columna).buscar(clave)]
+
+    def filas_varias(self, nombre, columna, claves):
+        return self._tablas[nombre].iloc[self.indice(nombre, columna).buscar_varias(claves)]
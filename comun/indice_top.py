@@ -0,0 +1,219 @@
+# comun/indice_top.py
+# Índice de rankings (top facturas y top productos) que se mantiene mientras
+# llegan filas nuevas, en lugar de ordenar las tablas completas en cada consulta.
+# - Facturas: un heap acotado a k_max por (sucursal, día) y otro global.
+# - Productos: totales acumulados por (sucursal, día, producto) y un top-k_max
+#   global que se actualiza solo con los productos que cambiaron.
+# Agregar un lote cuesta lo que el lote: la sucursal y el día de cada factura y
+# los totales por producto son arreglos indexados por id (con capacidad que se
+# duplica), y los totales por grupo de cada lote van a un tramo pendiente que
+# se consolida con el principal cuando crece (como en comun/indice_claves.py).
+# Las consultas sin filtros cuestan O(k); con filtros de sucursal o fechas
+# recorren solo los grupos ya resumidos del rango pedido.
+# Los importes se guardan en centavos enteros y vuelven a pesos al consultar.
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from comun.dinero import CENTAVOS, a_centavos, a_pesos
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+K_MAXIMO = 50
+METRICAS_PRODUCTO = ['cantidad', 'facturacion']
+SIN_SUCURSAL = -1
+SIN_DIA = np.datetime64('NaT', 'ns')
+MINIMO_PENDIENTES = 1024
+FRACCION_PENDIENTES = 0.125
+
+
+def _dias(fechas):
+    return pd.to_datetime(fechas).dt.normalize()
+
+
+def _ampliar(arreglo, id_maximo, relleno):
+    """Arreglo indexado por id con lugar hasta id_maximo (duplica la capacidad)"""
+    capacidad = len(arreglo)
+    if id_maximo < capacidad:
+        return arreglo
+    nueva = max(capacidad * 2, id_maximo + 1)
+    return np.concatenate([arreglo, np.full(nueva - capacidad, relleno, dtype=arreglo.dtype)])
+
+
+def _por_id(arreglo, ids, relleno):
+    """arreglo[ids], con `relleno` para los ids fuera del arreglo"""
+    valores = np.full(len(ids), relleno, dtype=arreglo.dtype)
+    conocidos = ids < len(arreglo)
+    valores[conocidos] = arreglo[ids[conocidos]]
+    return valores
+
+
+class IndiceTop:
+    """Rankings de facturas y productos, filtrables por sucursal y rango de fechas"""
+
+    def __init__(self, k_max=K_MAXIMO):
+        self.k_max = k_max
+        # Facturas: (total en centavos, id_factura, id_cliente, fecha)
+        self._facturas_global = []
+        self._facturas_grupo = {}  # sucursal -> {dia -> heap}
+        # Sucursal y día de cada factura, indexados por id_factura
+        self._sucursal_factura = np.empty(0, dtype='int64')
+        self._dia_factura = np.empty(0, dtype='datetime64[ns]')
+        # Productos: totales por grupo (principal + tramo pendiente) y por id_producto
+        self._productos_grupo = None
+        self._productos_pendientes = []
+        self._totales_producto = {metrica: np.zeros(0, dtype=CENTAVOS) for metrica in METRICAS_PRODUCTO}
+        self._producto_con_lineas = np.zeros(0, dtype=bool)
+        self._top_producto = {metrica: pd.Series(dtype=CENTAVOS) for metrica in METRICAS_PRODUCTO}
+
+    # ------------------------------
+    # Carga incremental
+    # ------------------------------
+    def agregar_facturas(self, encabezado):
+        """Incorpora facturas (id_factura, fecha, id_cliente, id_sucursal, total_venta)"""
+        if encabezado.empty:
+            return
+        df = encabezado[['id_factura', 'fecha', 'id_cliente', 'id_sucursal', 'total_venta']].copy()
+        df['dia'] = _dias(df['fecha'])
+        df['total_venta'] = a_centavos(df['total_venta'])
+        ids = df['id_factura'].to_numpy(dtype='int64')
+        self._sucursal_factura = _ampliar(self._sucursal_factura, int(ids.max()), SIN_SUCURSAL)
+        self._dia_factura = _ampliar(self._dia_factura, int(ids.max()), SIN_DIA)
+        self._sucursal_factura[ids] = df['id_sucursal'].to_numpy(dtype='int64')
+        self._dia_factura[ids] = df['dia'].to_numpy(dtype='datetime64[ns]')
+
+        # Solo las k_max mayores de cada grupo pueden entrar en algún ranking
+        candidatas = df.sort_values('total_venta', ascending=False).groupby(['id_sucursal', 'dia']).head(self.k_max)
+        columnas = ['total_venta', 'id_factura', 'id_cliente', 'dia', 'id_sucursal']
+        for total, id_factura, id_cliente, dia, sucursal in candidatas[columnas].itertuples(index=False):
+            factura = (int(total), int(id_factura), int(id_cliente), dia)
+            heap = self._facturas_grupo.setdefault(int(sucursal), {}).setdefault(dia, [])
+            self._empujar(heap, factura)
+            self._empujar(self._facturas_global, factura)
+
+    def agregar_detalle(self, detalle):
+        """Incorpora líneas (id_factura, id_producto, cantidad, subtotal_linea).
+
+        Las facturas de las líneas deberían estar cargadas antes; si no, las
+        líneas cuentan en los totales pero no en las consultas filtradas.
+        """
+        if detalle.empty:
+            return
+        facturas = detalle['id_factura'].to_numpy(dtype='int64')
+        df = pd.DataFrame({
+            'id_sucursal': _por_id(self._sucursal_factura, facturas, SIN_SUCURSAL),
+            'dia': _por_id(self._dia_factura, facturas, SIN_DIA),
+            'id_producto': detalle['id_producto'].to_numpy(),
+            'cantidad': detalle['cantidad'].to_numpy(dtype='int64'),
+            'facturacion': a_centavos(detalle['subtotal_linea'].to_numpy()),
+        })
+        self._productos_pendientes.append(
+            df.groupby(['id_sucursal', 'dia', 'id_producto'], dropna=False)[METRICAS_PRODUCTO].sum())
+        pendientes = sum(len(grupo) for grupo in self._productos_pendientes)
+        principales = 0 if self._productos_grupo is None else len(self._productos_grupo)
+        if pendientes > max(MINIMO_PENDIENTES, FRACCION_PENDIENTES * principales):
+            self._consolidar_grupos()
+
+        # Solo los productos del lote: se suman a sus totales y se revisan en el top
+        por_producto = df.groupby('id_producto')[METRICAS_PRODUCTO].sum()
+        ids = por_producto.index.to_numpy(dtype='int64')
+        self._producto_con_lineas = _ampliar(self._producto_con_lineas, int(ids.max()), False)
+        self._producto_con_lineas[ids] = True
+        for metrica in METRICAS_PRODUCTO:
+            totales = _ampliar(self._totales_producto[metrica], int(ids.max()), 0)
+            totales[ids] += por_producto[metrica].to_numpy(dtype=CENTAVOS)
+            self._totales_producto[metrica] = totales
+            self._actualizar_top_producto(metrica, por_producto[metrica])
+
+    def _consolidar_grupos(self):
+        """Une el tramo pendiente de totales por grupo con el principal"""
+        partes = [grupo for grupo in [self._productos_grupo, *self._productos_pendientes] if grupo is not None]
+        self._productos_grupo = pd.concat(partes).groupby(level=[0, 1, 2], dropna=False).sum()
+        self._productos_pendientes = []
+
+    def _empujar(self, heap, factura):
+        if len(heap) < self.k_max:
+            heapq.heappush(heap, factura)
+        elif factura > heap[0]:
+            heapq.heapreplace(heap, factura)
+
+    def _actualizar_top_producto(self, metrica, deltas):
+        """Mantiene el top-k_max global revisando solo los productos que cambiaron"""
+        if (deltas < 0).any():
+            # Con devoluciones un producto puede salir del top: se recalcula completo
+            candidatos = np.flatnonzero(self._producto_con_lineas)
+        else:
+            # Con totales que solo crecen, un producto que no cambió y no estaba
+            # en el top no puede haber superado al último del top anterior
+            candidatos = self._top_producto[metrica].index.union(deltas.index).to_numpy(dtype='int64')
+        totales = pd.Series(self._totales_producto[metrica][candidatos],
+                            index=pd.Index(candidatos, name='id_producto'), name=metrica)
+        self._top_producto[metrica] = totales.nlargest(self.k_max)
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def _validar_n(self, n):
+        if n > self.k_max:
+            raise ValueError(f"El índice guarda hasta {self.k_max} posiciones (se pidieron {n})")
+
+    def top_facturas(self, n=20, sucursales=None, desde=None, hasta=None):
+        """DataFrame con las n facturas de mayor total dentro de los filtros"""
+        self._validar_n(n)
+        if sucursales is None and desde is None and hasta is None:
+            mejores = heapq.nlargest(n, self._facturas_global)
+        else:
+            desde = pd.Timestamp(desde) if desde is not None else None
+            hasta = pd.Timestamp(hasta) if hasta is not None else None
+            grupos = []
+            for sucursal, por_dia in self._facturas_grupo.items():
+                if sucursales is not None and sucursal not in sucursales:
+                    continue
+                grupos.extend(
+                    heap for dia, heap in por_dia.items()
+                    if (desde is None or dia >= desde) and (hasta is None or dia <= hasta)
+                )
+            mejores = heapq.nlargest(n, (f for heap in grupos for f in heap))
+        facturas = pd.DataFrame(mejores, columns=['total_venta', 'id_factura', 'id_cliente', 'fecha'])
+        facturas['total_venta'] = a_pesos(facturas['total_venta'])
+        return facturas
+
+    def top_productos(self, n=8, metrica='facturacion', sucursales=None, desde=None, hasta=None):
+        """Series id_producto -> métrica con los n productos mejor ubicados"""
+        self._validar_n(n)
+        if metrica not in METRICAS_PRODUCTO:
+            raise ValueError(f"Métrica desconocida: {metrica}")
+        if sucursales is None and desde is None and hasta is None:
+            return self._en_unidades(self._top_producto[metrica].head(n), metrica)
+        # Un grupo puede repetirse entre el principal y el tramo pendiente: la
+        # suma por producto de abajo los junta
+        partes = [grupo for grupo in [self._productos_grupo, *self._productos_pendientes] if grupo is not None]
+        if not partes:
+            return pd.Series(dtype='float64', name=metrica)
+        grupo = pd.concat(partes) if len(partes) > 1 else partes[0]
+        mascara = pd.Series(True, index=grupo.index)
+        if sucursales is not None:
+            mascara &= grupo.index.get_level_values('id_sucursal').isin(list(sucursales))
+        dias = grupo.index.get_level_values('dia')
+        if desde is not None:
+            mascara &= dias >= pd.Timestamp(desde)
+        if hasta is not None:
+            mascara &= dias <= pd.Timestamp(hasta)
+        seleccion = grupo.loc[mascara.to_numpy(), metrica]
+        return self._en_unidades(seleccion.groupby(level='id_producto').sum().nlargest(n), metrica)
+
+    @staticmethod
+    def _en_unidades(serie, metrica):
+        """Facturación en pesos (se guarda en centavos); cantidades como están"""
+        return a_pesos(serie) if metrica == 'facturacion' else serie
+
+
+def construir_indice(facturas_encabezado, facturas_detalle, k_max=K_MAXIMO):
+    """Arma el índice completo a partir de las dos tablas de facturas"""
+    indice = IndiceTop(k_max)
+    indice.agregar_facturas(facturas_encabezado)
+    indice.agregar_detalle(facturas_detalle)
+    return indice
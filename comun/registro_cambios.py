@@ -0,0 +1,229 @@
+# comun/registro_cambios.py
+# Persistencia de las ediciones hechas en los dashboards: cada confirmación
+# guarda, en una sola transacción SQLite, las filas insertadas, modificadas o
+# eliminadas de cada tabla (registro de cambios / delta log). Los CSV de datos/
+# no se tocan: al cargar, el registro se aplica encima de ellos.
+# La edición de una sesión se compara con la versión de la tabla de la que
+# partió; si otra sesión confirmó cambios en las mismas claves mientras tanto,
+# la confirmación se rechaza en vez de pisarlos.
+#
+# Un delta es un dict {'clave': columna, 'eliminadas': [claves], 'filas': DataFrame}
+# donde 'filas' trae el estado final de las filas nuevas o modificadas.
+
+import json
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from comun.esquemas import entero_nullable, sin_categorias
+
+# ==============================
+# DELTAS
+# ==============================
+def delta_vacio(clave):
+    return {'clave': clave, 'eliminadas': [], 'filas': pd.DataFrame()}
+
+
+def claves_tocadas(delta):
+    claves = list(delta['eliminadas'])
+    if not delta['filas'].empty:
+        claves.extend(delta['filas'][delta['clave']].tolist())
+    return claves
+
+
+def validar_claves(df, clave):
+    """Mensaje de error si la columna clave tiene vacíos o repetidos, si no None"""
+    valores = df[clave].replace('', pd.NA)
+    if valores.isna().any():
+        return f"Hay filas sin '{clave}'"
+    if valores.duplicated().any():
+        repetidas = valores[valores.duplicated()].unique()[:5].tolist()
+        return f"'{clave}' repetido: {repetidas}"
+    return None
+
+
+def ajustar_tipos(editado, original):
+    """Convierte las columnas editadas al tipo de la tabla original (el editor deja "" o texto)"""
+    editado = editado.copy()
+    for col in editado.columns.intersection(original.columns):
+        if editado[col].dtype == original[col].dtype:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(original[col]):
+            editado[col] = pd.to_datetime(editado[col].replace('', pd.NA), errors='coerce')
+        elif pd.api.types.is_numeric_dtype(original[col]):
+            convertida = pd.to_numeric(editado[col].replace('', pd.NA), errors='coerce')
+            if not convertida.isna().any():
+                convertida = convertida.astype(original[col].dtype)
+            editado[col] = convertida
+    return editado
+
+
+def calcular_delta(original, editado, clave):
+    """Diferencias por clave primaria entre la tabla compartida y la editada"""
+    editado = ajustar_tipos(editado, original)
+    error = validar_claves(editado, clave)
+    if error:
+        raise ValueError(error)
+    claves_originales = original[clave].astype(str)
+    claves_editadas = editado[clave].astype(str)
+    eliminadas = original.loc[~claves_originales.isin(claves_editadas), clave].tolist()
+    nuevas = editado[~claves_editadas.isin(claves_originales)]
+
+    a = original.set_index(claves_originales)
+    b = editado.set_index(claves_editadas)
+    comunes = a.index.intersection(b.index)
+    columnas = [c for c in a.columns if c in b.columns]
+    a, b = a.loc[comunes, columnas], b.loc[comunes, columnas]
+    distintas = ~((a == b) | (a.isna() & b.isna())).all(axis=1)
+    modificadas = editado[claves_editadas.isin(comunes[distintas.to_numpy()])]
+
+    return {'clave': clave, 'eliminadas': eliminadas, 'filas': pd.concat([nuevas, modificadas])}
+
+
+def conflictos(base, actual, delta):
+    """Claves del delta que otra confirmación tocó después de `base`, la versión
+    de la tabla de la que partió la edición (actual es la tabla compartida hoy)"""
+    if actual is base:
+        return []
+    # Sin category: dos versiones pueden tener distintas categorías y no se comparan
+    concurrente = calcular_delta(sin_categorias(base), sin_categorias(actual), delta['clave'])
+    ajenas = {str(k) for k in claves_tocadas(concurrente)}
+    return [k for k in claves_tocadas(delta) if str(k) in ajenas]
+
+
+def restaurar_tipos(resultado, original):
+    """Vuelve cada columna al tipo que tenía en la tabla original: al concatenar
+    filas nuevas una category queda object y una entera con faltantes, float
+    (esa vuelve al entero nullable del mismo ancho)"""
+    convertidas = {}
+    for col in original.columns.intersection(resultado.columns):
+        tipo = original[col].dtype
+        if resultado[col].dtype == tipo:
+            continue
+        if isinstance(tipo, pd.CategoricalDtype):
+            # Los valores nuevos se agregan como categorías
+            nuevas = pd.Index(resultado[col].dropna().unique()).difference(tipo.categories)
+            tipo = pd.CategoricalDtype(tipo.categories.append(nuevas), ordered=tipo.ordered)
+        elif isinstance(tipo, np.dtype) and tipo.kind in 'iu' and resultado[col].isna().any():
+            tipo = entero_nullable(tipo)
+        try:
+            convertidas[col] = resultado[col].astype(tipo)
+        except (ValueError, TypeError, OverflowError):
+            continue
+    return resultado.assign(**convertidas) if convertidas else resultado
+
+
+def aplicar_delta(df, delta):
+    """Tabla con el delta aplicado (las filas tocadas se reemplazan al final),
+    con los mismos tipos de columna que df"""
+    tocadas = claves_tocadas(delta)
+    if not tocadas:
+        return df
+    clave = delta['clave']
+    restantes = df[~df[clave].astype(str).isin([str(c) for c in tocadas])]
+    if delta['filas'].empty:
+        return restantes.reset_index(drop=True)
+    return restaurar_tipos(pd.concat([restantes, delta['filas']], ignore_index=True), df)
+
+
+def _a_json(filas):
+    """Filas a registros JSON (fechas como texto, igual que en los CSV)"""
+    filas = filas.copy()
+    for col in filas.columns:
+        if pd.api.types.is_datetime64_any_dtype(filas[col]):
+            sin_hora = (filas[col].dropna().dt.normalize() == filas[col].dropna()).all()
+            filas[col] = filas[col].dt.strftime('%Y-%m-%d' if sin_hora else '%Y-%m-%d %H:%M:%S')
+    return json.loads(filas.to_json(orient='records', force_ascii=False))
+
+
+# ==============================
+# REGISTRO EN SQLITE
+# ==============================
+class RegistroCambios:
+    """Registro de cambios confirmados, guardado en un archivo SQLite"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with self._conectar() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS registro_cambios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    lote INTEGER NOT NULL,
+                    fecha TEXT NOT NULL,
+                    tabla TEXT NOT NULL,
+                    columna_clave TEXT NOT NULL,
+                    operacion TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    fila TEXT
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS ix_registro_tabla ON registro_cambios (tabla, id)")
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def confirmar(self, deltas):
+        """Guarda todos los deltas {tabla: delta} en una transacción; devuelve el número de lote"""
+        fecha = datetime.now().isoformat(timespec='seconds')
+        con = self._conectar()
+        try:
+            with con:
+                # Toma el lock de escritura antes de leer el último lote: dos procesos
+                # que confirman a la vez no pueden obtener el mismo número
+                con.execute("BEGIN IMMEDIATE")
+                lote = con.execute("SELECT COALESCE(MAX(lote), 0) + 1 FROM registro_cambios").fetchone()[0]
+                registros = []
+                for tabla, delta in deltas.items():
+                    clave = delta['clave']
+                    registros.extend(
+                        (lote, fecha, tabla, clave, 'eliminar', json.dumps(k), None)
+                        for k in delta['eliminadas']
+                    )
+                    if not delta['filas'].empty:
+                        for fila in _a_json(delta['filas']):
+                            registros.append((lote, fecha, tabla, clave, 'guardar',
+                                              json.dumps(fila[clave]), json.dumps(fila, ensure_ascii=False)))
+                con.executemany(
+                    "INSERT INTO registro_cambios (lote, fecha, tabla, columna_clave, operacion, clave, fila) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    registros
+                )
+        finally:
+            con.close()
+        return lote
+
+    def delta_acumulado(self, tabla):
+        """Estado final de todas las filas que el registro tocó en la tabla"""
+        con = self._conectar()
+        try:
+            filas = con.execute(
+                "SELECT columna_clave, operacion, clave, fila FROM registro_cambios WHERE tabla = ? ORDER BY id",
+                (tabla,)
+            ).fetchall()
+        finally:
+            con.close()
+        if not filas:
+            return None
+        # Solo cuenta la última operación de cada clave
+        finales = {}
+        for columna_clave, operacion, clave, fila in filas:
+            finales[clave] = json.loads(fila) if operacion == 'guardar' else None
+        delta = delta_vacio(columna_clave)
+        delta['eliminadas'] = [json.loads(k) for k, f in finales.items() if f is None]
+        guardadas = [f for f in finales.values() if f is not None]
+        if guardadas:
+            delta['filas'] = pd.DataFrame(guardadas)
+        return delta
+
+    def resumen(self):
+        """Cantidad de lotes y de cambios registrados"""
+        con = self._conectar()
+        try:
+            lotes, cambios = con.execute(
+                "SELECT COUNT(DISTINCT lote), COUNT(*) FROM registro_cambios"
+            ).fetchone()
+        finally:
+            con.close()
+        return {'lotes': lotes, 'cambios': cambios}
@@ -0,0 +1,226 @@
+# comun/rendimiento.py
+# Trazas de rendimiento livianas para los scripts y dashboards. Cada etapa
+# (carga, merge, agregación, entrenamiento, gráfico) se mide con el decorador
+# @trazar o con el contexto `with medir(...)` y queda un registro con tiempo
+# real, tiempo de CPU, filas de entrada/salida y memoria:
+# - memoria_mb: cuánto cambió la memoria residente del proceso (Linux).
+# - memoria_pico_mb: pico de lo reservado durante la etapa, por encima de lo
+#   que había al empezar. Sale de tracemalloc, así que solo se mide si está
+#   activo (PYTHONTRACEMALLOC=1 o tracemalloc.start()); encarece las
+#   reservas, por eso no se activa solo.
+# Los registros se guardan como JSON para analizarlos después y se pueden ver
+# en el panel "⏱️ Rendimiento" de los dashboards.
+
+import os
+import json
+import time
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+MAXIMO_REGISTROS = 5000
+ARCHIVO_TRAZA = 'traza_rendimiento.json'
+# Si está definida, cada medición se agrega a este archivo (una línea JSON por etapa)
+ARCHIVO_TRAZA_CONTINUA = os.environ.get('TRAZA_RENDIMIENTO')
+
+
+MB = 1024**2
+
+
+def _memoria_actual_mb():
+    """Memoria residente actual del proceso (MB), o None fuera de Linux"""
+    try:
+        with open('/proc/self/statm') as archivo:
+            paginas = int(archivo.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf('SC_PAGE_SIZE') / MB
+
+# ------------------------------
+# Picos por etapa con tracemalloc
+# ------------------------------
+# tracemalloc tiene un solo pico para todo el proceso: antes de reiniciarlo,
+# el pico se anota en todas las etapas abiertas (anidadas o de otros hilos)
+_etapas_abiertas = []
+_lock_picos = threading.Lock()
+
+
+def _anotar_pico():
+    _, pico = tracemalloc.get_traced_memory()
+    for etapa in _etapas_abiertas:
+        etapa['pico'] = max(etapa['pico'], pico)
+    tracemalloc.reset_peak()
+
+
+def _abrir_pico():
+    if not tracemalloc.is_tracing():
+        return None
+    with _lock_picos:
+        _anotar_pico()
+        actual, _ = tracemalloc.get_traced_memory()
+        etapa = {'base': actual, 'pico': actual}
+        _etapas_abiertas.append(etapa)
+        return etapa
+
+
+def _cerrar_pico(etapa):
+    """Pico (MB) de la etapa por encima de lo reservado al abrirla"""
+    with _lock_picos:
+        if tracemalloc.is_tracing():
+            _anotar_pico()
+        _etapas_abiertas[:] = [abierta for abierta in _etapas_abiertas if abierta is not etapa]
+    return (etapa['pico'] - etapa['base']) / MB
+
+
+def contar_filas(valor):
+    """Filas de un DataFrame/Series/array, o la suma de una tupla, lista o dict de ellos"""
+    if valor is None or isinstance(valor, (str, bytes)):
+        return None
+    if isinstance(valor, dict):
+        valor = list(valor.values())
+    if isinstance(valor, (list, tuple)):
+        conteos = [c for c in (contar_filas(v) for v in valor) if c is not None]
+        return sum(conteos) if conteos else None
+    if hasattr(valor, 'shape') and getattr(valor, 'shape', None):
+        return int(valor.shape[0])
+    if hasattr(valor, 'cantidad_filas'):  # Seleccion de proyecto4/filtros.py
+        return int(valor.cantidad_filas())
+    return None
+
+
+class Medicion:
+    """Datos de una etapa en curso; filas_salida se puede completar dentro del with"""
+
+    def __init__(self, nombre, filas_entrada=None):
+        self.nombre = nombre
+        self.filas_entrada = filas_entrada
+        self.filas_salida = None
+
+
+class Trazador:
+    """Registro de etapas medidas, compartido por todo el proceso"""
+
+    def __init__(self, maximo=MAXIMO_REGISTROS, archivo_continuo=ARCHIVO_TRAZA_CONTINUA):
+        self.maximo = maximo
+        self.archivo_continuo = archivo_continuo
+        self._lock = threading.Lock()
+        self._registros = []
+
+    @contextmanager
+    def medir(self, nombre, filas_entrada=None):
+        medicion = Medicion(nombre, filas_entrada)
+        inicio = datetime.now()
+        memoria_inicial = _memoria_actual_mb()
+        pico = _abrir_pico()
+        reloj, cpu = time.perf_counter(), time.thread_time()
+        error = None
+        try:
+            yield medicion
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            registro = {
+                'etapa': nombre,
+                'inicio': inicio.isoformat(timespec='milliseconds'),
+                'segundos': round(time.perf_counter() - reloj, 6),
+                'cpu_segundos': round(time.thread_time() - cpu, 6),
+                'filas_entrada': medicion.filas_entrada,
+                'filas_salida': medicion.filas_salida,
+                'memoria_mb': None,
+                'memoria_pico_mb': None,
+                'hilo': threading.current_thread().name,
+                'error': error,
+            }
+            if memoria_inicial is not None:
+                registro['memoria_mb'] = round(_memoria_actual_mb() - memoria_inicial, 3)
+            if pico is not None:
+                registro['memoria_pico_mb'] = round(_cerrar_pico(pico), 3)
+            with self._lock:
+                self._registros.append(registro)
+                del self._registros[:-self.maximo]
+                if self.archivo_continuo:
+                    with open(self.archivo_continuo, 'a', encoding='utf-8') as archivo:
+                        archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def trazar(self, nombre=None):
+        """Decorador: mide cada llamada; las filas se toman de los argumentos y del resultado"""
+        def decorador(funcion):
+            etapa = nombre or funcion.__name__
+
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                with self.medir(etapa, contar_filas(list(args) + list(kwargs.values()))) as medicion:
+                    resultado = funcion(*args, **kwargs)
+                    medicion.filas_salida = contar_filas(resultado)
+                return resultado
+            return envoltura
+        return decorador
+
+    def registros(self):
+        with self._lock:
+            return list(self._registros)
+
+    def agregar(self, registros):
+        """Suma registros medidos en otro proceso (no se vuelven a escribir al archivo continuo)"""
+        with self._lock:
+            self._registros.extend(registros)
+            del self._registros[:-self.maximo]
+
+    def limpiar(self):
+        with self._lock:
+            self._registros.clear()
+
+    def resumen(self):
+        """Totales por etapa: llamadas, segundos y CPU"""
+        etapas = {}
+        for r in self.registros():
+            etapa = etapas.setdefault(r['etapa'], {'etapa': r['etapa'], 'llamadas': 0, 'segundos': 0.0, 'cpu_segundos': 0.0})
+            etapa['llamadas'] += 1
+            etapa['segundos'] += r['segundos']
+            etapa['cpu_segundos'] += r['cpu_segundos']
+        return sorted(etapas.values(), key=lambda e: e['segundos'], reverse=True)
+
+    def guardar(self, ruta=ARCHIVO_TRAZA):
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump({'registros': self.registros(), 'resumen': self.resumen()}, archivo, ensure_ascii=False, indent=2)
+        return ruta
+
+
+# Trazador por defecto del proceso
+TRAZADOR = Trazador()
+medir = TRAZADOR.medir
+trazar = TRAZADOR.trazar
+
+
+def panel_rendimiento(trazador=TRAZADOR):
+    """Panel '⏱️ Rendimiento' para Streamlit; solo aparece con ?rendimiento=1 en la URL"""
+    import streamlit as st
+    import pandas as pd
+
+    if st.query_params.get('rendimiento') != '1':
+        return
+    with st.sidebar.expander("⏱️ Rendimiento"):
+        registros = trazador.registros()
+        if not registros:
+            st.caption("Sin mediciones todavía")
+            return
+        st.dataframe(pd.DataFrame(trazador.resumen()).round(4), hide_index=True)
+        st.dataframe(pd.DataFrame(registros[-200:][::-1]), hide_index=True)
+        st.download_button(
+            "⬇️ Descargar traza (JSON)",
+            data=json.dumps({'registros': registros, 'resumen': trazador.resumen()}, ensure_ascii=False, indent=2),
+            file_name=ARCHIVO_TRAZA,
+            mime="application/json"
+        )
+        if st.button("🧹 Limpiar trazas"):
+            trazador.limpiar()
+            st.rerun()
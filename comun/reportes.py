@@ -0,0 +1,298 @@
+# comun/reportes.py
+# Motor de reportes de salida/: recorre una sola vez facturas_encabezado y
+# facturas_detalle (por bloques) acumulando un estado parcial combinable
+# (sumas, conteos y un heap con las facturas más altas). El estado se guarda
+# junto a los reportes, así que al agregar facturas nuevas solo se procesan
+# las filas posteriores a la última vista. Los importes se acumulan en
+# centavos enteros (comun/dinero.py), así los totales son exactos.
+#
+# Uso por línea de comandos:
+#   python -m comun.reportes --datos proyecto4/datos --salida proyecto4/salida
+#   python -m comun.reportes --datos proyecto1/datos --salida proyecto1/salida --completo
+
+import os
+import json
+import heapq
+import argparse
+
+import pandas as pd
+
+from comun.esquemas import FECHA, aplicar_esquema
+from comun.dinero import a_centavos, a_pesos, promedio
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+ARCHIVO_ESTADO = '.estado_reportes.json'
+TOP_FACTURAS = 20
+FILAS_BLOQUE = 500_000
+
+COLUMNAS_ESTADO = {
+    'ventas_mes': ['ventas_totales', 'cantidad_facturas'],
+    'ventas_cliente': ['total_comprado', 'cantidad_facturas'],
+    'ventas_sucursal': ['ventas_totales', 'cantidad_facturas'],
+    'productos': ['cantidad_vendida', 'facturacion'],
+}
+# Columnas del estado que guardan importes (en centavos)
+COLUMNAS_IMPORTE = ['ventas_totales', 'total_comprado', 'facturacion']
+UNIDAD_IMPORTES = 'centavos'
+
+
+def _vacio(nombre):
+    return pd.DataFrame(columns=COLUMNAS_ESTADO[nombre], dtype='int64')
+
+
+def _acumular(actual, nuevo):
+    """Suma dos acumulados indexados por clave (las claves nuevas se agregan)"""
+    if actual.empty:
+        return nuevo.astype('int64')
+    return actual.add(nuevo, fill_value=0).astype('int64')
+
+
+def _mes(fechas):
+    """'YYYY-MM' a partir de fechas en texto ISO o datetime"""
+    if pd.api.types.is_datetime64_any_dtype(fechas):
+        return fechas.dt.strftime('%Y-%m')
+    return fechas.astype(str).str.slice(0, 7)
+
+
+# ==============================
+# ESTADO PARCIAL COMBINABLE
+# ==============================
+class EstadoReportes:
+    """Acumulados de todos los reportes; dos estados se pueden combinar"""
+
+    def __init__(self, k_top=TOP_FACTURAS):
+        self.k_top = k_top
+        self.acumulados = {nombre: _vacio(nombre) for nombre in COLUMNAS_ESTADO}
+        # Heap de mínimos con las k facturas de mayor total: (centavos, id, fecha, cliente, sucursal)
+        self.top_facturas = []
+        self.ultima_factura = 0
+        self.ultimo_detalle = 0
+
+    def agregar_facturas(self, encabezado, desde=None):
+        """Suma las facturas con id_factura posterior a `desde` (por defecto, la última procesada).
+
+        Al recorrer un archivo por bloques hay que pasar la marca tomada antes
+        del recorrido: si no, en un archivo desordenado cada bloque se filtraría
+        contra la marca que ya movieron los anteriores. En ese caso la marca no
+        se avanza acá sino al terminar el archivo."""
+        tope = self.ultima_factura if desde is None else desde
+        nuevas = encabezado[encabezado['id_factura'] > tope]
+        if nuevas.empty:
+            return
+        meses = _mes(nuevas['fecha'])
+        totales = a_centavos(nuevas['total_venta'])
+        for nombre, claves in (('ventas_mes', meses),
+                               ('ventas_cliente', nuevas['id_cliente']),
+                               ('ventas_sucursal', nuevas['id_sucursal'])):
+            parcial = totales.groupby(claves).agg(['sum', 'count'])
+            parcial.columns = COLUMNAS_ESTADO[nombre]
+            self.acumulados[nombre] = _acumular(self.acumulados[nombre], parcial)
+
+        candidatas = nuevas.assign(total_venta=totales).nlargest(self.k_top, 'total_venta')
+        for fila in candidatas[['total_venta', 'id_factura', 'fecha', 'id_cliente', 'id_sucursal']].itertuples(index=False):
+            self._empujar_top((int(fila[0]), int(fila[1]), str(fila[2])[:10], int(fila[3]), int(fila[4])))
+        if desde is None:
+            self.ultima_factura = max(self.ultima_factura, int(nuevas['id_factura'].max()))
+
+    def agregar_detalle(self, detalle, desde=None):
+        """Suma las líneas con id_factura_detalle posterior a `desde` (ver agregar_facturas)"""
+        tope = self.ultimo_detalle if desde is None else desde
+        nuevas = detalle[detalle['id_factura_detalle'] > tope]
+        if nuevas.empty:
+            return
+        parcial = (nuevas.assign(subtotal_linea=a_centavos(nuevas['subtotal_linea']))
+                   .groupby('id_producto')[['cantidad', 'subtotal_linea']].sum())
+        parcial.columns = COLUMNAS_ESTADO['productos']
+        self.acumulados['productos'] = _acumular(self.acumulados['productos'], parcial)
+        if desde is None:
+            self.ultimo_detalle = max(self.ultimo_detalle, int(nuevas['id_factura_detalle'].max()))
+
+    def _empujar_top(self, factura):
+        if len(self.top_facturas) < self.k_top:
+            heapq.heappush(self.top_facturas, factura)
+        elif factura > self.top_facturas[0]:
+            heapq.heapreplace(self.top_facturas, factura)
+
+    def combinar(self, otro):
+        """Incorpora el estado de otro recorrido (ej. otro rango de facturas)"""
+        for nombre in COLUMNAS_ESTADO:
+            self.acumulados[nombre] = _acumular(self.acumulados[nombre], otro.acumulados[nombre])
+        for factura in otro.top_facturas:
+            self._empujar_top(factura)
+        self.ultima_factura = max(self.ultima_factura, otro.ultima_factura)
+        self.ultimo_detalle = max(self.ultimo_detalle, otro.ultimo_detalle)
+        return self
+
+    # ------------------------------
+    # Persistencia
+    # ------------------------------
+    def a_dict(self):
+        return {
+            'k_top': self.k_top,
+            'unidad_importes': UNIDAD_IMPORTES,
+            'ultima_factura': self.ultima_factura,
+            'ultimo_detalle': self.ultimo_detalle,
+            'top_facturas': [list(f) for f in self.top_facturas],
+            'acumulados': {
+                nombre: df.reset_index().values.tolist() for nombre, df in self.acumulados.items()
+            },
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        estado = cls(datos['k_top'])
+        estado.ultima_factura = datos['ultima_factura']
+        estado.ultimo_detalle = datos['ultimo_detalle']
+        # Estados guardados antes de los centavos: los importes estaban en pesos
+        en_pesos = datos.get('unidad_importes') != UNIDAD_IMPORTES
+        estado.top_facturas = [
+            (a_centavos(f[0]) if en_pesos else int(f[0]),) + tuple(f[1:]) for f in datos['top_facturas']
+        ]
+        heapq.heapify(estado.top_facturas)
+        for nombre, filas in datos['acumulados'].items():
+            if filas:
+                df = pd.DataFrame(filas, columns=['clave'] + COLUMNAS_ESTADO[nombre]).set_index('clave')
+                df.index.name = None
+                for col in df.columns:
+                    df[col] = a_centavos(df[col]) if en_pesos and col in COLUMNAS_IMPORTE else df[col].astype('int64')
+                estado.acumulados[nombre] = df
+        return estado
+
+
+# ==============================
+# ARMADO DE LOS REPORTES
+# ==============================
+def _con_promedio(df, columna_total, nombre_clave):
+    df = df.copy()
+    df['cantidad_facturas'] = df['cantidad_facturas'].astype('int64')
+    df['promedio_ventas'] = promedio(df[columna_total], df['cantidad_facturas'])
+    df[columna_total] = a_pesos(df[columna_total])
+    return df.rename_axis(nombre_clave).reset_index()
+
+
+def generar_reportes(estado, clientes):
+    """Arma todos los reportes a partir del estado y la tabla de clientes"""
+    clientes = clientes.copy()
+    clientes['nombre_completo'] = clientes['nombre'].astype(str) + ' ' + clientes['apellido'].astype(str)
+    info_clientes = clientes.set_index('id_cliente')[['nombre_completo', 'email', 'id_localidad']]
+    acumulados = estado.acumulados
+
+    ventas_por_mes = _con_promedio(acumulados['ventas_mes'].sort_index(), 'ventas_totales', 'mes')
+    ventas_por_sucursal = _con_promedio(acumulados['ventas_sucursal'].sort_index(), 'ventas_totales', 'id_sucursal')
+
+    por_cliente = acumulados['ventas_cliente'].copy()
+    por_cliente.index = por_cliente.index.astype('int64')
+    por_cliente['ticket_promedio'] = promedio(por_cliente['total_comprado'], por_cliente['cantidad_facturas'])
+    por_cliente['total_comprado'] = a_pesos(por_cliente['total_comprado'])
+    por_cliente['cantidad_facturas'] = por_cliente['cantidad_facturas'].astype('int64')
+    por_cliente = por_cliente.join(info_clientes, how='left').sort_values('total_comprado', ascending=False)
+    por_cliente = por_cliente.rename_axis('id_cliente').reset_index()
+    ventas_por_cliente = por_cliente[['id_cliente', 'total_comprado', 'nombre_completo', 'email', 'id_localidad']]
+    ticket_promedio = por_cliente[['id_cliente', 'total_comprado', 'nombre_completo', 'email',
+                                   'id_localidad', 'cantidad_facturas', 'ticket_promedio']]
+
+    top = pd.DataFrame(sorted(estado.top_facturas, reverse=True),
+                       columns=['total', 'id_factura', 'fecha', 'id_cliente', 'id_sucursal'])
+    top['total'] = a_pesos(top['total'])
+    top['nombre_completo'] = top['id_cliente'].map(info_clientes['nombre_completo'])
+    top_facturas = top[['id_factura', 'fecha', 'nombre_completo', 'total', 'id_sucursal']]
+
+    productos = acumulados['productos'].copy()
+    productos.index = productos.index.astype('int64')
+    productos = productos.rename_axis('id_producto').reset_index()
+    productos['cantidad_vendida'] = productos['cantidad_vendida'].astype('int64')
+    productos['facturacion'] = a_pesos(productos['facturacion'])
+    por_cantidad = productos.sort_values('cantidad_vendida', ascending=False)[['id_producto', 'cantidad_vendida']]
+    por_facturacion = productos.sort_values('facturacion', ascending=False)[['id_producto', 'facturacion']]
+
+    clientes_por_localidad = (clientes['id_localidad'].value_counts()
+                              .rename_axis('id_localidad').reset_index(name='cantidad_clientes'))
+
+    return {
+        'ventas_por_mes': ventas_por_mes,
+        'ventas_por_cliente': ventas_por_cliente,
+        'ticket_promedio_por_cliente': ticket_promedio,
+        'top_facturas': top_facturas,
+        'productos_mas_vendidos_cantidad': por_cantidad,
+        'productos_mas_vendidos_facturacion': por_facturacion,
+        'clientes_por_localidad': clientes_por_localidad,
+        'ventas_por_sucursal': ventas_por_sucursal,
+    }
+
+
+# ==============================
+# ACTUALIZACIÓN DE salida/
+# ==============================
+def _recorrer(ruta, tabla, filas_bloque):
+    # Fechas en texto: el estado guardado en JSON las conserva así
+    for bloque in pd.read_csv(ruta, chunksize=filas_bloque):
+        yield aplicar_esquema(bloque, tabla, omitir=(FECHA,))
+
+
+def cargar_estado(carpeta_salida):
+    ruta = os.path.join(carpeta_salida, ARCHIVO_ESTADO)
+    if not os.path.exists(ruta):
+        return EstadoReportes()
+    with open(ruta, encoding='utf-8') as f:
+        return EstadoReportes.desde_dict(json.load(f))
+
+
+def guardar_estado(estado, carpeta_salida):
+    with open(os.path.join(carpeta_salida, ARCHIVO_ESTADO), 'w', encoding='utf-8') as f:
+        json.dump(estado.a_dict(), f)
+
+
+def actualizar_reportes(carpeta_datos, carpeta_salida, completo=False, filas_bloque=FILAS_BLOQUE):
+    """Actualiza el estado con las filas nuevas y reescribe todos los reportes.
+
+    Solo se procesan facturas y líneas con id mayor al último visto; si se
+    corrigieron filas ya procesadas hay que usar completo=True.
+    """
+    os.makedirs(carpeta_salida, exist_ok=True)
+    estado = EstadoReportes() if completo else cargar_estado(carpeta_salida)
+    ultima_factura, ultimo_detalle = estado.ultima_factura, estado.ultimo_detalle
+
+    max_factura = max_detalle = 0
+    for bloque in _recorrer(os.path.join(carpeta_datos, 'facturas_encabezado.csv'), 'facturas_encabezado', filas_bloque):
+        estado.agregar_facturas(bloque, desde=ultima_factura)
+        max_factura = max(max_factura, int(bloque['id_factura'].max()))
+    for bloque in _recorrer(os.path.join(carpeta_datos, 'facturas_detalle.csv'), 'facturas_detalle', filas_bloque):
+        estado.agregar_detalle(bloque, desde=ultimo_detalle)
+        max_detalle = max(max_detalle, int(bloque['id_factura_detalle'].max()))
+    # Las marcas avanzan recién con los archivos completos (pueden venir desordenados)
+    estado.ultima_factura = max(ultima_factura, max_factura)
+    estado.ultimo_detalle = max(ultimo_detalle, max_detalle)
+
+    # Si los archivos tienen menos filas que las ya procesadas, fueron reemplazados
+    if not completo and (max_factura < ultima_factura or max_detalle < ultimo_detalle):
+        return actualizar_reportes(carpeta_datos, carpeta_salida, completo=True, filas_bloque=filas_bloque)
+
+    clientes = aplicar_esquema(pd.read_csv(os.path.join(carpeta_datos, 'clientes.csv')), 'clientes')
+    reportes = generar_reportes(estado, clientes)
+    for nombre, df in reportes.items():
+        df.to_csv(os.path.join(carpeta_salida, f"{nombre}.csv"), index=False)
+    guardar_estado(estado, carpeta_salida)
+    return reportes
+
+
+# ==============================
+# EJECUCIÓN
+# ==============================
+def main():
+    parser = argparse.ArgumentParser(description="Regenera los reportes de salida/ desde datos/")
+    parser.add_argument('--datos', default='datos', help="Carpeta con los CSV de origen")
+    parser.add_argument('--salida', default='salida', help="Carpeta donde se escriben los reportes")
+    parser.add_argument('--completo', action='store_true', help="Ignorar el estado guardado y recalcular todo")
+    args = parser.parse_args()
+
+    print("🔄 Actualizando reportes...")
+    reportes = actualizar_reportes(args.datos, args.salida, completo=args.completo)
+    for nombre, df in reportes.items():
+        print(f"   💾 {nombre}.csv ({len(df)} filas)")
+    print("✅ Reportes actualizados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# comun/secciones.py
+# Secciones perezosas para los dashboards de Streamlit. Cada sección se
+# registra con la función que la dibuja y sus argumentos, y solo se ejecuta
+# la que el usuario tiene abierta. (st.tabs y st.expander ejecutan el
+# contenido de todas las pestañas en cada rerun, por eso se usa un selector.)
+# Lo que calcula cada sección se cachea aparte (cache de figuras, cache_data).
+
+from collections import OrderedDict
+
+import streamlit as st
+
+
+class Secciones:
+    """Registro de secciones de una página; dibuja solo la elegida"""
+
+    def __init__(self, clave):
+        self.clave = clave
+        self._secciones = OrderedDict()
+
+    def registrar(self, titulo, funcion, *args, **kwargs):
+        """Agrega una sección; funcion(*args, **kwargs) se llama recién al abrirla"""
+        self._secciones[titulo] = (funcion, args, kwargs)
+        return self
+
+    def mostrar(self, etiqueta="Sección:"):
+        """Dibuja el selector y ejecuta la sección abierta; devuelve su título"""
+        if not self._secciones:
+            return None
+        titulo = st.radio(
+            etiqueta,
+            list(self._secciones),
+            horizontal=True,
+            key=f"secciones_{self.clave}"
+        )
+        funcion, args, kwargs = self._secciones[titulo]
+        funcion(*args, **kwargs)
+        return titulo
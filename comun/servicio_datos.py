@@ -0,0 +1,172 @@
+# comun/servicio_datos.py
+# Servicio de datos de solo lectura compartido por todas las sesiones. Cada CSV
+# se convierte una vez a un archivo Arrow (IPC sin compresión) que se abre con
+# memory-map: las columnas de los DataFrames apuntan directamente a esas
+# páginas, así que la memoria no crece con la cantidad de sesiones (y el
+# sistema operativo las comparte incluso entre procesos).
+# Sin copia quedan los números, las fechas y los códigos de las categorías
+# (vistas numpy de solo lectura) y el texto (pandas lo guarda sobre los buffers
+# de Arrow). Una columna con faltantes o en varios bloques no se puede ver así
+# y se copia en cada proceso; bytes_copiados() dice cuánto ocupan esas copias.
+# Al convertir se aplica el registro de tipos (comun/esquemas.py), así el
+# archivo ya guarda ids int32, categorías y fechas.
+# Las ediciones de cada sesión se guardan aparte en una VistaDatos.
+
+import os
+import threading
+from collections.abc import MutableMapping
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from comun.esquemas import INFORME, aplicar_esquema, firma, medir_bytes
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+CARPETA_ARROW = '.arrow'
+
+
+def _columna_pandas(columna):
+    """Columna Arrow -> (datos para pandas, True si quedan sobre el archivo mapeado)"""
+    tipo = columna.type
+    if columna.num_chunks == 1 and columna.null_count == 0:
+        bloque = columna.chunk(0)
+        # Vistas de solo lectura sobre el archivo mapeado
+        if pa.types.is_integer(tipo) or pa.types.is_floating(tipo) or (
+                pa.types.is_timestamp(tipo) and tipo.tz is None):
+            return bloque.to_numpy(zero_copy_only=True), True
+        if pa.types.is_dictionary(tipo):
+            # Solo se copian las categorías (pocas); los códigos son una vista
+            return pd.Categorical.from_codes(
+                bloque.indices.to_numpy(zero_copy_only=True), categories=bloque.dictionary.to_pandas(),
+                ordered=tipo.ordered, validate=False
+            ), True
+    # Texto: pandas lo guarda sobre los mismos buffers de Arrow
+    compartida = pa.types.is_string(tipo) or pa.types.is_large_string(tipo)
+    return columna.to_pandas(), compartida
+
+
+class ServicioDatos:
+    """Tablas de una carpeta de CSV servidas desde archivos Arrow mapeados en memoria"""
+
+    def __init__(self, carpeta_datos, carpeta_arrow=None):
+        self.carpeta_datos = carpeta_datos
+        self.carpeta_arrow = carpeta_arrow or os.path.join(carpeta_datos, '..', CARPETA_ARROW)
+        self._lock = threading.Lock()
+        self._tablas = {}
+        self._bytes_mapeados = {}
+        self._bytes_copiados = {}
+
+    def _ruta_arrow(self, nombre):
+        return os.path.join(self.carpeta_arrow, f"{nombre}.arrow")
+
+    def _convertir(self, nombre):
+        """Genera (o regenera si el CSV es más nuevo) el archivo Arrow de la tabla"""
+        ruta_csv = os.path.join(self.carpeta_datos, f"{nombre}.csv")
+        ruta_arrow = self._ruta_arrow(nombre)
+        if (os.path.exists(ruta_arrow) and os.path.getmtime(ruta_arrow) >= os.path.getmtime(ruta_csv)
+                and self._metadatos(ruta_arrow).get(b'esquema') == firma(nombre).encode()):
+            return ruta_arrow
+        os.makedirs(self.carpeta_arrow, exist_ok=True)
+        df = pd.read_csv(ruta_csv)
+        bytes_inferidos = medir_bytes(df)
+        tabla = pa.Table.from_pandas(aplicar_esquema(df, nombre), preserve_index=False).combine_chunks()
+        # Firma del esquema (si cambia, se regenera) y memoria con los tipos inferidos
+        tabla = tabla.replace_schema_metadata({
+            **(tabla.schema.metadata or {}),
+            b'esquema': firma(nombre).encode(),
+            b'bytes_inferidos': str(bytes_inferidos).encode(),
+        })
+        temporal = f"{ruta_arrow}.{os.getpid()}.tmp"
+        with pa.OSFile(temporal, 'wb') as archivo, ipc.new_file(archivo, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+        os.replace(temporal, ruta_arrow)
+        return ruta_arrow
+
+    def _metadatos(self, ruta_arrow):
+        try:
+            with pa.memory_map(ruta_arrow) as mapa:
+                return ipc.open_file(mapa).schema.metadata or {}
+        except (OSError, pa.ArrowInvalid):
+            return {}
+
+    def tabla(self, nombre):
+        """DataFrame de la tabla; todas las llamadas devuelven el mismo objeto"""
+        with self._lock:
+            if nombre not in self._tablas:
+                mapa = pa.memory_map(self._convertir(nombre))
+                tabla = ipc.open_file(mapa).read_all()
+                columnas = {col: _columna_pandas(tabla.column(col)) for col in tabla.column_names}
+                df = pd.DataFrame({col: valores for col, (valores, _) in columnas.items()}, copy=False)
+                copiadas = [col for col, (_, compartida) in columnas.items() if not compartida]
+                metadatos = tabla.schema.metadata or {}
+                bytes_actuales = medir_bytes(df)
+                INFORME.registrar(nombre, int(metadatos.get(b'bytes_inferidos', bytes_actuales)), bytes_actuales)
+                self._tablas[nombre] = df
+                self._bytes_mapeados[nombre] = mapa.size()
+                self._bytes_copiados[nombre] = medir_bytes(df[copiadas]) if copiadas else 0
+            return self._tablas[nombre]
+
+    def recargar(self, nombre):
+        """Vuelve a leer la tabla desde su CSV (si cambió, se regenera el Arrow)"""
+        with self._lock:
+            self._tablas.pop(nombre, None)
+            self._bytes_mapeados.pop(nombre, None)
+            self._bytes_copiados.pop(nombre, None)
+        return self.tabla(nombre)
+
+    def tablas(self, nombres):
+        return {nombre: self.tabla(nombre) for nombre in nombres}
+
+    def bytes_mapeados(self):
+        return sum(self._bytes_mapeados.values())
+
+    def bytes_copiados(self):
+        """Memoria de las columnas que no se pudieron dejar sobre el archivo mapeado"""
+        return sum(self._bytes_copiados.values())
+
+
+class VistaDatos(MutableMapping):
+    """Datos de una sesión: lee los compartidos y guarda aparte lo que se edita"""
+
+    def __init__(self, compartidos):
+        self.compartidos = compartidos
+        self.cambios = {}
+        self.bases = {}  # tabla -> versión compartida de la que partió la edición
+
+    def __getitem__(self, clave):
+        if clave in self.cambios:
+            return self.cambios[clave]
+        return self.compartidos[clave]
+
+    def __setitem__(self, clave, valor):
+        self.editar(clave, valor, self.base(clave))
+
+    def __delitem__(self, clave):
+        # Descarta la edición y vuelve a la versión compartida
+        del self.cambios[clave]
+        self.bases.pop(clave, None)
+
+    def editar(self, clave, valor, base):
+        """Guarda la edición; la base es la tabla compartida que se mostró para
+        editar (solo cuenta la de la primera edición)"""
+        self.bases.setdefault(clave, base)
+        self.cambios[clave] = valor
+
+    def base(self, clave):
+        """Versión compartida de la que parte la edición de la tabla"""
+        if clave in self.bases:
+            return self.bases[clave]
+        return self.compartidos.get(clave)
+
+    def __iter__(self):
+        yield from self.compartidos
+        yield from (clave for clave in self.cambios if clave not in self.compartidos)
+
+    def __len__(self):
+        return len(set(self.compartidos) | set(self.cambios))
+
+    def editadas(self):
+        return list(self.cambios)
@@ -0,0 +1,77 @@
+# comun/submuestreo.py
+# Reducción de series largas antes de graficarlas: con miles de puntos el
+# navegador no dibuja más detalle que el ancho del gráfico en píxeles, así
+# que se envía como mucho un presupuesto de puntos que conserve la forma.
+# - LTTB (Largest-Triangle-Three-Buckets): elige en cada tramo el punto que
+#   forma el triángulo de mayor área con sus vecinos.
+# - Mín/máx: conserva el mínimo y el máximo de cada tramo (no pierde picos).
+
+import numpy as np
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+PUNTOS_POR_PIXEL = 1
+METODOS = ['lttb', 'minmax']
+
+
+def presupuesto_puntos(ancho_px, puntos_por_pixel=PUNTOS_POR_PIXEL):
+    """Cantidad máxima de puntos que vale la pena enviar para un ancho dado"""
+    return max(int(ancho_px * puntos_por_pixel), 3)
+
+
+def _como_numeros(x):
+    """Eje x como float (las fechas pasan a nanosegundos)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype('int64').astype('float64')
+    return x.astype('float64')
+
+
+def indices_lttb(x, y, puntos):
+    """Índices elegidos por LTTB (incluye siempre el primero y el último)"""
+    n = len(y)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+    xf, yf = _como_numeros(x), np.asarray(y, dtype='float64')
+    # Bordes de los tramos intermedios: el primero y el último punto van fijos
+    bordes = np.floor(np.linspace(1, n - 1, puntos - 1)).astype('int64')
+    elegidos = np.empty(puntos, dtype='int64')
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], max(bordes[i + 1], bordes[i] + 1)
+        # Promedio del tramo siguiente (o el último punto si no hay más tramos)
+        if i + 2 < len(bordes):
+            sig_inicio, sig_fin = bordes[i + 1], max(bordes[i + 2], bordes[i + 1] + 1)
+            x_sig, y_sig = xf[sig_inicio:sig_fin].mean(), yf[sig_inicio:sig_fin].mean()
+        else:
+            x_sig, y_sig = xf[-1], yf[-1]
+        xa, ya = xf[anterior], yf[anterior]
+        areas = np.abs((xa - x_sig) * (yf[inicio:fin] - ya) - (xa - xf[inicio:fin]) * (y_sig - ya))
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def indices_minmax(y, puntos):
+    """Índices del mínimo y el máximo de cada tramo, en orden"""
+    n = len(y)
+    if puntos >= n or puntos < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype='float64')
+    bordes = np.linspace(0, n, puntos // 2 + 1).astype('int64')
+    elegidos = []
+    for inicio, fin in zip(bordes[:-1], bordes[1:]):
+        if fin > inicio:
+            tramo = y[inicio:fin]
+            elegidos.extend((inicio + int(np.argmin(tramo)), inicio + int(np.argmax(tramo))))
+    return np.unique(elegidos)
+
+
+def submuestrear(x, y, puntos, metodo='lttb'):
+    """Devuelve (x, y) con a lo sumo `puntos` puntos"""
+    if metodo not in METODOS:
+        raise ValueError(f"Método de submuestreo desconocido: {metodo}")
+    indices = indices_lttb(x, y, puntos) if metodo == 'lttb' else indices_minmax(y, puntos)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
@@ -0,0 +1,86 @@
+# comun/vigilante.py
+# Detección de cambios en la carpeta datos/ e invalidación selectiva: el
+# vigilante compara fecha de modificación y tamaño de cada CSV contra la
+# última revisión, y el grafo de dependencias dice qué tablas derivadas hay
+# que reconstruir cuando cambian ciertas tablas de origen.
+
+import os
+import threading
+import time
+
+
+class GrafoDependencias:
+    """Tablas derivadas y las tablas (de origen o derivadas) que usan"""
+
+    def __init__(self, dependencias):
+        self.dependencias = {derivada: list(fuentes) for derivada, fuentes in dependencias.items()}
+
+    def orden(self):
+        """Todas las derivadas, cada una después de las derivadas que usa"""
+        ordenadas, visitadas = [], set()
+
+        def visitar(tabla):
+            if tabla in visitadas or tabla not in self.dependencias:
+                return
+            visitadas.add(tabla)
+            for fuente in self.dependencias[tabla]:
+                visitar(fuente)
+            ordenadas.append(tabla)
+
+        for derivada in self.dependencias:
+            visitar(derivada)
+        return ordenadas
+
+    def afectadas(self, cambiadas):
+        """Derivadas a reconstruir (en orden) si cambian las tablas indicadas"""
+        sucias = set(cambiadas)
+        resultado = []
+        for derivada in self.orden():
+            if sucias.intersection(self.dependencias[derivada]):
+                sucias.add(derivada)
+                resultado.append(derivada)
+        return resultado
+
+
+class VigilanteArchivos:
+    """Revisa (por sondeo) qué archivos de una carpeta cambiaron"""
+
+    def __init__(self, carpeta, nombres, extension='.csv'):
+        self.carpeta = carpeta
+        self.nombres = list(nombres)
+        self.extension = extension
+        self.lock = threading.RLock()
+        self.version = 0
+        self.ultimas = []
+        self.ultima_revision = time.time()
+        self._firmas = {}
+        self._firmas = self._leer_firmas()
+
+    def _leer_firmas(self):
+        firmas = {}
+        for nombre in self.nombres:
+            try:
+                estado = os.stat(os.path.join(self.carpeta, f"{nombre}{self.extension}"))
+                firmas[nombre] = (estado.st_mtime_ns, estado.st_size)
+            except FileNotFoundError:
+                # Un archivo que falta (o se está reemplazando) no cuenta como cambio
+                firmas[nombre] = self._firmas.get(nombre)
+        return firmas
+
+    def revisar(self):
+        """Nombres de los archivos modificados desde la revisión anterior"""
+        with self.lock:
+            firmas = self._leer_firmas()
+            cambiadas = [n for n in self.nombres if firmas[n] != self._firmas.get(n) and firmas[n] is not None]
+            self._firmas = firmas
+            self.ultima_revision = time.time()
+            if cambiadas:
+                self.version += 1
+                self.ultimas = cambiadas
+            return cambiadas
+
+    def notificar(self, nombres):
+        """Registra un cambio hecho desde la aplicación (no desde los archivos)"""
+        with self.lock:
+            self.version += 1
+            self.ultimas = list(nombres)
@@ -0,0 +1,87 @@
+# proyecto1/carga_paralela.py
+# Lectura de varios CSV subidos en un pool de hilos: los tipos de cada columna
+# se infieren sobre una muestra y cada archivo informa su avance mientras se lee.
+
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from comun.rendimiento import trazar
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+FILAS_MUESTRA = 1000
+FILAS_BLOQUE = 200_000
+BYTES_LECTURA_DIRECTA = 4 * 1024**2
+
+# ==============================
+# INFERENCIA DE TIPOS
+# ==============================
+def inferir_tipos(contenido, filas_muestra=FILAS_MUESTRA):
+    """Infiere el dtype de cada columna leyendo solo las primeras filas"""
+    muestra = pd.read_csv(BytesIO(contenido), nrows=filas_muestra)
+    tipos = {}
+    for col, tipo in muestra.dtypes.items():
+        if pd.api.types.is_bool_dtype(tipo) or pd.api.types.is_numeric_dtype(tipo):
+            tipos[col] = tipo
+        else:
+            # Texto: fijarlo evita la inferencia por bloques y los tipos mezclados
+            tipos[col] = object
+    return tipos
+
+# ==============================
+# LECTURA DE UN ARCHIVO
+# ==============================
+def _leer_por_bloques(contenido, tipos, nombre, progreso, filas_bloque):
+    buffer = BytesIO(contenido)
+    partes = []
+    for bloque in pd.read_csv(buffer, dtype=tipos, chunksize=filas_bloque):
+        partes.append(bloque)
+        progreso[nombre] = buffer.tell() / max(len(contenido), 1)
+    if not partes:
+        return pd.read_csv(BytesIO(contenido), dtype=tipos)
+    return pd.concat(partes, ignore_index=True)
+
+@trazar('leer_csv')
+def leer_csv(nombre, contenido, progreso, filas_muestra=FILAS_MUESTRA, filas_bloque=FILAS_BLOQUE):
+    """Lee un CSV en memoria actualizando progreso[nombre] entre 0 y 1"""
+    progreso[nombre] = 0.0
+    if len(contenido) <= BYTES_LECTURA_DIRECTA:
+        df = pd.read_csv(BytesIO(contenido))
+    else:
+        try:
+            df = _leer_por_bloques(contenido, inferir_tipos(contenido, filas_muestra), nombre, progreso, filas_bloque)
+        except (ValueError, TypeError):
+            # La muestra no representaba al archivo (ej. enteros con faltantes más abajo)
+            progreso[nombre] = 0.0
+            df = pd.read_csv(BytesIO(contenido))
+    progreso[nombre] = 1.0
+    return df
+
+# ==============================
+# LECTURA EN PARALELO
+# ==============================
+def cargar_en_paralelo(archivos, max_workers=None, intervalo=0.1):
+    """Parsea [(nombre, bytes)] en paralelo y va emitiendo eventos.
+
+    Cada `intervalo` segundos emite ('progreso', {nombre: fraccion}) y, apenas
+    termina un archivo, ('listo', nombre, dataframe, error). Los eventos se
+    consumen desde el hilo del script, que es el único que puede tocar la UI.
+    """
+    progreso = {nombre: 0.0 for nombre, _ in archivos}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pendientes = {
+            executor.submit(leer_csv, nombre, contenido, progreso): nombre
+            for nombre, contenido in archivos
+        }
+        while pendientes:
+            terminados, _ = wait(pendientes, timeout=intervalo, return_when=FIRST_COMPLETED)
+            yield ('progreso', dict(progreso))
+            for futuro in terminados:
+                nombre = pendientes.pop(futuro)
+                try:
+                    yield ('listo', nombre, futuro.result(), None)
+                except Exception as e:
+                    yield ('listo', nombre, None, e)
@@ -1,66 +1,27 @@
 import streamlit as st
 import pandas as pd
 from io import StringIO
-import random
-from datetime import datetime, timedelta
+import os
+import sys
+import uuid
 
-st.set_page_config(page_title="Editor de CSV", page_icon="📊", layout="wide")
+# Permitir importar los módulos compartidos de comun/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# ==============================
-# FUNCIONES DE GENERACIÓN
-# ==============================
-def generar_nombres(n):
-    nombres = ["Juan", "María", "Carlos", "Ana", "Pedro", "Laura", "Diego", "Sofía", 
-               "Miguel", "Lucía", "Fernando", "Valentina", "Roberto", "Camila", "Jorge",
-               "Isabella", "Luis", "Martina", "Antonio", "Victoria"]
-    apellidos = ["García", "Rodríguez", "Martínez", "López", "González", "Pérez", 
-                 "Sánchez", "Ramírez", "Torres", "Flores", "Rivera", "Gómez", "Díaz",
-                 "Cruz", "Morales", "Reyes", "Jiménez", "Hernández", "Ruiz", "Vargas"]
-    return [f"{random.choice(nombres)} {random.choice(apellidos)}" for _ in range(n)]
-
-def generar_emails(n):
-    dominios = ["gmail.com", "hotmail.com", "yahoo.com", "outlook.com", "empresa.com"]
-    nombres = ["user", "contact", "info", "admin", "support", "juan", "maria", "carlos"]
-    return [f"{random.choice(nombres)}{random.randint(1, 999)}@{random.choice(dominios)}" for _ in range(n)]
-
-def generar_telefonos(n):
-    return [f"+54 9 11 {random.randint(1000, 9999)}-{random.randint(1000, 9999)}" for _ in range(n)]
-
-def generar_fechas(n, inicio="2020-01-01", fin="2024-12-31"):
-    start = datetime.strptime(inicio, "%Y-%m-%d")
-    end = datetime.strptime(fin, "%Y-%m-%d")
-    delta = end - start
-    return [(start + timedelta(days=random.randint(0, delta.days))).strftime("%Y-%m-%d") for _ in range(n)]
-
-def generar_numeros(n, minimo=1, maximo=100, decimales=False):
-    if decimales:
-        return [round(random.uniform(minimo, maximo), 2) for _ in range(n)]
-    return [random.randint(minimo, maximo) for _ in range(n)]
-
-def generar_ciudades(n):
-    ciudades = ["Buenos Aires", "Córdoba", "Rosario", "Mendoza", "La Plata", "San Miguel de Tucumán",
-                "Mar del Plata", "Salta", "Santa Fe", "San Juan", "Resistencia", "Neuquén",
-                "Posadas", "Bahía Blanca", "Paraná", "San Salvador de Jujuy"]
-    return [random.choice(ciudades) for _ in range(n)]
-
-def generar_productos(n):
-    productos = ["Laptop", "Mouse", "Teclado", "Monitor", "Auriculares", "Webcam", "Micrófono",
-                 "Tablet", "Smartphone", "Impresora", "Scanner", "Router", "Disco Duro", "USB",
-                 "Cable HDMI", "Adaptador", "Cargador", "Batería", "Mousepad", "Soporte"]
-    return [random.choice(productos) for _ in range(n)]
-
-def generar_booleanos(n):
-    return [random.choice([True, False]) for _ in range(n)]
-
-def generar_lorem(n):
-    palabras = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit",
-                "sed", "do", "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore",
-                "magna", "aliqua"]
-    return [" ".join(random.choices(palabras, k=random.randint(3, 8))).capitalize() + "." for _ in range(n)]
+# Generadores de datos sintéticos (vectorizados con numpy)
+from comun.generadores import MotorGenerador, TIPOS_COLUMNA
+from comun.generador_esquema import esquema_ventas, generar_tablas
+from comun.rendimiento import medir, trazar, panel_rendimiento
+from comun.esquemas import ESQUEMAS, CATEGORIA, FECHA, aplicar_esquema, medir_bytes
+from carga_paralela import cargar_en_paralelo
+from memoria import GobernadorMemoria, MB
+
+st.set_page_config(page_title="Editor de CSV", page_icon="📊", layout="wide")
 
 # ==============================
 # FUNCIONES DE ANÁLISIS DE DATOS
 # ==============================
+@trazar()
 def analizar_datos(df):
     """Analiza el dataframe y devuelve estadísticas"""
     analysis = {}
@@ -95,6 +56,117 @@ def analizar_datos(df):
     
     return analysis
 
+def fechas_como_texto(df):
+    """Copia con las fechas como texto (YYYY-MM-DD, con hora si la tienen), igual que en el CSV"""
+    columnas = {}
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            fechas = df[col].dropna()
+            sin_hora = (fechas.dt.normalize() == fechas).all()
+            columnas[col] = df[col].dt.strftime('%Y-%m-%d' if sin_hora else '%Y-%m-%d %H:%M:%S')
+    return df.assign(**columnas) if columnas else df
+
+# ==============================
+# MEMORIA DE LOS DATAFRAMES
+# ==============================
+@st.cache_resource
+def obtener_gobernador():
+    """Gobernador de memoria único para todas las sesiones del servidor"""
+    return GobernadorMemoria()
+
+def aplicar_tipos(nombre, df):
+    """Tipos del registro de esquemas si el archivo es una de las tablas de ventas
+    (clientes.csv, sintetico_clientes.csv...); devuelve (df, % de memoria ahorrada)"""
+    tabla = os.path.splitext(nombre)[0].removeprefix('sintetico_')
+    if tabla not in ESQUEMAS or df.empty:
+        return df, 0.0
+    antes = medir_bytes(df)
+    # Sin category (el editor solo admitiría los valores existentes) ni fechas
+    # (las descargas CSV/JSON conservan el texto original)
+    df = aplicar_esquema(df, tabla, omitir=(CATEGORIA, FECHA))
+    return df, 100 * (1 - medir_bytes(df) / antes)
+
+def guardar_dataframe(nombre, df, editado=True):
+    """Guarda el DataFrame en el gobernador y marca su estado en la sesión"""
+    obtener_gobernador().guardar(st.session_state.id_sesion, nombre, df)
+    st.session_state.all_dataframes[nombre] = {'edited': editado}
+
+def obtener_dataframe(nombre):
+    """Devuelve el DataFrame (si estaba bajado a disco se recarga solo)"""
+    return obtener_gobernador().obtener(st.session_state.id_sesion, nombre)
+
+def eliminar_dataframe(nombre):
+    obtener_gobernador().eliminar(st.session_state.id_sesion, nombre)
+    del st.session_state.all_dataframes[nombre]
+
+def mostrar_uso_memoria():
+    """Uso de memoria de la sesión y del servidor en la barra lateral"""
+    gobernador = obtener_gobernador()
+    uso_sesion = gobernador.uso(st.session_state.id_sesion)
+    uso_global = gobernador.uso()
+    st.sidebar.subheader("🧠 Memoria")
+    st.sidebar.metric(
+        "Esta sesión (MB)",
+        f"{uso_sesion['bytes_memoria'] / MB:,.1f} / {gobernador.limite_sesion / MB:,.0f}"
+    )
+    st.sidebar.metric(
+        "Servidor (MB)",
+        f"{uso_global['bytes_memoria'] / MB:,.1f} / {gobernador.limite_global / MB:,.0f}"
+    )
+    if uso_sesion['en_disco']:
+        st.sidebar.caption(
+            f"💾 {uso_sesion['en_disco']} archivo(s) en disco "
+            f"({uso_sesion['bytes_disco'] / MB:,.1f} MB); se recargan al seleccionarlos"
+        )
+
+# ==============================
+# GENERACIÓN DE DATOS SINTÉTICOS
+# ==============================
+def registrar_dataframe(nombre, df):
+    """Agrega un DataFrame (subido o generado) a la lista de archivos de la sesión;
+    devuelve el % de memoria ahorrada por el esquema de tipos"""
+    df, ahorro = aplicar_tipos(nombre, df)
+    guardar_dataframe(nombre, df, editado=False)
+    return ahorro
+
+def mostrar_generador_sintetico():
+    """Formulario para generar tablas sintéticas sin subir archivos"""
+    with st.expander("🧪 Generar datos sintéticos"):
+        modo = st.radio("Tipo de generación:", ["Tabla simple", "Esquema de ventas completo"], horizontal=True)
+        semilla = st.number_input("Semilla (0 = aleatoria)", min_value=0, value=42, step=1)
+        semilla = int(semilla) or None
+
+        if modo == "Tabla simple":
+            col1, col2 = st.columns(2)
+            with col1:
+                n_filas = st.number_input("Cantidad de filas", min_value=1, value=1000, step=1000)
+            with col2:
+                tipos = st.multiselect("Columnas a generar", [tipo for tipo in TIPOS_COLUMNA if tipo != 'catalogo'], default=['nombres', 'emails', 'fechas'])
+
+            if st.button("⚙️ Generar Tabla", disabled=not tipos):
+                with medir('generar_tabla_simple') as medicion:
+                    df = MotorGenerador(semilla).dataframe(int(n_filas), {tipo: tipo for tipo in tipos})
+                    medicion.filas_salida = len(df)
+                registrar_dataframe("sintetico_tabla.csv", df)
+                st.success(f"✅ Tabla generada: {len(df)} filas, {len(df.columns)} columnas")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                n_clientes = st.number_input("Clientes", min_value=1, value=1000, step=100)
+            with col2:
+                n_productos = st.number_input("Productos", min_value=1, value=200, step=50)
+            with col3:
+                n_facturas = st.number_input("Facturas", min_value=1, value=10000, step=1000)
+
+            if st.button("⚙️ Generar Esquema de Ventas"):
+                esquema = esquema_ventas(clientes=int(n_clientes), productos=int(n_productos), facturas=int(n_facturas))
+                with st.spinner("🔄 Generando tablas relacionadas..."), medir('generar_esquema_ventas') as medicion:
+                    tablas = generar_tablas(esquema, semilla=semilla)
+                    medicion.filas_salida = sum(len(df) for df in tablas.values())
+                for nombre_tabla, df in tablas.items():
+                    registrar_dataframe(f"sintetico_{nombre_tabla}.csv", df)
+                st.success(f"✅ {len(tablas)} tablas generadas ({sum(len(df) for df in tablas.values()):,} filas en total)")
+
 # ==============================
 # INTERFAZ PRINCIPAL
 # ==============================
@@ -102,8 +174,14 @@ st.title("📊 Editor de Archivos CSV")
 st.markdown("Sube uno o múltiples archivos CSV, edítalos y descárgalos en CSV o JSON.")
 
 # Inicializar session_state para múltiples archivos
+if 'id_sesion' not in st.session_state:
+    st.session_state.id_sesion = uuid.uuid4().hex
+    obtener_gobernador().limpiar_sesiones_inactivas()
 if 'all_dataframes' not in st.session_state:
     st.session_state.all_dataframes = {}
+# Descartar archivos que el gobernador ya olvidó (sesión inactiva por horas)
+for nombre in [n for n in st.session_state.all_dataframes if not obtener_gobernador().contiene(st.session_state.id_sesion, n)]:
+    del st.session_state.all_dataframes[nombre]
 if 'current_file' not in st.session_state:
     st.session_state.current_file = None
 if 'editing_mode' not in st.session_state:
@@ -118,19 +196,32 @@ uploaded_files = st.file_uploader(
     accept_multiple_files=True
 )
 
-# Procesar archivos subidos
-if uploaded_files:
-    for uploaded_file in uploaded_files:
-        if uploaded_file.name not in st.session_state.all_dataframes:
-            try:
-                df = pd.read_csv(uploaded_file)
-                st.session_state.all_dataframes[uploaded_file.name] = {
-                    'dataframe': df,
-                    'edited': False
-                }
-                st.success(f"✅ Archivo cargado: {uploaded_file.name} ({len(df)} filas, {len(df.columns)} columnas)")
-            except Exception as e:
-                st.error(f"❌ Error al procesar {uploaded_file.name}: {str(e)}")
+mostrar_generador_sintetico()
+
+# Procesar archivos subidos (o generados)
+if uploaded_files or st.session_state.all_dataframes:
+    nuevos_archivos = [
+        (uploaded_file.name, uploaded_file.getvalue())
+        for uploaded_file in uploaded_files or []
+        if uploaded_file.name not in st.session_state.all_dataframes
+    ]
+    if nuevos_archivos:
+        barras = {nombre: st.progress(0.0, text=f"⏳ {nombre}") for nombre, _ in nuevos_archivos}
+        for evento in cargar_en_paralelo(nuevos_archivos):
+            if evento[0] == 'progreso':
+                for nombre, fraccion in evento[1].items():
+                    if nombre in barras:
+                        barras[nombre].progress(fraccion, text=f"⏳ {nombre} ({fraccion:.0%})")
+                continue
+
+            _, nombre, df, error = evento
+            barras.pop(nombre).empty()
+            if error is None:
+                ahorro = registrar_dataframe(nombre, df)
+                tipos = f" · 💾 {ahorro:.0f}% menos memoria con el esquema de tipos" if ahorro > 0 else ""
+                st.success(f"✅ Archivo cargado: {nombre} ({len(df)} filas, {len(df.columns)} columnas){tipos}")
+            else:
+                st.error(f"❌ Error al procesar {nombre}: {str(error)}")
     
     # Selector de archivo actual
     if st.session_state.all_dataframes:
@@ -146,8 +237,7 @@ if uploaded_files:
         st.session_state.current_file = selected_file
         
         # Obtener el dataframe actual
-        current_data = st.session_state.all_dataframes[selected_file]
-        df = current_data['dataframe']
+        df = obtener_dataframe(selected_file)
         
         # ANÁLISIS DE DATOS
         st.subheader("📈 Análisis de Datos")
@@ -197,8 +287,7 @@ if uploaded_files:
             if st.button("➕ Agregar Fila", use_container_width=True):
                 new_row = {col: "" for col in df.columns}
                 new_df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                st.session_state.all_dataframes[selected_file]['dataframe'] = new_df
-                st.session_state.all_dataframes[selected_file]['edited'] = True
+                guardar_dataframe(selected_file, new_df)
                 st.session_state.editing_mode = True
                 st.session_state.delete_mode = False
                 st.rerun()
@@ -212,12 +301,11 @@ if uploaded_files:
         with col4:
             if st.button("🔄 Reiniciar Archivo", use_container_width=True):
                 # Recargar el archivo original
-                for uploaded_file in uploaded_files:
+                for uploaded_file in uploaded_files or []:
                     if uploaded_file.name == selected_file:
                         try:
                             df_original = pd.read_csv(uploaded_file)
-                            st.session_state.all_dataframes[selected_file]['dataframe'] = df_original
-                            st.session_state.all_dataframes[selected_file]['edited'] = False
+                            registrar_dataframe(selected_file, df_original)
                             st.session_state.editing_mode = False
                             st.session_state.delete_mode = False
                             st.success(f"✅ Archivo {selected_file} reiniciado al estado original")
@@ -250,8 +338,7 @@ if uploaded_files:
                     if st.button("✅ Confirmar Eliminación", type="primary", use_container_width=True):
                         # Eliminar filas seleccionadas
                         new_df = df.loc[~edited_with_selection['Seleccionar']].reset_index(drop=True)
-                        st.session_state.all_dataframes[selected_file]['dataframe'] = new_df
-                        st.session_state.all_dataframes[selected_file]['edited'] = True
+                        guardar_dataframe(selected_file, new_df)
                         st.session_state.delete_mode = False
                         st.success(f"✅ {selected_count} fila(s) eliminada(s) exitosamente!")
                         st.rerun()
@@ -272,8 +359,7 @@ if uploaded_files:
             )
             # Actualizar el dataframe si hay cambios
             if not edited_df.equals(df):
-                st.session_state.all_dataframes[selected_file]['dataframe'] = edited_df
-                st.session_state.all_dataframes[selected_file]['edited'] = True
+                guardar_dataframe(selected_file, edited_df)
 
         # VISUALIZACIÓN NORMAL (sin edición)
         else:
@@ -281,7 +367,7 @@ if uploaded_files:
             st.dataframe(df, use_container_width=True)
 
         # DATOS ACTUALES PARA DESCARGA
-        current_df = st.session_state.all_dataframes[selected_file]['dataframe']
+        current_df = obtener_dataframe(selected_file)
         is_edited = st.session_state.all_dataframes[selected_file]['edited']
 
         st.subheader("Descargar archivo:")
@@ -300,7 +386,7 @@ if uploaded_files:
             )
 
         with col_json:
-            json_data = current_df.to_json(orient="records", indent=4, force_ascii=False)
+            json_data = fechas_como_texto(current_df).to_json(orient="records", indent=4, force_ascii=False)
             st.download_button(
                 label="⬇️ Descargar JSON",
                 data=json_data,
@@ -323,7 +409,7 @@ if uploaded_files:
         # Botón para eliminar archivo actual
         st.markdown("---")
         if st.button("🗑️ Eliminar este archivo de la lista", type="secondary"):
-            del st.session_state.all_dataframes[selected_file]
+            eliminar_dataframe(selected_file)
             if st.session_state.all_dataframes:
                 st.session_state.current_file = list(st.session_state.all_dataframes.keys())[0]
             else:
@@ -331,7 +417,10 @@ if uploaded_files:
             st.rerun()
 
 else:
-    st.info("👆 Sube uno o múltiples archivos CSV para comenzar")
+    st.info("👆 Sube uno o múltiples archivos CSV (o genera datos sintéticos) para comenzar")
+
+mostrar_uso_memoria()
+panel_rendimiento()
 
 # Sección de ayuda
 with st.expander("ℹ️ Ayuda"):
@@ -344,6 +433,7 @@ with st.expander("ℹ️ Ayuda"):
     4. **➕ Agregar Fila**: Añade una nueva fila vacía al final de la tabla
     5. **🗑️ Eliminar Filas Seleccionadas**: Activa el modo eliminación para seleccionar y eliminar filas específicas
     6. **🔄 Reiniciar Archivo**: Vuelve al estado original del archivo seleccionado
+    7. **🧪 Generar datos sintéticos**: Crea una tabla simple o las 11 tablas del esquema de ventas con claves consistentes
     
     **Formatos de descarga:**
     - **CSV**: Formato estándar de valores separados por comas
@@ -355,4 +445,5 @@ with st.expander("ℹ️ Ayuda"):
     - Descarga en múltiples formatos
     - Gestiona múltiples archivos simultáneamente
     - Análisis automático de datos
+    - Los archivos menos usados se guardan en disco si se supera el límite de memoria y se recargan al seleccionarlos
     """)
\ No newline at end of file
@@ -0,0 +1,154 @@
+# proyecto1/memoria.py
+# Gobernador de memoria para los DataFrames de todas las sesiones: controla un
+# presupuesto por sesión y otro global, y cuando se exceden baja a disco
+# (Parquet) los DataFrames usados hace más tiempo. Se recargan al pedirlos.
+
+import os
+import time
+import shutil
+import weakref
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# ==============================
+# CONFIGURACIÓN
+# ==============================
+MB = 1024**2
+LIMITE_SESION_MB = int(os.environ.get('LIMITE_MEMORIA_SESION_MB', 512))
+LIMITE_GLOBAL_MB = int(os.environ.get('LIMITE_MEMORIA_GLOBAL_MB', 2048))
+HORAS_SESION_INACTIVA = 6
+
+
+def medir_bytes(df):
+    """Memoria real del DataFrame, incluyendo el contenido de los textos"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _borrar_carpeta(carpeta):
+    if os.path.isdir(carpeta):
+        shutil.rmtree(carpeta)
+
+
+class GobernadorMemoria:
+    """Registro compartido por todas las sesiones del proceso"""
+
+    def __init__(self, limite_sesion=LIMITE_SESION_MB * MB, limite_global=LIMITE_GLOBAL_MB * MB, carpeta=None):
+        self.limite_sesion = limite_sesion
+        self.limite_global = limite_global
+        if carpeta is None:
+            carpeta = tempfile.mkdtemp(prefix='dashboard1_spill_')
+            # La carpeta temporal propia se borra al liberar el gobernador o al salir
+            weakref.finalize(self, _borrar_carpeta, carpeta)
+        self.carpeta = carpeta
+        self._lock = threading.RLock()
+        # (sesion, nombre) -> entrada; el orden refleja el uso (LRU al principio)
+        self._entradas = OrderedDict()
+        # sesion -> última vez que usó el gobernador
+        self._actividad = {}
+
+    # ------------------------------
+    # API pública
+    # ------------------------------
+    def guardar(self, sesion, nombre, df):
+        """Registra (o reemplaza) un DataFrame de la sesión"""
+        with self._lock:
+            self._actividad[sesion] = time.time()
+            self._borrar_archivo(self._entradas.get((sesion, nombre)))
+            self._entradas[(sesion, nombre)] = {
+                'dataframe': df,
+                'bytes': medir_bytes(df),
+                'ruta': None,
+            }
+            self._entradas.move_to_end((sesion, nombre))
+            self._aplicar_limites(sesion, protegida=(sesion, nombre))
+
+    def obtener(self, sesion, nombre):
+        """Devuelve el DataFrame, recargándolo de disco si había sido bajado"""
+        with self._lock:
+            self._actividad[sesion] = time.time()
+            entrada = self._entradas[(sesion, nombre)]
+            if entrada['dataframe'] is None:
+                entrada['dataframe'] = self._leer(entrada['ruta'])
+            self._entradas.move_to_end((sesion, nombre))
+            self._aplicar_limites(sesion, protegida=(sesion, nombre))
+            return entrada['dataframe']
+
+    def contiene(self, sesion, nombre):
+        with self._lock:
+            self._actividad[sesion] = time.time()
+            return (sesion, nombre) in self._entradas
+
+    def eliminar(self, sesion, nombre):
+        with self._lock:
+            self._borrar_archivo(self._entradas.pop((sesion, nombre), None))
+
+    def uso(self, sesion=None):
+        """Resumen de memoria: bytes en RAM, bytes en disco y cantidad de DataFrames"""
+        with self._lock:
+            entradas = [e for (s, _), e in self._entradas.items() if sesion is None or s == sesion]
+            en_memoria = [e for e in entradas if e['dataframe'] is not None]
+            return {
+                'bytes_memoria': sum(e['bytes'] for e in en_memoria),
+                'bytes_disco': sum(e['bytes'] for e in entradas if e['dataframe'] is None),
+                'en_memoria': len(en_memoria),
+                'en_disco': len(entradas) - len(en_memoria),
+            }
+
+    def limpiar_sesiones_inactivas(self, horas=HORAS_SESION_INACTIVA):
+        """Olvida todos los DataFrames de las sesiones cerradas (sin actividad hace
+        horas); de una sesión activa no se pierde nada aunque no toque un archivo"""
+        limite = time.time() - horas * 3600
+        with self._lock:
+            inactivas = {s for s, ultima in self._actividad.items() if ultima < limite}
+            for clave in [c for c in self._entradas if c[0] in inactivas]:
+                self._borrar_archivo(self._entradas.pop(clave))
+            for sesion in inactivas:
+                del self._actividad[sesion]
+
+    # ------------------------------
+    # Bajada a disco
+    # ------------------------------
+    def _bytes_en_memoria(self, sesion=None):
+        return sum(
+            e['bytes'] for (s, _), e in self._entradas.items()
+            if e['dataframe'] is not None and (sesion is None or s == sesion)
+        )
+
+    def _aplicar_limites(self, sesion, protegida):
+        """Baja a disco los DataFrames menos usados hasta respetar ambos límites"""
+        for ambito, limite in ((sesion, self.limite_sesion), (None, self.limite_global)):
+            exceso = self._bytes_en_memoria(ambito) - limite
+            for clave, entrada in list(self._entradas.items()):
+                if exceso <= 0:
+                    break
+                if clave == protegida or entrada['dataframe'] is None:
+                    continue
+                if ambito is not None and clave[0] != ambito:
+                    continue
+                self._bajar_a_disco(clave, entrada)
+                exceso -= entrada['bytes']
+
+    def _bajar_a_disco(self, clave, entrada):
+        if entrada['ruta'] is None:
+            base = os.path.join(self.carpeta, f"{abs(hash(clave))}_{time.time_ns()}")
+            try:
+                entrada['ruta'] = base + '.parquet'
+                entrada['dataframe'].to_parquet(entrada['ruta'], index=False)
+            except Exception:
+                # Columnas con tipos mezclados (ej. tras editar) no entran en Parquet
+                self._borrar_archivo(entrada)
+                entrada['ruta'] = base + '.pkl'
+                entrada['dataframe'].to_pickle(entrada['ruta'])
+        entrada['dataframe'] = None
+
+    def _leer(self, ruta):
+        if ruta.endswith('.parquet'):
+            return pd.read_parquet(ruta)
+        return pd.read_pickle(ruta)
+
+    def _borrar_archivo(self, entrada):
+        if entrada and entrada['ruta'] and os.path.exists(entrada['ruta']):
+            os.remove(entrada['ruta'])
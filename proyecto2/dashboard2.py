@@ -1,16 +1,21 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.tree import DecisionTreeClassifier, plot_tree
-from sklearn.metrics import confusion_matrix, classification_report
-import joblib
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Permitir importar los módulos compartidos de comun/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.secciones import Secciones
+from comun.rendimiento import medir, trazar, panel_rendimiento
+from comun.esquemas import INFORME as INFORME_MEMORIA, aplicar_esquema
+
+# plotly, matplotlib, seaborn, sklearn y joblib se importan dentro de la página
+# que los usa: abrir el dashboard o cambiar de página no paga la importación de
+# las librerías que esa página no necesita (sklearn arrastra scipy, ~1 s en frío).
+
 # Configuración de la página
 st.set_page_config(
     page_title="Dashboard Completo de Recompra",
@@ -60,9 +65,10 @@ st.markdown('<h1 class="main-header">📊 Dashboard Completo de Análisis de Rec
 
 # Cargar datos
 @st.cache_data
+@trazar('carga_dataset')
 def load_data():
     try:
-        df = pd.read_csv('dataset_procesado.csv')
+        df = aplicar_esquema(pd.read_csv('dataset_procesado.csv'), 'dataset_procesado', informe=INFORME_MEMORIA)
         # Convertir variables categóricas para visualización
         df['Genero'] = df['Genero'].map({0: 'Femenino', 1: 'Masculino'})
         df['Recibio_Promo'] = df['Recibio_Promo'].map({0: 'No', 1: 'Si'})
@@ -90,7 +96,11 @@ df = load_data()
 
 # Cargar modelo entrenado
 @st.cache_resource
+@trazar('carga_modelo')
 def load_model():
+    import joblib
+    from sklearn.tree import DecisionTreeClassifier
+
     try:
         modelo = joblib.load('modelo_arbol_recompra.pkl')
         return modelo
@@ -109,7 +119,19 @@ def load_model():
         modelo.fit(X, y)
         return modelo
 
-modelo_arbol = load_model()
+# Imágenes generadas por proyecto2.py (se leen una sola vez)
+@st.cache_data
+def leer_imagen(archivo):
+    with open(archivo, 'rb') as f:
+        return f.read()
+
+def mostrar_imagen_guardada(titulo, archivo, descripcion):
+    st.markdown(f"### {titulo}")
+    try:
+        st.image(leer_imagen(archivo), caption=descripcion, use_container_width=True)
+    except Exception:
+        st.warning(f"No se pudo cargar '{archivo}'")
+        st.info("Ejecuta primero proyecto2.py para generar todos los gráficos")
 
 # Sidebar simplificado - SIN FILTROS GLOBALES
 st.sidebar.title("⚙️ Navegación")
@@ -123,13 +145,17 @@ with st.sidebar.expander("📋 Información del Dataset"):
     st.write("**Columnas:**")
     for col in df.columns:
         st.write(f"- {col}")
+    st.caption(INFORME_MEMORIA.texto())
 
 # Footer del sidebar
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Dashboard Completo** | Proyecto 2 - Análisis de Recompra")
+panel_rendimiento()
 
 # Página 1: Análisis General
 if pagina == "📈 Análisis General":
+    import plotly.express as px
+
     st.markdown('<h2 class="section-header">📈 Métricas Clave y Análisis General</h2>', unsafe_allow_html=True)
     
     # Métricas principales
@@ -170,91 +196,103 @@ if pagina == "📈 Análisis General":
     
     with col1:
         # Gráfico de efecto de promoción en recompra
-        fig = px.histogram(
-            df, 
-            x='Recibio_Promo', 
-            color='Recompra',
-            barmode='group',
-            title='Efecto de la Promoción en la Recompra',
-            color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
-        )
-        fig.update_layout(
-            xaxis_title='¿Recibió Promoción?',
-            yaxis_title='Cantidad de Clientes',
-            showlegend=True
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with medir('grafico_efecto_promocion', len(df)):
+            fig = px.histogram(
+                df, 
+                x='Recibio_Promo', 
+                color='Recompra',
+                barmode='group',
+                title='Efecto de la Promoción en la Recompra',
+                color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
+            )
+            fig.update_layout(
+                xaxis_title='¿Recibió Promoción?',
+                yaxis_title='Cantidad de Clientes',
+                showlegend=True
+            )
+            st.plotly_chart(fig, use_container_width=True)
         
         # Boxplot de Monto de Promoción vs Recompra
-        fig = px.box(
-            df,
-            x='Recompra',
-            y='Monto_Promo',
-            title='Distribución del Monto de Promoción por Recompra',
-            color='Recompra',
-            color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
-        )
-        fig.update_layout(
-            xaxis_title='¿Recompró?',
-            yaxis_title='Monto de Promoción ($)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with medir('grafico_monto_promocion', len(df)):
+            fig = px.box(
+                df,
+                x='Recompra',
+                y='Monto_Promo',
+                title='Distribución del Monto de Promoción por Recompra',
+                color='Recompra',
+                color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
+            )
+            fig.update_layout(
+                xaxis_title='¿Recompró?',
+                yaxis_title='Monto de Promoción ($)'
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Gráfico de recompra por género
-        recompra_genero = pd.crosstab(df['Genero'], df['Recompra'], normalize='index') * 100
-        fig = px.bar(
-            recompra_genero.reset_index(),
-            x='Genero',
-            y=['Si', 'No'],
-            title='Tasa de Recompra por Género (%)',
-            color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
-        )
-        fig.update_layout(
-            xaxis_title='Género',
-            yaxis_title='Porcentaje (%)',
-            barmode='stack'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with medir('grafico_recompra_genero', len(df)):
+            recompra_genero = pd.crosstab(df['Genero'], df['Recompra'], normalize='index') * 100
+            fig = px.bar(
+                recompra_genero.reset_index(),
+                x='Genero',
+                y=['Si', 'No'],
+                title='Tasa de Recompra por Género (%)',
+                color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
+            )
+            fig.update_layout(
+                xaxis_title='Género',
+                yaxis_title='Porcentaje (%)',
+                barmode='stack'
+            )
+            st.plotly_chart(fig, use_container_width=True)
         
         # Boxplot de Ingreso Mensual vs Recompra
-        fig = px.box(
-            df,
-            x='Recompra',
-            y='Ingreso_Mensual',
-            title='Distribución del Ingreso Mensual por Recompra',
-            color='Recompra',
-            color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
-        )
-        fig.update_layout(
-            xaxis_title='¿Recompró?',
-            yaxis_title='Ingreso Mensual ($)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with medir('grafico_ingreso_mensual', len(df)):
+            fig = px.box(
+                df,
+                x='Recompra',
+                y='Ingreso_Mensual',
+                title='Distribución del Ingreso Mensual por Recompra',
+                color='Recompra',
+                color_discrete_map={'Si': '#2E86AB', 'No': '#A23B72'}
+            )
+            fig.update_layout(
+                xaxis_title='¿Recompró?',
+                yaxis_title='Ingreso Mensual ($)'
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     # Matriz de correlación
     st.markdown('<h2 class="section-header">🔗 Matriz de Correlación</h2>', unsafe_allow_html=True)
     
     # Preparar datos para correlación
-    df_corr = df.copy()
-    df_corr['Genero'] = df_corr['Genero'].map({'Femenino': 0, 'Masculino': 1})
-    df_corr['Recibio_Promo'] = df_corr['Recibio_Promo'].map({'No': 0, 'Si': 1})
-    df_corr['Recompra'] = df_corr['Recompra'].map({'No': 0, 'Si': 1})
+    with medir('grafico_correlacion', len(df)):
+        df_corr = df.copy()
+        df_corr['Genero'] = df_corr['Genero'].map({'Femenino': 0, 'Masculino': 1})
+        df_corr['Recibio_Promo'] = df_corr['Recibio_Promo'].map({'No': 0, 'Si': 1})
+        df_corr['Recompra'] = df_corr['Recompra'].map({'No': 0, 'Si': 1})
     
-    correlation_matrix = df_corr.corr()
+        correlation_matrix = df_corr.corr()
     
-    fig = px.imshow(
-        correlation_matrix,
-        text_auto=True,
-        aspect="auto",
-        color_continuous_scale='RdBu_r',
-        title='Matriz de Correlación entre Variables'
-    )
-    fig.update_layout(width=800, height=600)
-    st.plotly_chart(fig, use_container_width=True)
+        fig = px.imshow(
+            correlation_matrix,
+            text_auto=True,
+            aspect="auto",
+            color_continuous_scale='RdBu_r',
+            title='Matriz de Correlación entre Variables'
+        )
+        fig.update_layout(width=800, height=600)
+        st.plotly_chart(fig, use_container_width=True)
 
 # Página 2: Árbol de Decisión
 elif pagina == "🌳 Árbol de Decisión":
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.tree import plot_tree
+    from sklearn.metrics import confusion_matrix
+
+    modelo_arbol = load_model()
+
     st.markdown('<h2 class="section-header">🌳 Árbol de Decisión - Visualización Completa</h2>', unsafe_allow_html=True)
     
     col1, col2 = st.columns([2, 1])
@@ -263,27 +301,28 @@ elif pagina == "🌳 Árbol de Decisión":
         st.markdown("### Visualización del Árbol de Decisión")
         
         # Crear visualización del árbol
-        fig, ax = plt.subplots(figsize=(20, 12))
-        
-        # Preparar datos para el árbol
-        df_encoded_vis = df.copy()
-        df_encoded_vis['Genero'] = df_encoded_vis['Genero'].map({'Femenino': 0, 'Masculino': 1})
-        df_encoded_vis['Recibio_Promo'] = df_encoded_vis['Recibio_Promo'].map({'No': 0, 'Si': 1})
-        df_encoded_vis['Recompra'] = df_encoded_vis['Recompra'].map({'No': 0, 'Si': 1})
-        
-        X_vis = df_encoded_vis.drop(['Cliente_ID', 'Recompra'], axis=1)
-        feature_names = X_vis.columns.tolist()
-        
-        plot_tree(modelo_arbol, 
-                  feature_names=feature_names,
-                  class_names=['No Recompra', 'Recompra'],
-                  filled=True,
-                  rounded=True,
-                  fontsize=10,
-                  ax=ax)
-        
-        ax.set_title('Árbol de Decisión - Predicción de Recompra', fontsize=14, fontweight='bold')
-        st.pyplot(fig)
+        with medir('grafico_arbol'):
+            fig, ax = plt.subplots(figsize=(20, 12))
+        
+            # Preparar datos para el árbol
+            df_encoded_vis = df.copy()
+            df_encoded_vis['Genero'] = df_encoded_vis['Genero'].map({'Femenino': 0, 'Masculino': 1})
+            df_encoded_vis['Recibio_Promo'] = df_encoded_vis['Recibio_Promo'].map({'No': 0, 'Si': 1})
+            df_encoded_vis['Recompra'] = df_encoded_vis['Recompra'].map({'No': 0, 'Si': 1})
+        
+            X_vis = df_encoded_vis.drop(['Cliente_ID', 'Recompra'], axis=1)
+            feature_names = X_vis.columns.tolist()
+        
+            plot_tree(modelo_arbol, 
+                      feature_names=feature_names,
+                      class_names=['No Recompra', 'Recompra'],
+                      filled=True,
+                      rounded=True,
+                      fontsize=10,
+                      ax=ax)
+        
+            ax.set_title('Árbol de Decisión - Predicción de Recompra', fontsize=14, fontweight='bold')
+            st.pyplot(fig)
     
     with col2:
         st.markdown("### Información del Árbol")
@@ -305,7 +344,9 @@ elif pagina == "🌳 Árbol de Decisión":
         X_eval = df_encoded_eval.drop(['Cliente_ID', 'Recompra'], axis=1)
         y_eval = df_encoded_eval['Recompra']
         
-        y_pred = modelo_arbol.predict(X_eval)
+        with medir('predict modelo_arbol', len(X_eval)) as medicion:
+            y_pred = modelo_arbol.predict(X_eval)
+            medicion.filas_salida = len(y_pred)
         accuracy = (y_pred == y_eval).mean() * 100
         st.metric("Precisión General", f"{accuracy:.1f}%")
     
@@ -319,20 +360,21 @@ elif pagina == "🌳 Árbol de Decisión":
         features = feature_names
         
         # Crear gráfico de importancia
-        fig_imp, ax_imp = plt.subplots(figsize=(10, 6))
-        y_pos = np.arange(len(features))
-        bars = ax_imp.barh(y_pos, importancias, color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD'])
-        ax_imp.set_yticks(y_pos)
-        ax_imp.set_yticklabels(features)
-        ax_imp.set_xlabel('Importancia')
-        ax_imp.set_title('Importancia de Variables en el Árbol de Decisión')
-        
-        # Añadir valores en las barras
-        for bar, imp in zip(bars, importancias):
-            ax_imp.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2, 
-                       f'{imp:.3f}', ha='left', va='center')
-        
-        st.pyplot(fig_imp)
+        with medir('grafico_importancia'):
+            fig_imp, ax_imp = plt.subplots(figsize=(10, 6))
+            y_pos = np.arange(len(features))
+            bars = ax_imp.barh(y_pos, importancias, color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD'])
+            ax_imp.set_yticks(y_pos)
+            ax_imp.set_yticklabels(features)
+            ax_imp.set_xlabel('Importancia')
+            ax_imp.set_title('Importancia de Variables en el Árbol de Decisión')
+        
+            # Añadir valores en las barras
+            for bar, imp in zip(bars, importancias):
+                ax_imp.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2, 
+                           f'{imp:.3f}', ha='left', va='center')
+        
+            st.pyplot(fig_imp)
     
     with col2:
         st.markdown("### Valores de Importancia Detallados")
@@ -391,18 +433,21 @@ elif pagina == "🌳 Árbol de Decisión":
         X_eval = df_encoded_eval.drop(['Cliente_ID', 'Recompra'], axis=1)
         y_eval = df_encoded_eval['Recompra']
         
-        y_pred = modelo_arbol.predict(X_eval)
+        with medir('predict modelo_arbol', len(X_eval)) as medicion:
+            y_pred = modelo_arbol.predict(X_eval)
+            medicion.filas_salida = len(y_pred)
         
         cm = confusion_matrix(y_eval, y_pred)
         
-        fig_cm, ax_cm = plt.subplots(figsize=(6, 4))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                    xticklabels=['No Recompra', 'Recompra'],
-                    yticklabels=['No Recompra', 'Recompra'])
-        ax_cm.set_xlabel('Predicción')
-        ax_cm.set_ylabel('Real')
-        ax_cm.set_title('Matriz de Confusión')
-        st.pyplot(fig_cm)
+        with medir('grafico_matriz_confusion'):
+            fig_cm, ax_cm = plt.subplots(figsize=(6, 4))
+            sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
+                        xticklabels=['No Recompra', 'Recompra'],
+                        yticklabels=['No Recompra', 'Recompra'])
+            ax_cm.set_xlabel('Predicción')
+            ax_cm.set_ylabel('Real')
+            ax_cm.set_title('Matriz de Confusión')
+            st.pyplot(fig_cm)
         
         # Métricas de performance
         accuracy = (y_pred == y_eval).mean() * 100
@@ -419,46 +464,19 @@ elif pagina == "🌳 Árbol de Decisión":
 elif pagina == "📊 Gráficos Completos":
     st.markdown('<h2 class="section-header">📊 Todos los Gráficos del Análisis</h2>', unsafe_allow_html=True)
     
-    # Cargar y mostrar imágenes de gráficos guardados
-    try:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("### Análisis de Recompra")
-            try:
-                st.image('analisis_recompra_real.png', caption='Análisis Completo de Recompra', use_container_width=True)
-            except:
-                st.warning("No se pudo cargar 'analisis_recompra_real.png'")
-            
-            st.markdown("### Efecto de Promoción")
-            try:
-                st.image('promocion_recompra_real.png', caption='Efecto de la Promoción en Recompra', use_container_width=True)
-            except:
-                st.warning("No se pudo cargar 'promocion_recompra_real.png'")
-        
-        with col2:
-            st.markdown("### Matriz de Correlación")
-            try:
-                st.image('matriz_correlacion.png', caption='Matriz de Correlación entre Variables', use_container_width=True)
-            except:
-                st.warning("No se pudo cargar 'matriz_correlacion.png'")
-            
-            st.markdown("### Importancia de Variables")
-            try:
-                st.image('importancia_variables_real.png', caption='Importancia de Variables en la Predicción', use_container_width=True)
-            except:
-                st.warning("No se pudo cargar 'importancia_variables_real.png'")
-        
-        # Mostrar árbol de decisión (SOLO EL COMPLETO)
-        st.markdown("### Árbol de Decisión")
-        try:
-            st.image('arbol_decision_grande.png', caption='Árbol de Decisión', use_container_width=True)
-        except:
-            st.warning("No se pudo cargar 'arbol_decision_grande.png'")
-            
-    except Exception as e:
-        st.warning(f"No se pudieron cargar algunos gráficos: {e}")
-        st.info("Ejecuta primero proyecto2.py para generar todos los gráficos")
+    # Cada gráfico guardado es una sección: solo se envía la imagen abierta
+    graficos = [
+        ("📈 Análisis de Recompra", 'analisis_recompra_real.png', 'Análisis Completo de Recompra'),
+        ("🎁 Efecto de Promoción", 'promocion_recompra_real.png', 'Efecto de la Promoción en Recompra'),
+        ("🔗 Matriz de Correlación", 'matriz_correlacion.png', 'Matriz de Correlación entre Variables'),
+        ("⭐ Importancia de Variables", 'importancia_variables_real.png', 'Importancia de Variables en la Predicción'),
+        ("🌳 Árbol de Decisión", 'arbol_decision_grande.png', 'Árbol de Decisión'),
+    ]
+    
+    secciones = Secciones('graficos_completos')
+    for titulo, archivo, descripcion in graficos:
+        secciones.registrar(titulo, mostrar_imagen_guardada, titulo, archivo, descripcion)
+    secciones.mostrar("Gráfico:")
 
 # Mensaje final en main
 st.markdown("---")
@@ -2,372 +2,422 @@
 # Proyecto 2 - Análisis Predictivo de Recompra
 # Autor: Josué Gabriel Mena
 # Descripción: Análisis de recompra usando dataset real de promociones
+#
+# Cada paso es una etapa del pipeline (comun/etapas.py): carga → codificación →
+# entrenamiento → evaluación → gráficos → exportación. Los resultados quedan en
+# .cache_etapas/ y en cada corrida solo se rehace lo que cambió.
+#   python proyecto2.py                         # corre lo que haga falta
+#   python proyecto2.py --only grafico_arboles  # solo esa etapa
+#   python proyecto2.py --from entrenamiento    # reentrena y rehace lo que depende
+#   python proyecto2.py --lista                 # etapas y estado del cache
 # =============================================
 
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier, plot_tree, export_text
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-from sklearn import tree
-import graphviz
+import joblib
 import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Permitir importar los módulos compartidos de comun/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.rendimiento import TRAZADOR, medir
+from comun.etapas import Pipeline
+from comun import esquemas
+from comun.esquemas import INFORME as INFORME_MEMORIA, aplicar_esquema
+
 # ---------------------------------------------
 # 1. CONFIGURACIÓN INICIAL
 # ---------------------------------------------
-print("=" * 60)
-print("PROYECTO 2 - ANÁLISIS PREDICTIVO DE RECOMPRA")
-print("=" * 60)
+ARCHIVO_EXCEL = "Mini_Proyecto_Clientes_Promociones.xlsx"
+
+# Mejorar nombres de variables para visualización
+NOMBRES_MEJORADOS = {
+    'Genero': 'Género',
+    'Edad': 'Edad',
+    'Recibio_Promo': 'Recibió Promoción',
+    'Monto_Promo': 'Monto Promoción ($)',
+    'Total_Compras': 'Total Compras',
+    'Ingreso_Mensual': 'Ingreso Mensual ($)'
+}
 
 # Configurar estilo de gráficos
 plt.style.use('default')
 sns.set_palette("husl")
 
+pipeline = Pipeline('proyecto2')
+
+
+def buscar_archivo_excel():
+    """El Excel del proyecto o, si no está, el primero del directorio"""
+    if os.path.exists(ARCHIVO_EXCEL):
+        return ARCHIVO_EXCEL
+    archivos_excel = sorted(f for f in os.listdir('.') if f.endswith(('.xlsx', '.xls')))
+    return archivos_excel[0] if archivos_excel else ARCHIVO_EXCEL
+
+
+def tasas_recompra(df):
+    """Tasa general, con promoción y sin promoción (en %)"""
+    tasa_recompra = (df['Recompra'] == 'Si').mean() * 100
+    recompra_con_promo = (df[df['Recibio_Promo'] == 'Si']['Recompra'] == 'Si').mean() * 100
+    recompra_sin_promo = (df[df['Recibio_Promo'] == 'No']['Recompra'] == 'Si').mean() * 100
+    return tasa_recompra, recompra_con_promo, recompra_sin_promo
+
+
+def nueva_figura(figsize):
+    """Figura fuera de pyplot con canvas Agg (plot_tree necesita un renderer)"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def guardar_figura(fig, archivo):
+    """Guarda la figura (sin plt.show(): la corrida no se bloquea)"""
+    fig.tight_layout()
+    fig.savefig(archivo, dpi=300, bbox_inches='tight')
+    return [archivo]
+
 # ---------------------------------------------
 # 2. CARGA Y VERIFICACIÓN DE DATOS
 # ---------------------------------------------
-print("\n📥 CARGANDO DATOS DESDE EXCEL...")
-
-# Buscar el archivo Excel
-archivo_excel = "Mini_Proyecto_Clientes_Promociones.xlsx"
-
-if not os.path.exists(archivo_excel):
-    print(f"❌ ERROR: No se encuentra el archivo '{archivo_excel}'")
-    print("📂 Buscando archivos Excel en el directorio actual...")
-    
-    archivos_excel = [f for f in os.listdir('.') if f.endswith(('.xlsx', '.xls'))]
-    if archivos_excel:
-        print("✅ Archivos Excel encontrados:")
-        for archivo in archivos_excel:
-            print(f"   - {archivo}")
-        archivo_excel = archivos_excel[0]
-        print(f"📁 Usando archivo: {archivo_excel}")
-    else:
+@pipeline.etapa(archivos=lambda: [buscar_archivo_excel(), esquemas.__file__])
+def carga_excel():
+    print("\n📥 CARGANDO DATOS DESDE EXCEL...")
+
+    archivo_excel = buscar_archivo_excel()
+    if not os.path.exists(archivo_excel):
+        print(f"❌ ERROR: No se encuentra el archivo '{ARCHIVO_EXCEL}'")
         print("❌ No se encontraron archivos Excel en el directorio")
-        exit()
+        raise FileNotFoundError(archivo_excel)
+    if archivo_excel != ARCHIVO_EXCEL:
+        print(f"❌ ERROR: No se encuentra el archivo '{ARCHIVO_EXCEL}'")
+        print(f"📁 Usando archivo: {archivo_excel}")
 
-try:
-    # Cargar el dataset real
-    df = pd.read_excel(archivo_excel)
+    # Cargar el dataset real con los tipos del registro de esquemas
+    df = aplicar_esquema(pd.read_excel(archivo_excel), 'clientes_promociones', informe=INFORME_MEMORIA)
     print(f"✅ DATASET CARGADO EXITOSAMENTE")
     print(f"📊 Dimensiones: {df.shape[0]} filas, {df.shape[1]} columnas")
-    
-except Exception as e:
-    print(f"❌ ERROR al cargar el archivo: {e}")
-    exit()
+    print(INFORME_MEMORIA.texto())
+    return df
 
 # ---------------------------------------------
 # 3. EXPLORACIÓN INICIAL DE DATOS
+# 4. ANÁLISIS ESTADÍSTICO INICIAL
 # ---------------------------------------------
-print("\n🔍 EXPLORACIÓN INICIAL DE DATOS...")
-
-print("\n📋 PRIMERAS 5 FILAS:")
-print(df.head())
-
-print("\n📝 INFORMACIÓN GENERAL:")
-print(df.info())
-
-print("\n📊 ESTADÍSTICAS DESCRIPTIVAS:")
-print(df.describe())
+@pipeline.etapa(usa=['carga_excel'], cache=False)
+def exploracion(carga_excel):
+    df = carga_excel
+    print("\n🔍 EXPLORACIÓN INICIAL DE DATOS...")
 
-print("\n🔢 DISTRIBUCIÓN DE VARIABLES CATEGÓRICAS:")
-print("Género:")
-print(df['Genero'].value_counts())
-print("\nRecibió Promoción:")
-print(df['Recibio_Promo'].value_counts())
-print("\nRecompra:")
-print(df['Recompra'].value_counts())
+    print("\n📋 PRIMERAS 5 FILAS:")
+    print(df.head())
 
-print("\n🔍 VALORES NULOS:")
-print(df.isnull().sum())
+    print("\n📝 INFORMACIÓN GENERAL:")
+    print(df.info())
 
-# ---------------------------------------------
-# 4. ANÁLISIS ESTADÍSTICO INICIAL
-# ---------------------------------------------
-print("\n📈 ANÁLISIS ESTADÍSTICO INICIAL...")
+    print("\n📊 ESTADÍSTICAS DESCRIPTIVAS:")
+    print(df.describe())
 
-# Tasa de recompra general
-tasa_recompra = (df['Recompra'] == 'Si').mean() * 100
-print(f"📊 Tasa general de recompra: {tasa_recompra:.1f}%")
+    print("\n🔢 DISTRIBUCIÓN DE VARIABLES CATEGÓRICAS:")
+    print("Género:")
+    print(df['Genero'].value_counts())
+    print("\nRecibió Promoción:")
+    print(df['Recibio_Promo'].value_counts())
+    print("\nRecompra:")
+    print(df['Recompra'].value_counts())
 
-# Tasa de recompra por promoción
-recompra_con_promo = (df[df['Recibio_Promo'] == 'Si']['Recompra'] == 'Si').mean() * 100
-recompra_sin_promo = (df[df['Recibio_Promo'] == 'No']['Recompra'] == 'Si').mean() * 100
+    print("\n🔍 VALORES NULOS:")
+    print(df.isnull().sum())
 
-print(f"📊 Recompra CON promoción: {recompra_con_promo:.1f}%")
-print(f"📊 Recompra SIN promoción: {recompra_sin_promo:.1f}%")
-print(f"📈 Diferencia: {recompra_con_promo - recompra_sin_promo:.1f} puntos porcentuales")
+    print("\n📈 ANÁLISIS ESTADÍSTICO INICIAL...")
+    tasa_recompra, recompra_con_promo, recompra_sin_promo = tasas_recompra(df)
+    print(f"📊 Tasa general de recompra: {tasa_recompra:.1f}%")
+    print(f"📊 Recompra CON promoción: {recompra_con_promo:.1f}%")
+    print(f"📊 Recompra SIN promoción: {recompra_sin_promo:.1f}%")
+    print(f"📈 Diferencia: {recompra_con_promo - recompra_sin_promo:.1f} puntos porcentuales")
 
 # ---------------------------------------------
 # 5. TRANSFORMACIÓN Y CODIFICACIÓN
 # ---------------------------------------------
-print("\n🔄 TRANSFORMANDO VARIABLES CATEGÓRICAS...")
+@pipeline.etapa(usa=['carga_excel'])
+def codificacion(carga_excel):
+    print("\n🔄 TRANSFORMANDO VARIABLES CATEGÓRICAS...")
 
-# Hacer copia para no modificar el original
-df_encoded = df.copy()
+    # Hacer copia para no modificar el original
+    df_encoded = carga_excel.copy()
 
-# Codificar variables categóricas a numéricas
-df_encoded['Genero'] = df_encoded['Genero'].map({'F': 0, 'M': 1})
-df_encoded['Recibio_Promo'] = df_encoded['Recibio_Promo'].map({'Si': 1, 'No': 0})
-df_encoded['Recompra'] = df_encoded['Recompra'].map({'Si': 1, 'No': 0})
+    # Codificar variables categóricas a numéricas
+    df_encoded['Genero'] = df_encoded['Genero'].map({'F': 0, 'M': 1})
+    df_encoded['Recibio_Promo'] = df_encoded['Recibio_Promo'].map({'Si': 1, 'No': 0})
+    df_encoded['Recompra'] = df_encoded['Recompra'].map({'Si': 1, 'No': 0})
+    df_encoded = aplicar_esquema(df_encoded, 'dataset_procesado')
 
-print("✅ Variables codificadas correctamente")
-print(df_encoded[['Genero', 'Recibio_Promo', 'Recompra']].head())
+    print("✅ Variables codificadas correctamente")
+    print(df_encoded[['Genero', 'Recibio_Promo', 'Recompra']].head())
+    return df_encoded
 
 # ---------------------------------------------
 # 6. VISUALIZACIÓN DE RELACIONES CLAVE
 # ---------------------------------------------
-print("\n📊 CREANDO VISUALIZACIONES...")
-
-# Crear figura con múltiples subplots
-fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-fig.suptitle('ANÁLISIS DE RECOMPRA - DATASET REAL', fontsize=16, fontweight='bold')
-
-# Gráfico 1: Recompra vs Monto de Promoción
-sns.boxplot(data=df, x='Recompra', y='Monto_Promo', ax=axes[0,0])
-axes[0,0].set_title('Recompra vs Monto de Promoción')
-axes[0,0].set_xlabel('¿Recompró?')
-axes[0,0].set_ylabel('Monto de Promoción ($)')
-
-# Gráfico 2: Recompra vs Ingreso Mensual
-sns.boxplot(data=df, x='Recompra', y='Ingreso_Mensual', ax=axes[0,1])
-axes[0,1].set_title('Recompra vs Ingreso Mensual')
-axes[0,1].set_xlabel('¿Recompró?')
-axes[0,1].set_ylabel('Ingreso Mensual ($)')
-
-# Gráfico 3: Distribución por Género y Recompra
-pd.crosstab(df['Genero'], df['Recompra']).plot(kind='bar', ax=axes[1,0])
-axes[1,0].set_title('Recompra por Género')
-axes[1,0].set_xlabel('Género')
-axes[1,0].set_ylabel('Cantidad de Clientes')
-axes[1,0].legend(title='Recompra')
-
-# Gráfico 4: Total de Compras vs Recompra
-sns.boxplot(data=df, x='Recompra', y='Total_Compras', ax=axes[1,1])
-axes[1,1].set_title('Recompra vs Total de Compras')
-axes[1,1].set_xlabel('¿Recompró?')
-axes[1,1].set_ylabel('Total de Compras')
-
-plt.tight_layout()
-plt.savefig('analisis_recompra_real.png', dpi=300, bbox_inches='tight')
-plt.show()
+@pipeline.etapa(usa=['carga_excel'], codigo=[nueva_figura, guardar_figura], genera_archivos=True)
+def grafico_analisis_recompra(carga_excel):
+    df = carga_excel
+    print("\n📊 CREANDO VISUALIZACIONES...")
+
+    # Crear figura con múltiples subplots
+    fig = nueva_figura((15, 12))
+    axes = fig.subplots(2, 2)
+    fig.suptitle('ANÁLISIS DE RECOMPRA - DATASET REAL', fontsize=16, fontweight='bold')
+
+    # Gráfico 1: Recompra vs Monto de Promoción
+    sns.boxplot(data=df, x='Recompra', y='Monto_Promo', ax=axes[0,0])
+    axes[0,0].set_title('Recompra vs Monto de Promoción')
+    axes[0,0].set_xlabel('¿Recompró?')
+    axes[0,0].set_ylabel('Monto de Promoción ($)')
+
+    # Gráfico 2: Recompra vs Ingreso Mensual
+    sns.boxplot(data=df, x='Recompra', y='Ingreso_Mensual', ax=axes[0,1])
+    axes[0,1].set_title('Recompra vs Ingreso Mensual')
+    axes[0,1].set_xlabel('¿Recompró?')
+    axes[0,1].set_ylabel('Ingreso Mensual ($)')
+
+    # Gráfico 3: Distribución por Género y Recompra
+    pd.crosstab(df['Genero'], df['Recompra']).plot(kind='bar', ax=axes[1,0])
+    axes[1,0].set_title('Recompra por Género')
+    axes[1,0].set_xlabel('Género')
+    axes[1,0].set_ylabel('Cantidad de Clientes')
+    axes[1,0].legend(title='Recompra')
+
+    # Gráfico 4: Total de Compras vs Recompra
+    sns.boxplot(data=df, x='Recompra', y='Total_Compras', ax=axes[1,1])
+    axes[1,1].set_title('Recompra vs Total de Compras')
+    axes[1,1].set_xlabel('¿Recompró?')
+    axes[1,1].set_ylabel('Total de Compras')
+
+    return guardar_figura(fig, 'analisis_recompra_real.png')
 
 # Gráfico adicional: Efecto de la Promoción
-plt.figure(figsize=(10, 6))
-sns.countplot(data=df, x='Recibio_Promo', hue='Recompra')
-plt.title('EFECTO DE LA PROMOCIÓN EN LA RECOMPRA - DATASET REAL')
-plt.xlabel('¿Recibió Promoción?')
-plt.ylabel('Cantidad de Clientes')
-plt.legend(title='¿Recompró?')
-plt.savefig('promocion_recompra_real.png', dpi=300, bbox_inches='tight')
-plt.show()
+@pipeline.etapa(usa=['carga_excel'], codigo=[nueva_figura, guardar_figura], genera_archivos=True)
+def grafico_promocion_recompra(carga_excel):
+    fig = nueva_figura((10, 6))
+    ax = fig.subplots()
+    sns.countplot(data=carga_excel, x='Recibio_Promo', hue='Recompra', ax=ax)
+    ax.set_title('EFECTO DE LA PROMOCIÓN EN LA RECOMPRA - DATASET REAL')
+    ax.set_xlabel('¿Recibió Promoción?')
+    ax.set_ylabel('Cantidad de Clientes')
+    ax.legend(title='¿Recompró?')
+    return guardar_figura(fig, 'promocion_recompra_real.png')
 
 # ---------------------------------------------
 # 7. ANÁLISIS DE CORRELACIONES
 # ---------------------------------------------
-print("\n📈 ANALIZANDO CORRELACIONES...")
+@pipeline.etapa(usa=['codificacion'], codigo=[nueva_figura, guardar_figura], genera_archivos=True)
+def correlaciones(codificacion):
+    print("\n📈 ANALIZANDO CORRELACIONES...")
 
-# Matriz de correlación
-correlation_matrix = df_encoded.corr()
+    # Matriz de correlación
+    correlation_matrix = codificacion.corr()
 
-plt.figure(figsize=(10, 8))
-sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0,
-            square=True, linewidths=0.5)
-plt.title('MATRIZ DE CORRELACIÓN - VARIABLES DEL DATASET')
-plt.tight_layout()
-plt.savefig('matriz_correlacion.png', dpi=300, bbox_inches='tight')
-plt.show()
+    fig = nueva_figura((10, 8))
+    ax = fig.subplots()
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0,
+                square=True, linewidths=0.5, ax=ax)
+    ax.set_title('MATRIZ DE CORRELACIÓN - VARIABLES DEL DATASET')
 
-print("📊 Matriz de correlación con variable objetivo 'Recompra':")
-print(correlation_matrix['Recompra'].sort_values(ascending=False))
+    print("📊 Matriz de correlación con variable objetivo 'Recompra':")
+    print(correlation_matrix['Recompra'].sort_values(ascending=False))
+    return guardar_figura(fig, 'matriz_correlacion.png')
 
 # ---------------------------------------------
 # 8. MODELADO PREDICTIVO - CLASIFICACIÓN CON ÁRBOL DE DECISIÓN
 # ---------------------------------------------
-print("\n🤖 ENTRENANDO MODELO PREDICTIVO (ÁRBOL DE DECISIÓN)...")
-
-# Preparar datos para el modelo
-X = df_encoded.drop(['Cliente_ID', 'Recompra'], axis=1)
-y = df_encoded['Recompra']
-
-print("🔧 Variables utilizadas en el modelo:")
-for i, col in enumerate(X.columns):
-    print(f"   {i+1}. {col}")
-
-# Dividir en conjunto de entrenamiento y prueba
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-print(f"\n📊 División de datos:")
-print(f"   Entrenamiento: {X_train.shape[0]} muestras")
-print(f"   Prueba: {X_test.shape[0]} muestras")
-
-# Entrenar modelo de Árbol de Decisión con diferentes configuraciones
-modelos_arbol = {
-    'Arbol Simple (profundidad=3)': DecisionTreeClassifier(random_state=42, max_depth=3),
-    'Arbol Completo': DecisionTreeClassifier(random_state=42),
-    'Arbol Optimizado': DecisionTreeClassifier(random_state=42, max_depth=4, min_samples_split=5)
-}
+@pipeline.etapa(usa=['codificacion'])
+def entrenamiento(codificacion):
+    print("\n🤖 ENTRENANDO MODELO PREDICTIVO (ÁRBOL DE DECISIÓN)...")
+
+    # Preparar datos para el modelo
+    X = codificacion.drop(['Cliente_ID', 'Recompra'], axis=1)
+    y = codificacion['Recompra']
+
+    print("🔧 Variables utilizadas en el modelo:")
+    for i, col in enumerate(X.columns):
+        print(f"   {i+1}. {col}")
+
+    # Dividir en conjunto de entrenamiento y prueba
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
 
-resultados_modelos = {}
-
-for nombre, modelo in modelos_arbol.items():
-    print(f"\n🌳 ENTRENANDO: {nombre}")
-    modelo.fit(X_train, y_train)
-    y_pred = modelo.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    resultados_modelos[nombre] = {
-        'modelo': modelo,
-        'accuracy': accuracy,
-        'predicciones': y_pred
+    print(f"\n📊 División de datos:")
+    print(f"   Entrenamiento: {X_train.shape[0]} muestras")
+    print(f"   Prueba: {X_test.shape[0]} muestras")
+
+    # Entrenar modelo de Árbol de Decisión con diferentes configuraciones
+    modelos_arbol = {
+        'Arbol Simple (profundidad=3)': DecisionTreeClassifier(random_state=42, max_depth=3),
+        'Arbol Completo': DecisionTreeClassifier(random_state=42),
+        'Arbol Optimizado': DecisionTreeClassifier(random_state=42, max_depth=4, min_samples_split=5)
     }
-    print(f"   ✅ Precisión: {accuracy:.1%}")
 
-# Seleccionar el mejor modelo
-mejor_modelo_nombre = max(resultados_modelos, key=lambda x: resultados_modelos[x]['accuracy'])
-mejor_modelo = resultados_modelos[mejor_modelo_nombre]['modelo']
-print(f"\n🏆 MEJOR MODELO: {mejor_modelo_nombre}")
+    resultados_modelos = {}
+
+    for nombre, modelo in modelos_arbol.items():
+        print(f"\n🌳 ENTRENANDO: {nombre}")
+        with medir(f"fit {nombre}", len(X_train)):
+            modelo.fit(X_train, y_train)
+        with medir(f"predict {nombre}", len(X_test)) as medicion:
+            y_pred = modelo.predict(X_test)
+            medicion.filas_salida = len(y_pred)
+        accuracy = accuracy_score(y_test, y_pred)
+        resultados_modelos[nombre] = {
+            'modelo': modelo,
+            'accuracy': accuracy,
+            'predicciones': y_pred
+        }
+        print(f"   ✅ Precisión: {accuracy:.1%}")
+
+    # Seleccionar el mejor modelo
+    mejor_modelo_nombre = max(resultados_modelos, key=lambda x: resultados_modelos[x]['accuracy'])
+    print(f"\n🏆 MEJOR MODELO: {mejor_modelo_nombre}")
+    return {
+        'columnas': list(X.columns),
+        'y_test': y_test,
+        'resultados_modelos': resultados_modelos,
+        'mejor_modelo_nombre': mejor_modelo_nombre,
+        'mejor_modelo': resultados_modelos[mejor_modelo_nombre]['modelo'],
+    }
 
 # ---------------------------------------------
 # 9. VISUALIZACIÓN MEJORADA DEL ÁRBOL DE DECISIÓN
 # ---------------------------------------------
-print("\n🌳 CREANDO VISUALIZACIONES MEJORADAS DEL ÁRBOL...")
-
-# Mejorar nombres de variables para visualización
-nombres_mejorados = {
-    'Genero': 'Género',
-    'Edad': 'Edad',
-    'Recibio_Promo': 'Recibió Promoción', 
-    'Monto_Promo': 'Monto Promoción ($)',
-    'Total_Compras': 'Total Compras',
-    'Ingreso_Mensual': 'Ingreso Mensual ($)'
-}
-
-# Crear múltiples versiones del árbol para diferentes propósitos
-fig, axes = plt.subplots(2, 2, figsize=(20, 16))
-fig.suptitle('ÁRBOL DE DECISIÓN - VISUALIZACIONES MEJORADAS', fontsize=16, fontweight='bold')
-
-# 1. Árbol completo con colores mejorados
-plot_tree(mejor_modelo, 
-          feature_names=[nombres_mejorados.get(col, col) for col in X.columns],
-          class_names=['No Recompra', 'Recompra'],
-          filled=True,
-          rounded=True,
-          fontsize=8,
-          ax=axes[0,0])
-axes[0,0].set_title('Árbol Completo', fontweight='bold')
-
-# 2. Árbol simplificado (primeros 3 niveles)
-plot_tree(mejor_modelo, 
-          feature_names=[nombres_mejorados.get(col, col) for col in X.columns],
-          class_names=['No Recompra', 'Recompra'],
-          filled=True,
-          rounded=True,
-          fontsize=10,
-          max_depth=3,
-          ax=axes[0,1])
-axes[0,1].set_title('Árbol Simplificado (Primeros 3 Niveles)', fontweight='bold')
-
-# 3. Árbol con proporciones
-plot_tree(mejor_modelo, 
-          feature_names=[nombres_mejorados.get(col, col) for col in X.columns],
-          class_names=['No Recompra', 'Recompra'],
-          filled=True,
-          rounded=True,
-          proportion=True,
-          fontsize=8,
-          ax=axes[1,0])
-axes[1,0].set_title('Árbol con Proporciones', fontweight='bold')
-
-# 4. Árbol con IDs de nodos
-plot_tree(mejor_modelo, 
-          feature_names=[nombres_mejorados.get(col, col) for col in X.columns],
-          class_names=['No Recompra', 'Recompra'],
-          filled=True,
-          rounded=True,
-          fontsize=8,
-          node_ids=True,
-          ax=axes[1,1])
-axes[1,1].set_title('Árbol con IDs de Nodos', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('arbol_decision_mejorado.png', dpi=300, bbox_inches='tight')
-plt.show()
+@pipeline.etapa(usa=['entrenamiento'], codigo=[nueva_figura, guardar_figura], genera_archivos=True)
+def grafico_arboles(entrenamiento):
+    print("\n🌳 CREANDO VISUALIZACIONES MEJORADAS DEL ÁRBOL...")
+    mejor_modelo = entrenamiento['mejor_modelo']
+    nombres = [NOMBRES_MEJORADOS.get(col, col) for col in entrenamiento['columnas']]
+
+    # Crear múltiples versiones del árbol para diferentes propósitos
+    fig = nueva_figura((20, 16))
+    axes = fig.subplots(2, 2)
+    fig.suptitle('ÁRBOL DE DECISIÓN - VISUALIZACIONES MEJORADAS', fontsize=16, fontweight='bold')
+
+    # 1. Árbol completo con colores mejorados
+    plot_tree(mejor_modelo,
+              feature_names=nombres,
+              class_names=['No Recompra', 'Recompra'],
+              filled=True,
+              rounded=True,
+              fontsize=8,
+              ax=axes[0,0])
+    axes[0,0].set_title('Árbol Completo', fontweight='bold')
+
+    # 2. Árbol simplificado (primeros 3 niveles)
+    plot_tree(mejor_modelo,
+              feature_names=nombres,
+              class_names=['No Recompra', 'Recompra'],
+              filled=True,
+              rounded=True,
+              fontsize=10,
+              max_depth=3,
+              ax=axes[0,1])
+    axes[0,1].set_title('Árbol Simplificado (Primeros 3 Niveles)', fontweight='bold')
+
+    # 3. Árbol con proporciones
+    plot_tree(mejor_modelo,
+              feature_names=nombres,
+              class_names=['No Recompra', 'Recompra'],
+              filled=True,
+              rounded=True,
+              proportion=True,
+              fontsize=8,
+              ax=axes[1,0])
+    axes[1,0].set_title('Árbol con Proporciones', fontweight='bold')
+
+    # 4. Árbol con IDs de nodos
+    plot_tree(mejor_modelo,
+              feature_names=nombres,
+              class_names=['No Recompra', 'Recompra'],
+              filled=True,
+              rounded=True,
+              fontsize=8,
+              node_ids=True,
+              ax=axes[1,1])
+    axes[1,1].set_title('Árbol con IDs de Nodos', fontweight='bold')
+
+    return guardar_figura(fig, 'arbol_decision_mejorado.png')
 
 # Versión individual grande para mejor legibilidad
-plt.figure(figsize=(25, 12))
-plot_tree(mejor_modelo, 
-          feature_names=[nombres_mejorados.get(col, col) for col in X.columns],
-          class_names=['No Recompra', 'Recompra'],
-          filled=True,
-          rounded=True,
-          fontsize=10,
-          proportion=True)
-plt.title('ÁRBOL DE DECISIÓN - PREDICCIÓN DE RECOMPRA (VERSIÓN GRANDE)', 
-          fontsize=16, fontweight='bold', pad=20)
-plt.tight_layout()
-plt.savefig('arbol_decision_grande.png', dpi=300, bbox_inches='tight')
-plt.show()
+@pipeline.etapa(usa=['entrenamiento'], codigo=[nueva_figura, guardar_figura], genera_archivos=True)
+def grafico_arbol_grande(entrenamiento):
+    fig = nueva_figura((25, 12))
+    ax = fig.subplots()
+    plot_tree(entrenamiento['mejor_modelo'],
+              feature_names=[NOMBRES_MEJORADOS.get(col, col) for col in entrenamiento['columnas']],
+              class_names=['No Recompra', 'Recompra'],
+              filled=True,
+              rounded=True,
+              fontsize=10,
+              proportion=True,
+              ax=ax)
+    ax.set_title('ÁRBOL DE DECISIÓN - PREDICCIÓN DE RECOMPRA (VERSIÓN GRANDE)',
+                 fontsize=16, fontweight='bold', pad=20)
+    return guardar_figura(fig, 'arbol_decision_grande.png')
 
 # ---------------------------------------------
 # 10. EVALUACIÓN DEL MODELO
 # ---------------------------------------------
-print("\n📋 EVALUANDO EL MODELO...")
+@pipeline.etapa(usa=['entrenamiento'], cache=False)
+def evaluacion(entrenamiento):
+    print("\n📋 EVALUANDO EL MODELO...")
 
-y_pred_mejor = resultados_modelos[mejor_modelo_nombre]['predicciones']
+    y_test = entrenamiento['y_test']
+    y_pred_mejor = entrenamiento['resultados_modelos'][entrenamiento['mejor_modelo_nombre']]['predicciones']
 
-print("🔢 MATRIZ DE CONFUSIÓN:")
-cm = confusion_matrix(y_test, y_pred_mejor)
-print(cm)
+    print("🔢 MATRIZ DE CONFUSIÓN:")
+    cm = confusion_matrix(y_test, y_pred_mejor)
+    print(cm)
 
-print("\n📊 REPORTE DE CLASIFICACIÓN:")
-print(classification_report(y_test, y_pred_mejor))
+    print("\n📊 REPORTE DE CLASIFICACIÓN:")
+    print(classification_report(y_test, y_pred_mejor))
 
-# Calcular accuracy
-accuracy = (y_pred_mejor == y_test).mean() * 100
-print(f"\n🎯 PRECISIÓN DEL MEJOR MODELO: {accuracy:.1f}%")
+    # Calcular accuracy
+    accuracy = (y_pred_mejor == y_test).mean() * 100
+    print(f"\n🎯 PRECISIÓN DEL MEJOR MODELO: {accuracy:.1f}%")
+    return {'matriz_confusion': cm, 'accuracy': accuracy}
 
 # ---------------------------------------------
 # 11. ANÁLISIS DE IMPORTANCIA DE VARIABLES
 # ---------------------------------------------
-print("\n🔍 ANALIZANDO IMPORTANCIA DE VARIABLES...")
+@pipeline.etapa(usa=['entrenamiento'], codigo=[nueva_figura, guardar_figura], genera_archivos=True)
+def grafico_importancia_variables(entrenamiento):
+    print("\n🔍 ANALIZANDO IMPORTANCIA DE VARIABLES...")
 
-importancias = mejor_modelo.feature_importances_
-features = X.columns
+    importancias = entrenamiento['mejor_modelo'].feature_importances_
+    features = entrenamiento['columnas']
 
-plt.figure(figsize=(10, 6))
-sns.barplot(x=importancias, y=features, palette='viridis')
-plt.title('IMPORTANCIA DE VARIABLES EN LA PREDICCIÓN DE RECOMPRA')
-plt.xlabel('Importancia')
-plt.ylabel('Variables')
-plt.tight_layout()
-plt.savefig('importancia_variables_real.png', dpi=300, bbox_inches='tight')
-plt.show()
+    fig = nueva_figura((10, 6))
+    ax = fig.subplots()
+    sns.barplot(x=importancias, y=features, palette='viridis', ax=ax)
+    ax.set_title('IMPORTANCIA DE VARIABLES EN LA PREDICCIÓN DE RECOMPRA')
+    ax.set_xlabel('Importancia')
+    ax.set_ylabel('Variables')
 
-print("📊 Importancia de variables:")
-for feature, importancia in zip(features, importancias):
-    print(f"   {feature}: {importancia:.3f}")
+    print("📊 Importancia de variables:")
+    for feature, importancia in zip(features, importancias):
+        print(f"   {feature}: {importancia:.3f}")
+    return guardar_figura(fig, 'importancia_variables_real.png')
 
 # ---------------------------------------------
 # 12. REGLAS DEL ÁRBOL DE DECISIÓN EN TEXTO CLARO
 # ---------------------------------------------
-print("\n📝 EXTRACIENDO REGLAS DEL ÁRBOL DE DECISIÓN...")
-
-# Extraer reglas en formato texto legible
-reglas_texto = export_text(mejor_modelo, 
-                          feature_names=[nombres_mejorados.get(col, col) for col in X.columns],
-                          decimals=2)
-
-print("🔍 REGLAS DEL ÁRBOL DE DECISIÓN:")
-print("=" * 70)
-print(reglas_texto)
-
 # Función para explicar reglas importantes
 def explicar_reglas_importantes(arbol, feature_names_mejorados):
     n_nodes = arbol.tree_.node_count
@@ -376,10 +426,10 @@ def explicar_reglas_importantes(arbol, feature_names_mejorados):
     feature = arbol.tree_.feature
     threshold = arbol.tree_.threshold
     value = arbol.tree_.value
-    
+
     print("\n🎯 REGLAS PRINCIPALES EXPLICADAS:")
     print("=" * 70)
-    
+
     for i in range(min(10, n_nodes)):  # Mostrar solo las primeras 10 reglas importantes
         if children_left[i] != children_right[i]:  # Es un nodo de división
             feature_name = feature_names_mejorados[feature[i]]
@@ -387,119 +437,163 @@ def explicar_reglas_importantes(arbol, feature_names_mejorados):
             class_dist = value[i][0]
             pct_no = (class_dist[0] / samples) * 100
             pct_si = (class_dist[1] / samples) * 100
-            
+
             print(f"\n📌 REGLA {i}:")
             print(f"   SI {feature_name} ≤ {threshold[i]:.2f}")
             print(f"   → {samples:.0f} clientes ({pct_no:.1f}% No Recompra, {pct_si:.1f}% Recompra)")
 
-explicar_reglas_importantes(mejor_modelo, [nombres_mejorados.get(col, col) for col in X.columns])
+@pipeline.etapa(usa=['entrenamiento'], codigo=[explicar_reglas_importantes])
+def reglas(entrenamiento):
+    print("\n📝 EXTRACIENDO REGLAS DEL ÁRBOL DE DECISIÓN...")
+    nombres = [NOMBRES_MEJORADOS.get(col, col) for col in entrenamiento['columnas']]
+
+    # Extraer reglas en formato texto legible
+    reglas_texto = export_text(entrenamiento['mejor_modelo'],
+                              feature_names=nombres,
+                              decimals=2)
+
+    print("🔍 REGLAS DEL ÁRBOL DE DECISIÓN:")
+    print("=" * 70)
+    print(reglas_texto)
+
+    explicar_reglas_importantes(entrenamiento['mejor_modelo'], nombres)
+    return reglas_texto
 
 # ---------------------------------------------
 # 13. ANÁLISIS DE SEGMENTOS Y RECOMENDACIONES
 # ---------------------------------------------
-print("\n💡 ANÁLISIS DE SEGMENTOS Y RECOMENDACIONES...")
+@pipeline.etapa(usa=['carga_excel'], cache=False)
+def segmentos(carga_excel):
+    df = carga_excel
+    print("\n💡 ANÁLISIS DE SEGMENTOS Y RECOMENDACIONES...")
 
-# Segmentar clientes
-segmento_recompra = df[df['Recompra'] == 'Si']
-segmento_no_recompra = df[df['Recompra'] == 'No']
+    # Segmentar clientes
+    segmento_recompra = df[df['Recompra'] == 'Si']
+    segmento_no_recompra = df[df['Recompra'] == 'No']
 
-print(f"\n📈 CLIENTES QUE RECOMPRARON ({len(segmento_recompra)} clientes):")
-print(f"   • Edad promedio: {segmento_recompra['Edad'].mean():.1f} años")
-print(f"   • Ingreso promedio: ${segmento_recompra['Ingreso_Mensual'].mean():.0f}")
-print(f"   • Total compras promedio: {segmento_recompra['Total_Compras'].mean():.1f}")
-print(f"   • % que recibió promoción: {(segmento_recompra['Recibio_Promo'] == 'Si').mean() * 100:.1f}%")
+    print(f"\n📈 CLIENTES QUE RECOMPRARON ({len(segmento_recompra)} clientes):")
+    print(f"   • Edad promedio: {segmento_recompra['Edad'].mean():.1f} años")
+    print(f"   • Ingreso promedio: ${segmento_recompra['Ingreso_Mensual'].mean():.0f}")
+    print(f"   • Total compras promedio: {segmento_recompra['Total_Compras'].mean():.1f}")
+    print(f"   • % que recibió promoción: {(segmento_recompra['Recibio_Promo'] == 'Si').mean() * 100:.1f}%")
 
-print(f"\n📉 CLIENTES QUE NO RECOMPRARON ({len(segmento_no_recompra)} clientes):")
-print(f"   • Edad promedio: {segmento_no_recompra['Edad'].mean():.1f} años")
-print(f"   • Ingreso promedio: ${segmento_no_recompra['Ingreso_Mensual'].mean():.0f}")
-print(f"   • Total compras promedio: {segmento_no_recompra['Total_Compras'].mean():.1f}")
-print(f"   • % que recibió promoción: {(segmento_no_recompra['Recibio_Promo'] == 'Si').mean() * 100:.1f}%")
+    print(f"\n📉 CLIENTES QUE NO RECOMPRARON ({len(segmento_no_recompra)} clientes):")
+    print(f"   • Edad promedio: {segmento_no_recompra['Edad'].mean():.1f} años")
+    print(f"   • Ingreso promedio: ${segmento_no_recompra['Ingreso_Mensual'].mean():.0f}")
+    print(f"   • Total compras promedio: {segmento_no_recompra['Total_Compras'].mean():.1f}")
+    print(f"   • % que recibió promoción: {(segmento_no_recompra['Recibio_Promo'] == 'Si').mean() * 100:.1f}%")
 
 # ---------------------------------------------
 # 14. PREDICCIONES DE EJEMPLO
 # ---------------------------------------------
-print("\n🎯 PREDICCIONES DE EJEMPLO CON EL ÁRBOL...")
-
-# Crear algunos casos de prueba
-casos_ejemplo = pd.DataFrame({
-    'Genero': [1, 0, 1],  # 1: Masculino, 0: Femenino
-    'Edad': [35, 50, 25],
-    'Recibio_Promo': [1, 1, 0],  # 1: Sí, 0: No
-    'Monto_Promo': [500, 300, 0],
-    'Total_Compras': [3, 1, 2],
-    'Ingreso_Mensual': [45000, 30000, 35000]
-})
-
-predicciones_ejemplo = mejor_modelo.predict(casos_ejemplo)
-probabilidades_ejemplo = mejor_modelo.predict_proba(casos_ejemplo)
-
-print("🔮 Predicciones para casos de ejemplo:")
-for i, (idx, caso) in enumerate(casos_ejemplo.iterrows()):
-    pred = "RECOMPRA" if predicciones_ejemplo[i] == 1 else "NO RECOMPRA"
-    prob_recompra = probabilidades_ejemplo[i][1] * 100
-    print(f"   Caso {i+1}: {pred} ({prob_recompra:.1f}% probabilidad)")
+@pipeline.etapa(usa=['entrenamiento'], cache=False)
+def predicciones_ejemplo(entrenamiento):
+    print("\n🎯 PREDICCIONES DE EJEMPLO CON EL ÁRBOL...")
+    mejor_modelo = entrenamiento['mejor_modelo']
+
+    # Crear algunos casos de prueba
+    casos_ejemplo = pd.DataFrame({
+        'Genero': [1, 0, 1],  # 1: Masculino, 0: Femenino
+        'Edad': [35, 50, 25],
+        'Recibio_Promo': [1, 1, 0],  # 1: Sí, 0: No
+        'Monto_Promo': [500, 300, 0],
+        'Total_Compras': [3, 1, 2],
+        'Ingreso_Mensual': [45000, 30000, 35000]
+    })
+
+    with medir('predict ejemplos', len(casos_ejemplo)) as medicion:
+        predicciones_ejemplo = mejor_modelo.predict(casos_ejemplo)
+        probabilidades_ejemplo = mejor_modelo.predict_proba(casos_ejemplo)
+        medicion.filas_salida = len(predicciones_ejemplo)
+
+    print("🔮 Predicciones para casos de ejemplo:")
+    for i, (idx, caso) in enumerate(casos_ejemplo.iterrows()):
+        pred = "RECOMPRA" if predicciones_ejemplo[i] == 1 else "NO RECOMPRA"
+        prob_recompra = probabilidades_ejemplo[i][1] * 100
+        print(f"   Caso {i+1}: {pred} ({prob_recompra:.1f}% probabilidad)")
 
 # ---------------------------------------------
 # 15. GUARDAR RESULTADOS Y MODELO
 # ---------------------------------------------
-print("\n💾 GUARDANDO RESULTADOS...")
+@pipeline.etapa(usa=['codificacion', 'entrenamiento', 'reglas'], genera_archivos=True)
+def exportacion(codificacion, entrenamiento, reglas):
+    print("\n💾 GUARDANDO RESULTADOS...")
 
-# Guardar dataset procesado
-df_encoded.to_csv('dataset_procesado.csv', index=False)
+    # Guardar dataset procesado
+    codificacion.to_csv('dataset_procesado.csv', index=False)
 
-# Guardar el modelo entrenado
-import joblib
-joblib.dump(mejor_modelo, 'modelo_arbol_recompra.pkl')
-
-# Guardar reglas en archivo de texto
-with open('reglas_arbol_recompra.txt', 'w', encoding='utf-8') as f:
-    f.write("REGLAS DEL ÁRBOL DE DECISIÓN - PREDICCIÓN DE RECOMPRA\n")
-    f.write("=" * 50 + "\n\n")
-    f.write(reglas_texto)
-
-print("✅ ARCHIVOS GUARDADOS:")
-print("   • analisis_recompra_real.png")
-print("   • promocion_recompra_real.png")
-print("   • matriz_correlacion.png")
-print("   • importancia_variables_real.png")
-print("   • arbol_decision_mejorado.png (4 versiones)")
-print("   • arbol_decision_grande.png")
-print("   • dataset_procesado.csv")
-print("   • modelo_arbol_recompra.pkl")
-print("   • reglas_arbol_recompra.txt")
+    # Guardar el modelo entrenado
+    joblib.dump(entrenamiento['mejor_modelo'], 'modelo_arbol_recompra.pkl')
+
+    # Guardar reglas en archivo de texto
+    with open('reglas_arbol_recompra.txt', 'w', encoding='utf-8') as f:
+        f.write("REGLAS DEL ÁRBOL DE DECISIÓN - PREDICCIÓN DE RECOMPRA\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(reglas)
+
+    print("✅ ARCHIVOS GUARDADOS:")
+    print("   • dataset_procesado.csv")
+    print("   • modelo_arbol_recompra.pkl")
+    print("   • reglas_arbol_recompra.txt")
+    return ['dataset_procesado.csv', 'modelo_arbol_recompra.pkl', 'reglas_arbol_recompra.txt']
 
 # ---------------------------------------------
 # 16. CONCLUSIONES Y RECOMENDACIONES FINALES
 # ---------------------------------------------
-print("\n" + "=" * 60)
-print("📋 CONCLUSIONES Y RECOMENDACIONES FINALES")
-print("=" * 60)
-
-print(f"\n🎯 HALLAZGOS PRINCIPALES:")
-print(f"   1. La promoción aumenta la recompra en {recompra_con_promo - recompra_sin_promo:.1f}%")
-print(f"   2. Modelo predictivo con {accuracy:.1f}% de precisión")
-print(f"   3. Variable más importante: {features[np.argmax(importancias)]}")
-print(f"   4. Mejor configuración del árbol: {mejor_modelo_nombre}")
-
-print(f"\n🌳 INSIGHTS DEL ÁRBOL DE DECISIÓN:")
-print(f"   1. El árbol identifica {mejor_modelo.tree_.node_count} nodos de decisión")
-print(f"   2. Profundidad máxima: {mejor_modelo.tree_.max_depth} niveles")
-print(f"   3. Reglas claras para segmentación de clientes")
-
-print(f"\n💡 RECOMENDACIONES PARA MARKETING:")
-print(f"   1. ENFOCAR promociones en clientes con: {features[np.argmax(importancias)]} alto")
-print(f"   2. USAR reglas del árbol para segmentación automática")
-print(f"   3. OPTIMIZAR montos de promoción basado en análisis de correlación")
-print(f"   4. IMPLEMENTAR sistema de scoring basado en el árbol")
-
-print(f"\n📊 RESUMEN EJECUTIVO:")
-print(f"   • Dataset: {df.shape[0]} clientes analizados")
-print(f"   • Tasa recompra general: {tasa_recompra:.1f}%")
-print(f"   • Efecto promoción: +{recompra_con_promo - recompra_sin_promo:.1f}%")
-print(f"   • Precisión modelo: {accuracy:.1f}%")
-print(f"   • Variables analizadas: {len(features)}")
-print(f"   • Reglas de decisión generadas: {mejor_modelo.tree_.node_count}")
-
-print("=" * 60)
-print("✅ PROYECTO 2 COMPLETADO EXITOSAMENTE")
-print("=" * 60)
\ No newline at end of file
+ETAPAS_ARCHIVOS = ['grafico_analisis_recompra', 'grafico_promocion_recompra', 'correlaciones',
+                   'grafico_arboles', 'grafico_arbol_grande', 'grafico_importancia_variables', 'exportacion']
+
+@pipeline.etapa(usa=['carga_excel', 'entrenamiento', 'evaluacion'] + ETAPAS_ARCHIVOS, cache=False)
+def conclusiones(carga_excel, entrenamiento, evaluacion, **archivos):
+    df = carga_excel
+    mejor_modelo = entrenamiento['mejor_modelo']
+    features = entrenamiento['columnas']
+    importancias = mejor_modelo.feature_importances_
+    accuracy = evaluacion['accuracy']
+    tasa_recompra, recompra_con_promo, recompra_sin_promo = tasas_recompra(df)
+
+    print(f"\n📁 ARCHIVOS GENERADOS: {', '.join(a for generados in archivos.values() for a in generados)}")
+
+    print("\n" + "=" * 60)
+    print("📋 CONCLUSIONES Y RECOMENDACIONES FINALES")
+    print("=" * 60)
+
+    print(f"\n🎯 HALLAZGOS PRINCIPALES:")
+    print(f"   1. La promoción aumenta la recompra en {recompra_con_promo - recompra_sin_promo:.1f}%")
+    print(f"   2. Modelo predictivo con {accuracy:.1f}% de precisión")
+    print(f"   3. Variable más importante: {features[np.argmax(importancias)]}")
+    print(f"   4. Mejor configuración del árbol: {entrenamiento['mejor_modelo_nombre']}")
+
+    print(f"\n🌳 INSIGHTS DEL ÁRBOL DE DECISIÓN:")
+    print(f"   1. El árbol identifica {mejor_modelo.tree_.node_count} nodos de decisión")
+    print(f"   2. Profundidad máxima: {mejor_modelo.tree_.max_depth} niveles")
+    print(f"   3. Reglas claras para segmentación de clientes")
+
+    print(f"\n💡 RECOMENDACIONES PARA MARKETING:")
+    print(f"   1. ENFOCAR promociones en clientes con: {features[np.argmax(importancias)]} alto")
+    print(f"   2. USAR reglas del árbol para segmentación automática")
+    print(f"   3. OPTIMIZAR montos de promoción basado en análisis de correlación")
+    print(f"   4. IMPLEMENTAR sistema de scoring basado en el árbol")
+
+    print(f"\n📊 RESUMEN EJECUTIVO:")
+    print(f"   • Dataset: {df.shape[0]} clientes analizados")
+    print(f"   • Tasa recompra general: {tasa_recompra:.1f}%")
+    print(f"   • Efecto promoción: +{recompra_con_promo - recompra_sin_promo:.1f}%")
+    print(f"   • Precisión modelo: {accuracy:.1f}%")
+    print(f"   • Variables analizadas: {len(features)}")
+    print(f"   • Reglas de decisión generadas: {mejor_modelo.tree_.node_count}")
+
+    print("=" * 60)
+    print("✅ PROYECTO 2 COMPLETADO EXITOSAMENTE")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PROYECTO 2 - ANÁLISIS PREDICTIVO DE RECOMPRA")
+    print("=" * 60)
+    codigo_salida = pipeline.main()
+    # Traza de rendimiento de la corrida (para análisis offline)
+    if TRAZADOR.registros():
+        print(f"⏱️ Traza de rendimiento: {TRAZADOR.guardar()}")
+    sys.exit(codigo_salida)
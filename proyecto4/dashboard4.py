@@ -8,8 +8,28 @@ import os
 import json
 from datetime import datetime
 import sys
-from io import StringIO, BytesIO
-import zipfile
+from io import StringIO
+
+import paquete_exportacion
+from filtros import IndiceFiltros
+
+# Permitir importar los módulos compartidos de comun/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.indice_top import construir_indice
+from comun.submuestreo import submuestrear, presupuesto_puntos
+from comun.cache_figuras import CacheFiguras
+from comun.secciones import Secciones
+from comun.servicio_datos import ServicioDatos, VistaDatos
+from comun.vigilante import GrafoDependencias, VigilanteArchivos
+from comun.registro_cambios import RegistroCambios, aplicar_delta, calcular_delta, claves_tocadas, conflictos
+from comun.consultas_sql import MotorSQL, FILAS_PAGINA
+from comun.indice_claves import IndicesClaves, CLAVES_INDEXADAS
+from comun.rendimiento import medir, trazar, panel_rendimiento
+from comun.esquemas import INFORME as INFORME_MEMORIA, aplicar_esquema, columnas_sin_convertir, sin_categorias
+from comun.dinero import sumar
+from comun.calidad import columnas_faltantes, tablas_relacionadas, validar
+from comun.columnar import AlmacenColumnar, TABLAS_HECHOS
+from comun.caracteristicas_clientes import AlmacenCaracteristicas
 
 # =============================================
 # CONFIGURACIÓN STREAMLIT
@@ -27,104 +47,170 @@ st.set_page_config(
 # =============================================
 
 CARPETA_DATOS = 'datos'
+RUTA_REGISTRO_CAMBIOS = 'cambios.sqlite'
+CARPETA_CALIDAD = 'calidad'
+CARPETA_COLUMNAR = '.columnar'
 
 # =============================================
 # FUNCIONES DE CARGA DE DATOS (CORREGIDAS)
 # =============================================
 
-@st.cache_data
+@st.cache_resource
+def obtener_servicio_datos():
+    """Servicio Arrow mapeado en memoria, uno solo para todo el proceso"""
+    return ServicioDatos(CARPETA_DATOS)
+
+TABLAS_BASE = [
+    'clientes', 'productos', 'facturas_encabezado', 'facturas_detalle', 'rubros', 'sucursales',
+    'condicion_iva', 'localidades', 'proveedores', 'provincias', 'ventas'
+]
+SEGUNDOS_REVISION_DATOS = 5
+# Versiones de cada índice en cache: la de los datos compartidos y las de
+# algunas sesiones con ediciones sin confirmar
+VERSIONES_INDICES = 4
+# Tablas de las que sale cada índice cacheado
+TABLAS_TOP = ['facturas_encabezado', 'facturas_detalle']
+TABLAS_FILTROS = [
+    'facturas_encabezado', 'facturas_detalle', 'productos', 'rubros', 'sucursales', 'condicion_iva', 'localidades'
+]
+
+# Clave primaria de cada tabla (para guardar las ediciones fila por fila)
+CLAVES_TABLAS = {
+    'clientes': 'id_cliente', 'productos': 'id_producto', 'facturas_encabezado': 'id_factura',
+    'facturas_detalle': 'id_factura_detalle', 'rubros': 'id_rubro', 'sucursales': 'id_sucursal',
+    'condicion_iva': 'id_condicion_iva', 'localidades': 'id_localidad', 'proveedores': 'id_proveedor',
+    'provincias': 'id_provincia', 'ventas': 'id_venta'
+}
+
+@st.cache_resource
+def obtener_registro_cambios():
+    """Registro SQLite con las ediciones confirmadas desde el editor"""
+    return RegistroCambios(RUTA_REGISTRO_CAMBIOS)
+
+def preparar_tabla(nombre, df):
+    """Ajustes de cada tabla al cargarla (tipos del registro de esquemas)"""
+    # El Arrow ya viene con los tipos; esto solo convierte lo que trajo el registro de cambios
+    df = aplicar_esquema(df, nombre)
+    for col in columnas_sin_convertir(df, nombre):
+        st.warning(f"⚠️ No se pudo convertir {col} de {nombre}")
+    return df
+
+@trazar()
+def construir_detalles_completos(datos):
+    """Merge de detalles con productos y rubros"""
+    productos_renom = datos['productos'].rename(columns={'descripcion': 'nombre_producto'})
+    rubros_renom = datos['rubros'].rename(columns={'descripcion': 'nombre_rubro'})
+    return (datos['facturas_detalle']
+        .merge(productos_renom, on='id_producto', how='left')
+        .merge(rubros_renom, on='id_rubro', how='left')
+    )
+
+@trazar()
+def construir_facturas_completas(datos):
+    """Merge de facturas con clientes, condición IVA y sucursales (SIN localidades/provincias por ahora)"""
+    condicion_iva_renom = datos['condicion_iva'].rename(columns={'descripcion': 'tipo_iva'})
+    sucursales_renom = datos['sucursales'].rename(columns={'nombre': 'nombre_sucursal'})
+    return (datos['facturas_encabezado']
+        .merge(datos['clientes'], on='id_cliente', how='left')
+        .merge(condicion_iva_renom, on='id_condicion_iva', how='left')
+        .merge(sucursales_renom, on='id_sucursal', how='left')
+    )
+
+@trazar()
+def construir_clientes_completos(datos):
+    """Merge de clientes con localidades y provincias (si existen las columnas)"""
+    if columnas_faltantes(datos, ['clientes', 'localidades', 'provincias']):
+        # Las columnas que faltan ya figuran en el informe de calidad
+        return datos['clientes'].copy()
+    localidades_renom = datos['localidades'].rename(columns={'nombre': 'nombre_localidad'})
+    provincias_renom = datos['provincias'].rename(columns={'nombre': 'nombre_provincia'})
+    return (datos['clientes']
+        .merge(localidades_renom, on='id_localidad', how='left')
+        .merge(provincias_renom, left_on='id_provincia', right_on='id_provincia', how='left')
+    )
+
+@trazar()
+def construir_productos_completos(datos):
+    """Merge de productos con proveedores y rubros"""
+    if columnas_faltantes(datos, ['productos', 'proveedores', 'rubros']):
+        return datos['productos'].copy()
+    rubros_renom = datos['rubros'].rename(columns={'descripcion': 'nombre_rubro'})
+    return (datos['productos']
+        .merge(datos['proveedores'], on='id_proveedor', how='left')
+        .merge(rubros_renom, on='id_rubro', how='left')
+    )
+
+@trazar()
+def leer_tabla(nombre, recargar=False):
+    """Tabla del servicio con los cambios confirmados del registro aplicados encima"""
+    servicio = obtener_servicio_datos()
+    df = servicio.recargar(nombre) if recargar else servicio.tabla(nombre)
+    delta = obtener_registro_cambios().delta_acumulado(nombre)
+    if delta is not None:
+        df = aplicar_delta(df, delta)
+    return preparar_tabla(nombre, df)
+
+@st.cache_resource
+def obtener_estado_calidad():
+    """Último resultado de la validación de calidad (compartido)"""
+    return {'resultado': None}
+
+@trazar()
+def validar_datos(crudas):
+    """Valida las tablas base en una pasada, guarda el informe y la cuarentena
+    en calidad/ y devuelve el resultado (con las tablas limpias)"""
+    resultado = validar(crudas)
+    try:
+        resultado.guardar(CARPETA_CALIDAD)
+    except OSError as e:
+        st.warning(f"⚠️ No se pudo guardar el informe de calidad: {e}")
+    obtener_estado_calidad()['resultado'] = resultado
+    return resultado
+
+# Tablas derivadas: de qué tablas dependen y cómo se construyen. La primera
+# fuente es la tabla principal: cada fila derivada sale de una fila suya
+# (merge left) y conserva su clave.
+DERIVADAS = {
+    'detalles_completos': (['facturas_detalle', 'productos', 'rubros'], construir_detalles_completos),
+    'facturas_completas': (['facturas_encabezado', 'clientes', 'condicion_iva', 'sucursales'], construir_facturas_completas),
+    'clientes_completos': (['clientes', 'localidades', 'provincias'], construir_clientes_completos),
+    'productos_completos': (['productos', 'proveedores', 'rubros'], construir_productos_completos),
+}
+GRAFO_DERIVADAS = GrafoDependencias({nombre: fuentes for nombre, (fuentes, _) in DERIVADAS.items()})
+
+@st.cache_resource
+def obtener_vigilante():
+    """Vigilante de datos/ compartido; toma la foto inicial antes de la primera carga"""
+    return VigilanteArchivos(CARPETA_DATOS, TABLAS_BASE)
+
+# Un único juego de DataFrames de solo lectura para todas las sesiones (sin
+# copias por sesión); lo que edita cada usuario va a su VistaDatos.
+@st.cache_resource
+@trazar()
 def cargar_datos_completos():
     """Carga todos los datos de tus archivos CSV con manejo de errores"""
     try:
         st.info("🔄 Cargando archivos CSV...")
+        obtener_vigilante()
+        
+        # Cargar todos los archivos que tienes (comparten los buffers del servicio)
+        crudas = {nombre: leer_tabla(nombre) for nombre in TABLAS_BASE}
         
-        # Cargar todos los archivos que tienes
-        clientes = pd.read_csv(f'{CARPETA_DATOS}/clientes.csv')
-        productos = pd.read_csv(f'{CARPETA_DATOS}/productos.csv')
-        facturas_encabezado = pd.read_csv(f'{CARPETA_DATOS}/facturas_encabezado.csv')
-        facturas_detalle = pd.read_csv(f'{CARPETA_DATOS}/facturas_detalle.csv')
-        rubros = pd.read_csv(f'{CARPETA_DATOS}/rubros.csv')
-        sucursales = pd.read_csv(f'{CARPETA_DATOS}/sucursales.csv')
-        condicion_iva = pd.read_csv(f'{CARPETA_DATOS}/condicion_iva.csv')
-        localidades = pd.read_csv(f'{CARPETA_DATOS}/localidades.csv')
-        proveedores = pd.read_csv(f'{CARPETA_DATOS}/proveedores.csv')
-        provincias = pd.read_csv(f'{CARPETA_DATOS}/provincias.csv')
-        ventas = pd.read_csv(f'{CARPETA_DATOS}/ventas.csv')
+        # Las filas que no pasan la validación quedan en cuarentena, fuera de los gráficos
+        calidad = validar_datos(crudas)
+        datos = dict(calidad.limpias)
+        if not calidad.violaciones.empty:
+            st.warning(f"⚠️ {calidad.texto()} (informe en '{CARPETA_CALIDAD}/')")
         
         st.info("✅ Archivos CSV cargados correctamente")
         st.info("🔄 Procesando datos...")
         
-        # Preparar datos con merge seguros
-        productos_renom = productos.rename(columns={'descripcion': 'nombre_producto'})
-        rubros_renom = rubros.rename(columns={'descripcion': 'nombre_rubro'})
-        condicion_iva_renom = condicion_iva.rename(columns={'descripcion': 'tipo_iva'})
-        localidades_renom = localidades.rename(columns={'nombre': 'nombre_localidad'})
-        provincias_renom = provincias.rename(columns={'nombre': 'nombre_provincia'})
-        sucursales_renom = sucursales.rename(columns={'nombre': 'nombre_sucursal'})
-        
-        # Merge de detalles con productos y rubros
-        detalles_completos = (facturas_detalle
-            .merge(productos_renom, on='id_producto', how='left')
-            .merge(rubros_renom, on='id_rubro', how='left')
-        )
-        
-        # Merge de facturas con clientes, condición IVA y sucursales (SIN localidades/provincias por ahora)
-        facturas_completas = (facturas_encabezado
-            .merge(clientes, on='id_cliente', how='left')
-            .merge(condicion_iva_renom, on='id_condicion_iva', how='left')
-            .merge(sucursales_renom, on='id_sucursal', how='left')
-        )
-        
-        # Merge de clientes con localidades y provincias (si existen las columnas)
-        try:
-            clientes_completos = (clientes
-                .merge(localidades_renom, on='id_localidad', how='left')
-                .merge(provincias_renom, left_on='id_provincia', right_on='id_provincia', how='left')
-            )
-        except:
-            st.warning("⚠️ No se pudo hacer merge completo de clientes con localidades/provincias")
-            clientes_completos = clientes.copy()
-        
-        # Merge de productos con proveedores y rubros
-        try:
-            productos_completos = (productos
-                .merge(proveedores, on='id_proveedor', how='left')
-                .merge(rubros_renom, on='id_rubro', how='left')
-            )
-        except:
-            st.warning("⚠️ No se pudo hacer merge completo de productos")
-            productos_completos = productos.copy()
-        
-        # Convertir fechas
-        try:
-            facturas_encabezado['fecha'] = pd.to_datetime(facturas_encabezado['fecha'])
-        except:
-            st.warning("⚠️ No se pudo convertir fecha de facturas")
-        
-        try:
-            ventas['fecha_venta'] = pd.to_datetime(ventas['fecha_venta'])
-        except:
-            st.warning("⚠️ No se pudo convertir fecha de ventas")
+        for nombre in GRAFO_DERIVADAS.orden():
+            datos[nombre] = DERIVADAS[nombre][1](datos)
         
         st.info("✅ Datos procesados correctamente")
         
-        return {
-            'clientes': clientes,
-            'productos': productos,
-            'facturas_encabezado': facturas_encabezado,
-            'facturas_detalle': facturas_detalle,
-            'rubros': rubros,
-            'sucursales': sucursales,
-            'condicion_iva': condicion_iva,
-            'localidades': localidades,
-            'proveedores': proveedores,
-            'provincias': provincias,
-            'ventas': ventas,
-            'detalles_completos': detalles_completos,
-            'facturas_completas': facturas_completas,
-            'clientes_completos': clientes_completos,
-            'productos_completos': productos_completos
-        }
+        return datos
         
     except FileNotFoundError as e:
         st.error(f"❌ Error: Archivo no encontrado - {e}")
@@ -139,19 +225,233 @@ def cargar_datos_completos():
         st.error(f"📋 Detalles del error: {traceback.format_exc()}")
         return None
 
+def actualizar_datos_modificados():
+    """Re-ingesta solo las tablas cuyo CSV cambió y reconstruye sus derivadas"""
+    datos = cargar_datos_completos()
+    vigilante = obtener_vigilante()
+    if datos is None:
+        return []
+    with vigilante.lock:
+        cambiadas = vigilante.revisar()
+        if not cambiadas:
+            return []
+        crudas = {nombre: leer_tabla(nombre, recargar=nombre in cambiadas) for nombre in TABLAS_BASE}
+        anterior = obtener_estado_calidad()['resultado']
+        calidad = validar_datos(crudas)
+        # Además de las cambiadas, las que entran o salen de cuarentena (por
+        # ejemplo, líneas de una factura que ahora es inválida)
+        tocadas = set(cambiadas) | set(calidad.cuarentena) | set(anterior.cuarentena if anterior else ())
+        for nombre in tocadas:
+            datos[nombre] = calidad.limpias[nombre]
+        for nombre in GRAFO_DERIVADAS.afectadas(tocadas):
+            datos[nombre] = DERIVADAS[nombre][1](datos)
+    return cambiadas
+
+def actualizar_derivadas(datos, deltas):
+    """Aplica los deltas confirmados a las derivadas: si solo cambió su tabla
+    principal se reconstruyen únicamente esas filas, si no la derivada entera"""
+    cambiadas = set(deltas)
+    for derivada in GRAFO_DERIVADAS.afectadas(cambiadas):
+        fuentes, construir = DERIVADAS[derivada]
+        principal = fuentes[0]
+        if cambiadas.intersection(fuentes) == {principal} and principal in deltas:
+            delta = deltas[principal]
+            filas = pd.DataFrame()
+            if not delta['filas'].empty:
+                filas = construir({**datos, principal: delta['filas']})
+            datos[derivada] = aplicar_delta(
+                datos[derivada], {'clave': delta['clave'], 'eliminadas': delta['eliminadas'], 'filas': filas}
+            )
+        else:
+            datos[derivada] = construir(datos)
+        cambiadas.add(derivada)
+
+@trazar()
+def confirmar_cambios(vista):
+    """Guarda en una transacción las tablas editadas en la sesión y las publica
+    en los datos compartidos; devuelve (lote, {tabla: filas tocadas}). Cada
+    edición se compara con la tabla de la que partió: ValueError si otra sesión
+    confirmó cambios en las mismas claves mientras tanto o si el resultado no
+    pasa la validación de calidad (claves o referencias vacías o inexistentes)."""
+    datos = vista.compartidos
+    vigilante = obtener_vigilante()
+    with vigilante.lock:
+        deltas = {}
+        for nombre in vista.editadas():
+            if nombre in CLAVES_TABLAS:
+                base = vista.base(nombre)
+                delta = calcular_delta(base, vista[nombre], CLAVES_TABLAS[nombre])
+                if not claves_tocadas(delta):
+                    continue
+                chocan = conflictos(base, datos[nombre], delta)
+                if chocan:
+                    raise ValueError(
+                        f"otra sesión confirmó cambios en '{nombre}' ({CLAVES_TABLAS[nombre]} {chocan[:5]}) "
+                        f"después de que empezaste a editar; reiniciá la tabla y volvé a editarla"
+                    )
+                deltas[nombre] = delta
+        if not deltas:
+            return None, {}
+        # Las tablas como quedarían, validadas con las que las referencian o a
+        # las que referencian (los datos compartidos ya pasaron la validación)
+        candidatas = {nombre: aplicar_delta(datos[nombre], delta) for nombre, delta in deltas.items()}
+        revision = validar({nombre: candidatas.get(nombre, datos[nombre]) for nombre in tablas_relacionadas(deltas)})
+        if not revision.violaciones.empty:
+            detalle = '; '.join(f"{v.tabla}: {v.regla} ({v.clave})" for v in revision.violaciones.head(5).itertuples())
+            raise ValueError(f"{len(revision.violaciones)} violaciones de calidad: {detalle}")
+        lote = obtener_registro_cambios().confirmar(deltas)
+        indices = obtener_indices_claves()
+        for nombre, delta in deltas.items():
+            anterior = datos[nombre]
+            datos[nombre] = candidatas[nombre]
+            # Solo altas: las filas nuevas quedan al final y los índices se extienden
+            clave = delta['clave']
+            solo_altas = not delta['eliminadas'] and not anterior[clave].isin(delta['filas'][clave]).any()
+            if nombre in CLAVES_INDEXADAS and solo_altas:
+                indices.agregar(nombre, datos[nombre], len(delta['filas']), anterior)
+        actualizar_derivadas(datos, deltas)
+        vigilante.notificar(list(deltas))
+    for nombre in vista.editadas():
+        del vista[nombre]
+    return lote, {nombre: len(claves_tocadas(delta)) for nombre, delta in deltas.items()}
+
+@st.fragment(run_every=SEGUNDOS_REVISION_DATOS)
+def vigilar_datos():
+    """Cada pocos segundos revisa datos/ y refresca la página si algo cambió"""
+    try:
+        actualizar_datos_modificados()
+    except Exception as e:
+        st.error(f"❌ Error al actualizar los datos modificados: {e}")
+        return
+    vigilante = obtener_vigilante()
+    version_vista = st.session_state.setdefault('version_datos', vigilante.version)
+    if version_vista != vigilante.version:
+        st.session_state.version_datos = vigilante.version
+        st.toast(f"🔄 Datos actualizados: {', '.join(vigilante.ultimas)}")
+        st.rerun(scope="app")
+
+def tablas_versionadas(datos, nombres):
+    """(clave, tablas) de las tablas `nombres`: la clave es la versión de los datos
+    compartidos más la huella de las que la sesión editó sin confirmar. Se leen
+    bajo el lock del vigilante para no mezclar tablas de una versión con otra."""
+    vigilante = obtener_vigilante()
+    with vigilante.lock:
+        tablas = [datos[nombre] for nombre in nombres]
+        version = vigilante.version
+    editadas = set(datos.editadas()) if isinstance(datos, VistaDatos) else set()
+    clave = (version,) + tuple((nombre, version_tabla(df)) for nombre, df in zip(nombres, tablas)
+                               if nombre in editadas)
+    return clave, tablas
+
+@st.cache_resource(max_entries=VERSIONES_INDICES)
+@trazar('construir_indice_top')
+def obtener_indice_top(version_datos, _facturas_encabezado, _facturas_detalle):
+    """Índice de rankings; uno por versión de las facturas"""
+    try:
+        return construir_indice(_facturas_encabezado, _facturas_detalle)
+    except Exception as e:
+        st.error(f"❌ Error al construir el índice de rankings: {e}")
+        return None
+
+@st.cache_resource(max_entries=1)
+@trazar('sincronizar_almacen_columnar')
+def obtener_almacen_columnar(version_datos, _facturas_encabezado, _facturas_detalle, _ventas):
+    """Facturas y ventas compartidas en columnas .npy mapeadas en memoria (las
+    páginas las comparten todos los procesos); se sincroniza en cada versión de los datos"""
+    try:
+        almacen = AlmacenColumnar(CARPETA_COLUMNAR)
+        almacen.sincronizar(dict(zip(TABLAS_HECHOS, (_facturas_encabezado, _facturas_detalle, _ventas))))
+        return almacen
+    except (OSError, ValueError) as e:
+        st.warning(f"⚠️ No se pudo actualizar el almacén columnar: {e}")
+        return None
+
+@st.cache_resource(max_entries=VERSIONES_INDICES)
+@trazar('construir_indice_filtros')
+def obtener_indice_filtros(version_datos, _facturas_encabezado, _facturas_detalle, _productos, _rubros,
+                           _sucursales, _condicion_iva, _localidades):
+    """Facturas ordenadas por sucursal y fecha para resolver filtros por rangos;
+    uno por versión de las tablas"""
+    try:
+        return IndiceFiltros(_facturas_encabezado, _facturas_detalle, _productos, _rubros,
+                             _sucursales, _condicion_iva, _localidades)
+    except Exception as e:
+        st.error(f"❌ Error al preparar los filtros: {e}")
+        return None
+
+@st.cache_resource(max_entries=1)
+@trazar('registrar_tablas_sql')
+def obtener_motor_sql(version_datos):
+    """Motor SQL con las tablas compartidas (base y derivadas); uno por versión de los datos"""
+    datos = cargar_datos_completos()
+    motor = MotorSQL()
+    for nombre, df in datos.items():
+        motor.registrar_tabla(nombre, df)
+    return motor
+
+@st.cache_resource(max_entries=1)
+def obtener_caracteristicas_clientes(version_datos, _facturas_encabezado):
+    """Recencia, frecuencia y ticket promedio por cliente; uno por versión de los datos"""
+    almacen = AlmacenCaracteristicas()
+    almacen.actualizar(_facturas_encabezado)
+    return almacen
+
+@st.cache_resource
+def obtener_indices_claves():
+    """Índices CSR de las claves foráneas de facturas y detalles (compartidos)"""
+    indices = IndicesClaves()
+    with medir('construir_indices_claves'):
+        indices.sincronizar(cargar_datos_completos())
+    return indices
+
+@st.cache_resource
+def obtener_cache_figuras():
+    """Cache de figuras compartido por todas las sesiones"""
+    return CacheFiguras()
+
+def version_tabla(df):
+    """Huella del contenido de una tabla (para claves de cache)"""
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+def figura_cacheada(crear_grafico, clave, *args):
+    """Figura de crear_grafico(*args); se reutiliza si se repiten los datos y filtros de la clave"""
+    return obtener_cache_figuras().obtener_o_crear(
+        (crear_grafico.__name__,) + tuple(clave),
+        lambda: crear_grafico(*args)
+    )
+
+def nombres_productos(productos, ids):
+    """Descripción de cada id_producto, en el mismo orden"""
+    return ids.map(productos.set_index('id_producto')['descripcion'])
+
+def top_productos_seleccion(indice_top, seleccion, metrica, n=8):
+    """Top de productos del índice, con los filtros de sucursal y fechas"""
+    if not seleccion.filtrada:
+        return indice_top.top_productos(n, metrica)
+    return indice_top.top_productos(
+        n, metrica,
+        sucursales=seleccion.sucursales,
+        desde=seleccion.desde,
+        hasta=seleccion.hasta
+    )
+
 # =============================================
 # FUNCIONES DE GRÁFICOS INTERACTIVOS - ORIGINALES
 # =============================================
 
-def crear_grafico_ventas_mensuales(facturas_encabezado):
+@trazar()
+def crear_grafico_ventas_mensuales(seleccion):
     """Gráfico de ventas mensuales interactivo"""
     try:
-        facturas_encabezado['mes'] = facturas_encabezado['fecha'].dt.month
-        ventas_mensuales = facturas_encabezado.groupby('mes')['total_venta'].sum()
+        # Sin agregar columnas: las facturas son compartidas entre sesiones
+        facturas_encabezado = seleccion.facturas()
+        mes = facturas_encabezado['fecha'].dt.month.rename('mes')
+        ventas_mensuales = facturas_encabezado.groupby(mes)['total_venta'].sum()
         
-        meses = ['Enero', 'Febrero', 'Marzo']
+        meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+                 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
         
-        ventas_mensuales.index = [meses[i-1] for i in ventas_mensuales.index if i <= len(meses)]
+        ventas_mensuales.index = [meses[i-1] for i in ventas_mensuales.index]
         
         fig = px.bar(
             x=ventas_mensuales.index,
@@ -167,9 +467,11 @@ def crear_grafico_ventas_mensuales(facturas_encabezado):
         st.error(f"Error en gráfico ventas mensuales: {e}")
         return go.Figure()
 
-def crear_grafico_ventas_sucursal(facturas_completas):
+@trazar()
+def crear_grafico_ventas_sucursal(seleccion):
     """Gráfico de ventas por sucursal"""
     try:
+        facturas_completas = seleccion.facturas()
         ventas_sucursal = facturas_completas.groupby('nombre_sucursal')['total_venta'].sum()
         
         fig = px.pie(
@@ -182,14 +484,15 @@ def crear_grafico_ventas_sucursal(facturas_completas):
         st.error(f"Error en gráfico ventas sucursal: {e}")
         return go.Figure()
 
-def crear_grafico_top_productos_ventas(detalles_completos):
+@trazar()
+def crear_grafico_top_productos_ventas(indice_top, productos, seleccion):
     """Top productos por ventas"""
     try:
-        ventas_producto = detalles_completos.groupby('nombre_producto')['subtotal_linea'].sum().nlargest(8)
+        ventas_producto = top_productos_seleccion(indice_top, seleccion, 'facturacion')
         
         fig = px.bar(
             x=ventas_producto.values,
-            y=ventas_producto.index,
+            y=nombres_productos(productos, ventas_producto.index),
             orientation='h',
             title='🏆 Top 8 Productos por Ventas',
             labels={'x': 'Ventas Totales ($)', 'y': 'Producto'},
@@ -202,9 +505,11 @@ def crear_grafico_top_productos_ventas(detalles_completos):
         st.error(f"Error en gráfico top productos: {e}")
         return go.Figure()
 
-def crear_grafico_ventas_tipo_iva(facturas_completas):
+@trazar()
+def crear_grafico_ventas_tipo_iva(seleccion):
     """Ventas por tipo de IVA"""
     try:
+        facturas_completas = seleccion.facturas()
         ventas_iva = facturas_completas.groupby('tipo_iva')['total_venta'].sum()
         
         fig = px.bar(
@@ -220,14 +525,15 @@ def crear_grafico_ventas_tipo_iva(facturas_completas):
         st.error(f"Error en gráfico ventas IVA: {e}")
         return go.Figure()
 
-def crear_grafico_productos_mas_vendidos(detalles_completos):
+@trazar()
+def crear_grafico_productos_mas_vendidos(indice_top, productos, seleccion):
     """Productos más vendidos por cantidad"""
     try:
-        cantidad_producto = detalles_completos.groupby('nombre_producto')['cantidad'].sum().nlargest(8)
+        cantidad_producto = top_productos_seleccion(indice_top, seleccion, 'cantidad')
         
         fig = px.bar(
             x=cantidad_producto.values,
-            y=cantidad_producto.index,
+            y=nombres_productos(productos, cantidad_producto.index),
             orientation='h',
             title='📦 Productos Más Vendidos (Cantidad)',
             labels={'x': 'Unidades Vendidas', 'y': 'Producto'},
@@ -240,9 +546,11 @@ def crear_grafico_productos_mas_vendidos(detalles_completos):
         st.error(f"Error en gráfico productos vendidos: {e}")
         return go.Figure()
 
-def crear_grafico_ventas_rubro(detalles_completos):
+@trazar()
+def crear_grafico_ventas_rubro(seleccion):
     """Ventas por rubro"""
     try:
+        detalles_completos = seleccion.detalles()
         ventas_rubro = detalles_completos.groupby('nombre_rubro')['subtotal_linea'].sum()
         
         fig = px.pie(
@@ -255,6 +563,7 @@ def crear_grafico_ventas_rubro(detalles_completos):
         st.error(f"Error en gráfico ventas rubro: {e}")
         return go.Figure()
 
+@trazar()
 def crear_grafico_stock_rubro(productos_completos):
     """Stock por rubro"""
     try:
@@ -277,11 +586,12 @@ def crear_grafico_stock_rubro(productos_completos):
 # NUEVAS FUNCIONES DE GRÁFICOS DE TENDENCIA TEMPORAL
 # =============================================
 
-def crear_grafico_ventas_semanales(facturas_encabezado):
+@trazar()
+def crear_grafico_ventas_semanales(seleccion):
     """Gráfico de líneas para ventas semanales"""
     try:
         # Crear copia para no modificar el original
-        df = facturas_encabezado.copy()
+        df = seleccion.facturas().copy()
         df['semana'] = df['fecha'].dt.to_period('W').dt.start_time
         
         ventas_semanales = df.groupby('semana')['total_venta'].sum().reset_index()
@@ -304,10 +614,11 @@ def crear_grafico_ventas_semanales(facturas_encabezado):
         st.error(f"Error en gráfico ventas semanales: {e}")
         return go.Figure()
 
-def crear_grafico_ventas_mensuales_lineas(facturas_encabezado):
+@trazar()
+def crear_grafico_ventas_mensuales_lineas(seleccion):
     """Gráfico de líneas para ventas mensuales"""
     try:
-        df = facturas_encabezado.copy()
+        df = seleccion.facturas().copy()
         df['mes'] = df['fecha'].dt.to_period('M').dt.start_time
         
         ventas_mensuales = df.groupby('mes')['total_venta'].sum().reset_index()
@@ -330,10 +641,11 @@ def crear_grafico_ventas_mensuales_lineas(facturas_encabezado):
         st.error(f"Error en gráfico ventas mensuales línea: {e}")
         return go.Figure()
 
-def crear_grafico_ventas_anuales(facturas_encabezado):
+@trazar()
+def crear_grafico_ventas_anuales(seleccion):
     """Gráfico de líneas para ventas anuales"""
     try:
-        df = facturas_encabezado.copy()
+        df = seleccion.facturas().copy()
         df['año'] = df['fecha'].dt.year
         
         ventas_anuales = df.groupby('año')['total_venta'].sum().reset_index()
@@ -378,10 +690,16 @@ def crear_grafico_ventas_anuales(facturas_encabezado):
         st.error(f"Error en gráfico ventas anuales: {e}")
         return go.Figure()
 
-def crear_grafico_tendencia_ventas_completo(facturas_encabezado):
+@trazar()
+def crear_grafico_tendencia_ventas_completo(seleccion, ancho_px=1200, zoom=None):
     """Gráfico completo con tendencia de ventas por día/semana/mes"""
     try:
-        df = facturas_encabezado.copy()
+        df = seleccion.facturas()
+        if zoom is not None:
+            # Al acercar se re-agrega solo el tramo visible, con más detalle
+            desde, hasta = pd.Timestamp(zoom[0]), pd.Timestamp(zoom[1]) + pd.Timedelta(days=1)
+            df = df[(df['fecha'] >= desde) & (df['fecha'] < hasta)]
+        df = df.copy()
         
         # Crear diferentes agrupaciones
         df_diario = df.groupby('fecha')['total_venta'].sum().reset_index()
@@ -390,13 +708,18 @@ def crear_grafico_tendencia_ventas_completo(facturas_encabezado):
         df_mensual = df.groupby(df['fecha'].dt.to_period('M').dt.start_time)['total_venta'].sum().reset_index()
         df_mensual = df_mensual.rename(columns={'fecha': 'mes'})
         
+        # Limitar los puntos diarios al ancho del gráfico (LTTB conserva la forma)
+        puntos_max = presupuesto_puntos(ancho_px)
+        x_diario, y_diario = submuestrear(df_diario['fecha'].to_numpy(), df_diario['total_venta'].to_numpy(), puntos_max)
+        modo_diario = 'lines+markers' if len(x_diario) <= 200 else 'lines'
+        
         # Crear subplots
         fig = go.Figure()
         
         # Agregar líneas para cada período
         fig.add_trace(go.Scatter(
-            x=df_diario['fecha'], y=df_diario['total_venta'],
-            mode='lines+markers', name='Ventas Diarias',
+            x=x_diario, y=y_diario,
+            mode=modo_diario, name='Ventas Diarias',
             line=dict(width=1, color='lightblue'),
             marker=dict(size=4)
         ))
@@ -416,7 +739,8 @@ def crear_grafico_tendencia_ventas_completo(facturas_encabezado):
         ))
         
         fig.update_layout(
-            title='📈 Tendencia de Ventas - Diario/Semanal/Mensual',
+            title=(f'📈 Tendencia de Ventas - Diario/Semanal/Mensual'
+                   f' ({len(x_diario):,} de {len(df_diario):,} días graficados)'),
             xaxis_title='Fecha',
             yaxis_title='Ventas Totales ($)',
             hovermode='x unified',
@@ -442,24 +766,28 @@ def mostrar_editor_datos():
         
     datos = st.session_state.datos_completos
     
-    # Selector de tabla con TODOS tus archivos
+    # Selector de tabla con TODOS tus archivos (etiqueta -> nombre de la tabla)
     tablas_disponibles = {
-        'Clientes': datos['clientes'],
-        'Productos': datos['productos'], 
-        'Facturas Encabezado': datos['facturas_encabezado'],
-        'Facturas Detalle': datos['facturas_detalle'],
-        'Rubros': datos['rubros'],
-        'Sucursales': datos['sucursales'],
-        'Condición IVA': datos['condicion_iva'],
-        'Localidades': datos['localidades'],
-        'Proveedores': datos['proveedores'],
-        'Provincias': datos['provincias'],
-        'Ventas': datos['ventas']
+        'Clientes': 'clientes',
+        'Productos': 'productos', 
+        'Facturas Encabezado': 'facturas_encabezado',
+        'Facturas Detalle': 'facturas_detalle',
+        'Rubros': 'rubros',
+        'Sucursales': 'sucursales',
+        'Condición IVA': 'condicion_iva',
+        'Localidades': 'localidades',
+        'Proveedores': 'proveedores',
+        'Provincias': 'provincias',
+        'Ventas': 'ventas'
     }
     
     tabla_seleccionada = st.selectbox("Selecciona la tabla a editar:", list(tablas_disponibles.keys()))
     
-    df = tablas_disponibles[tabla_seleccionada]
+    clave_tabla = tablas_disponibles[tabla_seleccionada]
+    # La tabla que se muestra y la versión compartida de la que parte la edición
+    with obtener_vigilante().lock:
+        df = datos[clave_tabla]
+        base = datos.base(clave_tabla)
     
     # Análisis de datos
     st.subheader("📈 Análisis de Datos")
@@ -486,33 +814,53 @@ def mostrar_editor_datos():
             nueva_fila = {col: "" for col in df.columns}
             df = pd.concat([df, pd.DataFrame([nueva_fila])], ignore_index=True)
             # Actualizar en session_state
-            clave_tabla = tabla_seleccionada.lower().replace(' ', '_')
-            st.session_state.datos_completos[clave_tabla] = df
+            datos.editar(clave_tabla, df, base)
             st.rerun()
             
         if st.button("🔄 Reiniciar Tabla", use_container_width=True):
             # Recargar datos originales
             datos_originales = cargar_datos_completos()
             if datos_originales:
-                st.session_state.datos_completos = datos_originales
+                st.session_state.datos_completos = VistaDatos(datos_originales)
                 st.success("✅ Datos reiniciados correctamente")
                 st.rerun()
             else:
                 st.error("❌ Error al recargar datos")
+        
+        # Las ediciones de la sesión se confirman juntas, en una sola transacción
+        pendientes = datos.editadas() if isinstance(datos, VistaDatos) else []
+        if st.button("💾 Confirmar Cambios", use_container_width=True, disabled=not pendientes):
+            try:
+                lote, tocadas = confirmar_cambios(datos)
+                st.session_state.version_datos = obtener_vigilante().version
+                # Editor nuevo: el anterior volvería a aplicar sus ediciones encima
+                st.session_state.version_editor = st.session_state.get('version_editor', 0) + 1
+                if lote is None:
+                    st.info("ℹ️ No hay diferencias con los datos guardados")
+                else:
+                    resumen = ', '.join(f"{nombre} ({filas})" for nombre, filas in tocadas.items())
+                    st.success(f"✅ Lote #{lote} confirmado: {resumen}")
+            except ValueError as e:
+                st.error(f"❌ No se pudieron confirmar los cambios: {e}")
+            except Exception as e:
+                st.error(f"❌ Error al guardar los cambios: {e}")
+        if pendientes:
+            st.caption(f"✏️ Sin confirmar: {', '.join(pendientes)}")
     
     with col_edit1:
+        # Las columnas category solo admitirían sus valores actuales en el editor
+        df = sin_categorias(df)
         edited_df = st.data_editor(
             df,
             use_container_width=True,
             num_rows="dynamic",
-            key=f"editor_{tabla_seleccionada}"
+            key=f"editor_{tabla_seleccionada}_{st.session_state.get('version_editor', 0)}"
         )
         
         # Actualizar datos si hay cambios
         if not edited_df.equals(df):
-            clave_tabla = tabla_seleccionada.lower().replace(' ', '_')
-            st.session_state.datos_completos[clave_tabla] = edited_df
-            st.success("✅ Cambios guardados en la sesión actual")
+            datos.editar(clave_tabla, edited_df, base)
+            st.success("✅ Cambios guardados en la sesión actual (falta confirmarlos)")
     
     # Descargas
     st.subheader("📥 Descargar Datos")
@@ -524,7 +872,7 @@ def mostrar_editor_datos():
         st.download_button(
             label="⬇️ Descargar CSV",
             data=csv_buffer.getvalue(),
-            file_name=f"{tabla_seleccionada.lower().replace(' ', '_')}.csv",
+            file_name=f"{clave_tabla}.csv",
             mime="text/csv",
             use_container_width=True
         )
@@ -534,11 +882,155 @@ def mostrar_editor_datos():
         st.download_button(
             label="⬇️ Descargar JSON",
             data=json_data,
-            file_name=f"{tabla_seleccionada.lower().replace(' ', '_')}.json",
+            file_name=f"{clave_tabla}.json",
             mime="application/json",
             use_container_width=True
         )
 
+# =============================================
+# FICHAS DE CLIENTE / PRODUCTO / SUCURSAL
+# =============================================
+
+def mostrar_fichas():
+    """Detalle de un cliente, producto o sucursal con sus facturas (vía índices por clave)"""
+    st.header("🔍 Fichas")
+    
+    datos = cargar_datos_completos()
+    indices = obtener_indices_claves()
+    with obtener_vigilante().lock:
+        indices.sincronizar(datos)
+        encabezado = datos['facturas_encabezado']
+        detalle = datos['facturas_detalle']
+        version_datos = obtener_vigilante().version
+    
+    tipo = st.radio("Ver ficha de:", ["👥 Cliente", "📦 Producto", "🏪 Sucursal"], horizontal=True)
+    
+    try:
+        if tipo == "👥 Cliente":
+            clientes = datos['clientes']
+            nombres = dict(zip(clientes['id_cliente'], clientes['nombre'].astype(str) + ' ' + clientes['apellido'].astype(str)))
+            id_cliente = st.selectbox("Cliente:", list(nombres), format_func=lambda i: f"{i} - {nombres[i]}")
+            facturas = indices.filas('facturas_encabezado', 'id_cliente', id_cliente)
+            lineas = indices.filas_varias('facturas_detalle', 'id_factura', facturas['id_factura'])
+        elif tipo == "📦 Producto":
+            productos = datos['productos']
+            nombres = dict(zip(productos['id_producto'], productos['descripcion']))
+            id_producto = st.selectbox("Producto:", list(nombres), format_func=lambda i: f"{i} - {nombres[i]}")
+            lineas = indices.filas('facturas_detalle', 'id_producto', id_producto)
+            facturas = indices.filas_varias('facturas_encabezado', 'id_factura', lineas['id_factura'])
+        else:
+            sucursales = datos['sucursales']
+            nombres = dict(zip(sucursales['id_sucursal'], sucursales['nombre']))
+            id_sucursal = st.selectbox("Sucursal:", list(nombres), format_func=lambda i: f"{i} - {nombres[i]}")
+            facturas = indices.filas('facturas_encabezado', 'id_sucursal', id_sucursal)
+            lineas = indices.filas_varias('facturas_detalle', 'id_factura', facturas['id_factura'])
+    except Exception as e:
+        st.error(f"❌ Error al buscar la ficha: {e}")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Facturas", len(facturas))
+    with col2:
+        st.metric("Total facturado", f"${sumar(facturas['total_venta']):,.2f}")
+    with col3:
+        st.metric("Unidades", int(lineas['cantidad'].sum()) if not lineas.empty else 0)
+    with col4:
+        ultima = facturas['fecha'].max() if not facturas.empty else None
+        st.metric("Última factura", ultima.strftime('%d/%m/%Y') if pd.notna(ultima) else "-")
+    
+    if tipo == "👥 Cliente":
+        rfm = obtener_caracteristicas_clientes(version_datos, encabezado).obtener(int(id_cliente))
+        if rfm:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Recencia", f"{rfm['recencia_dias']} días")
+            with col2:
+                st.metric("Frecuencia mensual", f"{rfm['frecuencia_mensual']:.2f}")
+            with col3:
+                st.metric("Ticket promedio", f"${rfm['ticket_promedio']:,.2f}")
+    
+    if facturas.empty:
+        st.info("ℹ️ No hay facturas para esta selección")
+        return
+    
+    st.subheader("🧾 Facturas")
+    st.dataframe(facturas.sort_values('fecha', ascending=False), use_container_width=True, hide_index=True)
+    st.subheader("📋 Detalle")
+    st.dataframe(lineas, use_container_width=True, hide_index=True)
+    if st.session_state.datos_completos.editadas():
+        st.caption("✏️ Las fichas muestran los datos confirmados; las ediciones sin confirmar no se ven")
+
+# =============================================
+# CONSULTA SQL
+# =============================================
+
+CONSULTA_EJEMPLO = """SELECT nombre_sucursal, COUNT(*) AS facturas, SUM(total_venta) AS ventas
+FROM facturas_completas
+GROUP BY nombre_sucursal
+ORDER BY ventas DESC"""
+
+def mostrar_consulta_sql():
+    """Consultas SQL de solo lectura sobre todas las tablas, con resultados por páginas"""
+    st.header("🧮 Consulta SQL")
+    
+    try:
+        motor = obtener_motor_sql(obtener_vigilante().version)
+    except Exception as e:
+        st.error(f"❌ No se pudo preparar el motor SQL: {e}")
+        return
+    
+    with st.expander(f"📚 Tablas disponibles (motor: {motor.motor})"):
+        for nombre in motor.tablas():
+            st.write(f"**{nombre}:**", ', '.join(motor.columnas(nombre)))
+    if st.session_state.datos_completos.editadas():
+        st.caption("✏️ Las consultas usan los datos confirmados; las ediciones sin confirmar no se ven")
+    
+    consulta = st.text_area("Consulta (SELECT / WITH):", value=CONSULTA_EJEMPLO, height=160)
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        filas_pagina = st.selectbox("Filas por página:", [FILAS_PAGINA, 500, 1000])
+    with col2:
+        st.write("")
+        if st.button("▶️ Ejecutar"):
+            st.session_state.consulta_sql = consulta
+            st.session_state.pagina_sql = 0
+    
+    if 'consulta_sql' not in st.session_state:
+        return
+    
+    pagina = st.session_state.pagina_sql
+    try:
+        inicio = datetime.now()
+        with medir('consulta_sql') as medicion:
+            resultado, hay_mas = motor.pagina(st.session_state.consulta_sql, pagina, filas_pagina)
+            medicion.filas_salida = len(resultado)
+        milisegundos = (datetime.now() - inicio).total_seconds() * 1000
+    except Exception as e:
+        st.error(f"❌ Error en la consulta: {e}")
+        return
+    
+    col_ant, col_info, col_sig = st.columns([1, 3, 1])
+    with col_ant:
+        if st.button("⬅️ Anterior", disabled=pagina == 0, use_container_width=True):
+            st.session_state.pagina_sql -= 1
+            st.rerun()
+    with col_info:
+        desde = pagina * filas_pagina
+        st.caption(f"📄 Página {pagina + 1} · filas {desde + 1}-{desde + len(resultado)} · {milisegundos:.0f} ms")
+    with col_sig:
+        if st.button("➡️ Siguiente", disabled=not hay_mas, use_container_width=True):
+            st.session_state.pagina_sql += 1
+            st.rerun()
+    
+    st.dataframe(resultado, use_container_width=True)
+    st.download_button(
+        label="⬇️ Descargar página (CSV)",
+        data=resultado.to_csv(index=False),
+        file_name=f"consulta_pagina_{pagina + 1}.csv",
+        mime="text/csv"
+    )
+
 # =============================================
 # FUNCIONES DE EXPORTACIÓN
 # =============================================
@@ -598,27 +1090,89 @@ def mostrar_exportacion_datos():
     # Exportación completa
     st.subheader("📦 Exportación Completa del Sistema")
     
-    if st.button("🎁 Generar Paquete Completo", use_container_width=True):
-        # Crear archivo ZIP con todos los datos
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-            for nombre_tabla, clave_tabla in tablas:
-                df = datos[clave_tabla]
-                zip_file.writestr(f"{clave_tabla}.csv", df.to_csv(index=False))
-                zip_file.writestr(f"{clave_tabla}.json", df.to_json(orient="records", indent=4, force_ascii=False))
-        
-        st.download_button(
-            label="⬇️ Descargar Paquete Completo (ZIP)",
-            data=zip_buffer.getvalue(),
-            file_name="sistema_ventas_completo.zip",
-            mime="application/zip",
-            use_container_width=True
+    col_formatos, col_compresion = st.columns(2)
+
+    with col_formatos:
+        formatos = st.multiselect(
+            "Formatos a incluir:",
+            paquete_exportacion.formatos_disponibles(),
+            default=['csv', 'json']
         )
 
+    with col_compresion:
+        compresion = st.selectbox("Compresión:", paquete_exportacion.compresiones_disponibles())
+
+    if st.button("🎁 Generar Paquete Completo", use_container_width=True, disabled=not formatos):
+        try:
+            with st.spinner("🔄 Generando paquete..."):
+                ruta_paquete, reutilizado = paquete_exportacion.construir_paquete(
+                    datos,
+                    [clave_tabla for _, clave_tabla in tablas],
+                    formatos=formatos,
+                    compresion=compresion
+                )
+        except Exception as e:
+            st.error(f"❌ Error al generar el paquete: {e}")
+            return
+
+        if reutilizado:
+            st.info("♻️ Los datos no cambiaron: se reutiliza el último paquete generado")
+
+        tamanio_mb = round(os.path.getsize(ruta_paquete) / 1024**2, 2)
+        with open(ruta_paquete, 'rb') as archivo_zip:
+            st.download_button(
+                label=f"⬇️ Descargar Paquete Completo (ZIP, {tamanio_mb} MB)",
+                data=archivo_zip,
+                file_name="sistema_ventas_completo.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+
 # =============================================
 # DASHBOARD PRINCIPAL (ACTUALIZADO CON TENDENCIAS)
 # =============================================
 
+def mostrar_filtros(indice_filtros, datos):
+    """Controles de período, sucursal y provincia; devuelve la selección resuelta"""
+    fecha_min, fecha_max = indice_filtros.rango_fechas()
+    nombres_sucursales = datos['sucursales'].set_index('id_sucursal')['nombre'].to_dict()
+    nombres_provincias = datos['provincias'].set_index('id_provincia')['nombre'].to_dict()
+    
+    with st.expander("🔎 Filtros", expanded=False):
+        col_fechas, col_sucursales, col_provincias = st.columns(3)
+        
+        with col_fechas:
+            periodo = st.date_input(
+                "Período:",
+                value=(fecha_min, fecha_max) if fecha_min else (),
+                min_value=fecha_min,
+                max_value=fecha_max
+            )
+        with col_sucursales:
+            sucursales = st.multiselect(
+                "Sucursales:",
+                list(nombres_sucursales),
+                format_func=lambda s: nombres_sucursales.get(s, str(s))
+            )
+        with col_provincias:
+            provincias = st.multiselect(
+                "Provincias:",
+                list(nombres_provincias),
+                format_func=lambda p: nombres_provincias.get(p, str(p))
+            )
+    
+    # Mientras se elige el rango, date_input devuelve una sola fecha
+    desde = hasta = None
+    if len(periodo) == 2 and (periodo[0], periodo[1]) != (fecha_min, fecha_max):
+        desde, hasta = periodo
+    
+    with medir('resolver_filtros', len(indice_filtros.facturas)) as medicion:
+        seleccion = indice_filtros.resolver(desde, hasta, sucursales, provincias)
+        medicion.filas_salida = seleccion.cantidad_filas()
+    if seleccion.filtrada:
+        st.caption(f"🔎 Mostrando {seleccion.cantidad_filas():,} de {len(indice_filtros.facturas):,} facturas")
+    return seleccion
+
 def mostrar_dashboard_principal():
     """Dashboard principal con métricas y gráficos"""
     st.header("📊 Dashboard Principal - Sistema de Ventas Completo")
@@ -628,10 +1182,24 @@ def mostrar_dashboard_principal():
         return
         
     datos = st.session_state.datos_completos
+    version_filtros, tablas_filtros = tablas_versionadas(datos, TABLAS_FILTROS)
+    indice_filtros = obtener_indice_filtros(version_filtros, *tablas_filtros)
+    if indice_filtros is None:
+        return
+    
+    seleccion = mostrar_filtros(indice_filtros, datos)
+    clave_datos = (indice_filtros.version, seleccion.clave())
     
     # Métricas principales
-    total_ventas = datos['facturas_encabezado']['total_venta'].sum()
-    total_facturas = len(datos['facturas_encabezado'])
+    version_hechos, hechos = tablas_versionadas(cargar_datos_completos(), TABLAS_HECHOS)
+    almacen = obtener_almacen_columnar(version_hechos, *hechos)
+    editadas = datos.editadas() if isinstance(datos, VistaDatos) else []
+    if almacen is not None and not seleccion.filtrada and not set(editadas) & set(TABLAS_HECHOS):
+        # Sin filtros: suma exacta sobre la columna mapeada, sin pasar por pandas
+        total_ventas = almacen.tabla('facturas_encabezado').suma('total_venta')
+    else:
+        total_ventas = sumar(seleccion.facturas()['total_venta'])
+    total_facturas = seleccion.cantidad_filas()
     total_clientes = len(datos['clientes'])
     total_productos = len(datos['productos'])
     
@@ -648,68 +1216,104 @@ def mostrar_dashboard_principal():
     
     st.markdown("---")
     
-    # NUEVA SECCIÓN: TENDENCIAS TEMPORALES
+    # Solo se calcula la sección abierta
+    secciones = Secciones('dashboard4')
+    secciones.registrar("📈 Tendencia Temporal", mostrar_seccion_tendencias, seleccion, clave_datos)
+    secciones.registrar("📊 Análisis por Categorías", mostrar_seccion_categorias, datos, seleccion, clave_datos)
+    secciones.registrar("📅 Ventas Mensuales", mostrar_seccion_ventas_mensuales, seleccion, clave_datos)
+    secciones.mostrar("Sección del dashboard:")
+
+def mostrar_seccion_tendencias(seleccion, clave_datos):
+    """Tendencia diaria/semanal/mensual/anual"""
     st.subheader("📈 Análisis de Tendencia Temporal")
     
-    # Gráfico completo de tendencias
-    fig_tendencia_completa = crear_grafico_tendencia_ventas_completo(datos['facturas_encabezado'])
+    # Gráfico completo de tendencias (con zoom y resolución según el ancho)
+    fechas = seleccion.facturas()['fecha']
+    col_zoom, col_ancho = st.columns([3, 1])
+    zoom = None
+    
+    with col_zoom:
+        if len(fechas) > 0 and fechas.min() < fechas.max():
+            fecha_min, fecha_max = fechas.min().date(), fechas.max().date()
+            rango = st.slider(
+                "🔍 Zoom de la tendencia:",
+                min_value=fecha_min,
+                max_value=fecha_max,
+                value=(fecha_min, fecha_max),
+                format="DD/MM/YYYY"
+            )
+            if rango != (fecha_min, fecha_max):
+                zoom = rango
+    
+    with col_ancho:
+        ancho_px = st.selectbox(
+            "Resolución (px):",
+            [800, 1200, 1600, 2400],
+            index=1,
+            help="Cantidad máxima de puntos diarios que se envían al navegador"
+        )
+    
+    fig_tendencia_completa = figura_cacheada(crear_grafico_tendencia_ventas_completo, clave_datos + (ancho_px, zoom), seleccion, ancho_px, zoom)
     st.plotly_chart(fig_tendencia_completa, use_container_width=True)
     
     # Gráficos individuales por período
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_semanales = crear_grafico_ventas_semanales(datos['facturas_encabezado'])
+        fig_semanales = figura_cacheada(crear_grafico_ventas_semanales, clave_datos, seleccion)
         st.plotly_chart(fig_semanales, use_container_width=True)
     
     with col2:
-        fig_mensuales_linea = crear_grafico_ventas_mensuales_lineas(datos['facturas_encabezado'])
+        fig_mensuales_linea = figura_cacheada(crear_grafico_ventas_mensuales_lineas, clave_datos, seleccion)
         st.plotly_chart(fig_mensuales_linea, use_container_width=True)
     
     # Gráfico anual
-    fig_anuales = crear_grafico_ventas_anuales(datos['facturas_encabezado'])
+    fig_anuales = figura_cacheada(crear_grafico_ventas_anuales, clave_datos, seleccion)
     st.plotly_chart(fig_anuales, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # SECCIÓN ORIGINAL: ANÁLISIS POR CATEGORÍAS
+
+def mostrar_seccion_categorias(datos, seleccion, clave_datos):
+    """Sucursales, productos, IVA, rubros y stock"""
     st.subheader("📊 Análisis por Categorías")
+    version_top, tablas_top = tablas_versionadas(datos, TABLAS_TOP)
+    indice_top = obtener_indice_top(version_top, *tablas_top)
     
     # Primera fila de gráficos originales
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_ventas_sucursal = crear_grafico_ventas_sucursal(datos['facturas_completas'])
+        fig_ventas_sucursal = figura_cacheada(crear_grafico_ventas_sucursal, clave_datos, seleccion)
         st.plotly_chart(fig_ventas_sucursal, use_container_width=True)
     
     with col2:
-        fig_top_productos = crear_grafico_top_productos_ventas(datos['detalles_completos'])
+        fig_top_productos = figura_cacheada(crear_grafico_top_productos_ventas, clave_datos, indice_top, datos['productos'], seleccion)
         st.plotly_chart(fig_top_productos, use_container_width=True)
     
     # Segunda fila de gráficos
     col3, col4 = st.columns(2)
     
     with col3:
-        fig_ventas_iva = crear_grafico_ventas_tipo_iva(datos['facturas_completas'])
+        fig_ventas_iva = figura_cacheada(crear_grafico_ventas_tipo_iva, clave_datos, seleccion)
         st.plotly_chart(fig_ventas_iva, use_container_width=True)
     
     with col4:
-        fig_productos_vendidos = crear_grafico_productos_mas_vendidos(datos['detalles_completos'])
+        fig_productos_vendidos = figura_cacheada(crear_grafico_productos_mas_vendidos, clave_datos, indice_top, datos['productos'], seleccion)
         st.plotly_chart(fig_productos_vendidos, use_container_width=True)
     
     # Tercera fila de gráficos
     col5, col6 = st.columns(2)
     
     with col5:
-        fig_ventas_rubro = crear_grafico_ventas_rubro(datos['detalles_completos'])
+        fig_ventas_rubro = figura_cacheada(crear_grafico_ventas_rubro, clave_datos, seleccion)
         st.plotly_chart(fig_ventas_rubro, use_container_width=True)
     
     with col6:
-        fig_stock_rubro = crear_grafico_stock_rubro(datos['productos_completos'])
+        version_stock, (productos_completos,) = tablas_versionadas(datos, ['productos_completos'])
+        fig_stock_rubro = figura_cacheada(crear_grafico_stock_rubro, version_stock, productos_completos)
         st.plotly_chart(fig_stock_rubro, use_container_width=True)
-    
-    # Cuarta fila - Gráfico de barras mensual original
-    fig_mensuales_barras = crear_grafico_ventas_mensuales(datos['facturas_encabezado'])
+
+def mostrar_seccion_ventas_mensuales(seleccion, clave_datos):
+    """Gráfico de barras mensual original"""
+    fig_mensuales_barras = figura_cacheada(crear_grafico_ventas_mensuales, clave_datos, seleccion)
     st.plotly_chart(fig_mensuales_barras, use_container_width=True)
 
 # =============================================
@@ -724,7 +1328,7 @@ def mostrar_sidebar():
     
     opcion = st.sidebar.radio(
         "Navegación",
-        ["📊 Dashboard", "🛠️ Editor de Datos", "📤 Exportación", "⚙️ Configuración"]
+        ["📊 Dashboard", "🔍 Fichas", "🛠️ Editor de Datos", "🧮 Consulta SQL", "📤 Exportación", "⚙️ Configuración"]
     )
     
     st.sidebar.markdown("---")
@@ -740,6 +1344,8 @@ def mostrar_sidebar():
             f"• {len(datos['proveedores'])} proveedores"
         )
     
+    panel_rendimiento()
+    
     return opcion
 
 # =============================================
@@ -753,7 +1359,7 @@ def main():
     if 'datos_completos' not in st.session_state:
         datos = cargar_datos_completos()
         if datos is not None:
-            st.session_state.datos_completos = datos
+            st.session_state.datos_completos = VistaDatos(datos)
         else:
             st.error("❌ No se pudieron cargar los datos. Verifica la carpeta 'datos/'")
             # Mostrar qué archivos hay disponibles
@@ -762,6 +1368,9 @@ def main():
                 st.info(f"📁 Archivos encontrados en 'datos/': {archivos}")
             return
     
+    # Recarga automática de los CSV modificados en datos/
+    vigilar_datos()
+    
     # Barra lateral
     opcion = mostrar_sidebar()
     
@@ -769,9 +1378,15 @@ def main():
     if opcion == "📊 Dashboard":
         mostrar_dashboard_principal()
     
+    elif opcion == "🔍 Fichas":
+        mostrar_fichas()
+    
     elif opcion == "🛠️ Editor de Datos":
         mostrar_editor_datos()
     
+    elif opcion == "🧮 Consulta SQL":
+        mostrar_consulta_sql()
+    
     elif opcion == "📤 Exportación":
         mostrar_exportacion_datos()
     
@@ -800,6 +1415,30 @@ def main():
             st.write(f"• 🗺️ Provincias: {len(datos['provincias'])} registros")
             st.write(f"• 💸 Ventas: {len(datos['ventas'])} registros")
         
+        mapeados_mb = round(obtener_servicio_datos().bytes_mapeados() / 1024**2, 2)
+        copiados_mb = round(obtener_servicio_datos().bytes_copiados() / 1024**2, 2)
+        calidad = obtener_estado_calidad()['resultado']
+        version_hechos, hechos = tablas_versionadas(cargar_datos_completos(), TABLAS_HECHOS)
+        almacen = obtener_almacen_columnar(version_hechos, *hechos)
+        almacen_mb = round(almacen.bytes() / 1024**2, 2) if almacen is not None else 0
+        editadas = datos.editadas() if isinstance(datos, VistaDatos) else []
+        registro = obtener_registro_cambios().resumen()
+        st.caption(
+            f"🗺️ {mapeados_mb} MB compartidos entre todas las sesiones (Arrow mapeado en memoria; "
+            f"{copiados_mb} MB de columnas con faltantes copiados en cada proceso) · "
+            f"🧱 Almacén columnar de facturas y ventas: {almacen_mb} MB ('{CARPETA_COLUMNAR}/') · "
+            f"{INFORME_MEMORIA.texto()} · "
+            f"{calidad.texto() if calidad else '🧪 Calidad de datos: sin validar'} · "
+            f"✏️ Tablas editadas en esta sesión: {', '.join(editadas) if editadas else 'ninguna'} · "
+            f"💾 Registro de cambios: {registro['lotes']} lotes, {registro['cambios']} filas"
+        )
+        
+        if calidad is not None and not calidad.violaciones.empty:
+            with st.expander(f"🧪 Violaciones de calidad ({len(calidad.violaciones)})"):
+                st.dataframe(calidad.resumen(), use_container_width=True, hide_index=True)
+                st.dataframe(calidad.violaciones.head(1000), use_container_width=True, hide_index=True)
+                st.caption(f"📁 Informe completo y filas en cuarentena en '{CARPETA_CALIDAD}/'")
+        
         # Mostrar estructura de datos importantes
         with st.expander("🔍 Ver estructura de datos"):
             st.write("**Clientes:**", list(datos['clientes'].columns))
@@ -807,11 +1446,24 @@ def main():
             st.write("**Sucursales:**", list(datos['sucursales'].columns))
             st.write("**Localidades:**", list(datos['localidades'].columns))
         
+        st.subheader("🗃️ Cache de Gráficos")
+        estadisticas = obtener_cache_figuras().estadisticas()
+        col_cache1, col_cache2, col_cache3 = st.columns(3)
+        with col_cache1:
+            st.metric("Figuras guardadas", estadisticas['figuras'])
+        with col_cache2:
+            st.metric("Tamaño (MB)", round(estadisticas['bytes'] / 1024**2, 2))
+        with col_cache3:
+            st.metric("Aciertos / Fallos", f"{estadisticas['aciertos']} / {estadisticas['fallos']}")
+        if st.button("🧹 Vaciar Cache de Gráficos"):
+            obtener_cache_figuras().limpiar()
+            st.success("✅ Cache de gráficos vaciado")
+        
         st.subheader("🔄 Recargar Datos")
         if st.button("🔄 Recargar Todos los Datos"):
             nuevos_datos = cargar_datos_completos()
             if nuevos_datos is not None:
-                st.session_state.datos_completos = nuevos_datos
+                st.session_state.datos_completos = VistaDatos(nuevos_datos)
                 st.success("✅ Datos recargados correctamente")
                 st.rerun()
             else:
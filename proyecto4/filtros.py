@@ -0,0 +1,130 @@
+# proyecto4/filtros.py
+# Filtros de período, sucursal y provincia para el dashboard principal.
+# Las facturas se guardan ordenadas por (id_sucursal, fecha): así cada
+# sucursal es un bloque contiguo y un rango de fechas dentro del bloque se
+# encuentra con búsqueda binaria. Un filtro se resuelve a una lista de rangos
+# de filas y los gráficos trabajan solo sobre esas filas. El detalle se
+# ordena por id_factura para ubicar las líneas de cada factura del mismo modo.
+
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+
+
+def _posiciones(inicios, fines):
+    """Concatena los arange(inicio, fin) de cada rango sin recorrerlos en Python"""
+    largos = fines - inicios
+    total = int(largos.sum())
+    if total == 0:
+        return np.empty(0, dtype='int64')
+    desplazamientos = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+    return desplazamientos + np.arange(total)
+
+
+class IndiceFiltros:
+    """Facturas y detalle preparados para filtrar por rangos de filas"""
+
+    def __init__(self, facturas_encabezado, facturas_detalle, productos, rubros,
+                 sucursales, condicion_iva, localidades):
+        # Identifica estos datos (ej. en claves de cache); cambia al reconstruir el índice
+        self.version = uuid4().hex
+        facturas = facturas_encabezado.copy()
+        facturas['fecha'] = pd.to_datetime(facturas['fecha'])
+        facturas['nombre_sucursal'] = facturas['id_sucursal'].map(sucursales.set_index('id_sucursal')['nombre'])
+        facturas['tipo_iva'] = facturas['id_condicion_iva'].map(condicion_iva.set_index('id_condicion_iva')['descripcion'])
+        self.facturas = facturas.sort_values(['id_sucursal', 'fecha'], kind='stable').reset_index(drop=True)
+        self._fechas = self.facturas['fecha'].to_numpy()
+
+        # Bloque [inicio, fin) de cada sucursal dentro de las facturas ordenadas
+        ids_sucursal = self.facturas['id_sucursal'].to_numpy()
+        valores, inicios = np.unique(ids_sucursal, return_index=True)
+        fines = np.append(inicios[1:], len(ids_sucursal))
+        self._bloques = {int(s): (int(i), int(f)) for s, i, f in zip(valores, inicios, fines)}
+
+        # Provincia de cada sucursal (por su localidad)
+        provincia_localidad = localidades.set_index('id_localidad')['id_provincia']
+        self.provincia_sucursal = sucursales.set_index('id_sucursal')['id_localidad'].map(provincia_localidad)
+
+        detalle = facturas_detalle.copy()
+        detalle['nombre_producto'] = detalle['id_producto'].map(productos.set_index('id_producto')['descripcion'])
+        rubro_producto = productos.set_index('id_producto')['id_rubro'].map(rubros.set_index('id_rubro')['descripcion'])
+        detalle['nombre_rubro'] = detalle['id_producto'].map(rubro_producto)
+        self.detalles = detalle.sort_values('id_factura', kind='stable').reset_index(drop=True)
+        self._ids_detalle = self.detalles['id_factura'].to_numpy()
+
+    def rango_fechas(self):
+        if self.facturas.empty:
+            return None, None
+        return self.facturas['fecha'].min().date(), self.facturas['fecha'].max().date()
+
+    def resolver(self, desde=None, hasta=None, sucursales=None, provincias=None):
+        """Convierte un filtro en la selección de rangos de filas correspondiente"""
+        elegidas = set(self._bloques)
+        if sucursales:
+            elegidas &= {int(s) for s in sucursales}
+        if provincias:
+            elegidas &= {int(s) for s, p in self.provincia_sucursal.items() if p in set(provincias)}
+
+        rangos = []
+        for sucursal in sorted(elegidas):
+            inicio, fin = self._bloques[sucursal]
+            fechas = self._fechas[inicio:fin]
+            if desde is not None:
+                inicio += int(np.searchsorted(fechas, np.datetime64(pd.Timestamp(desde)), side='left'))
+            if hasta is not None:
+                # Hasta inclusive: todo el día indicado
+                limite = np.datetime64(pd.Timestamp(hasta) + pd.Timedelta(days=1))
+                fin = self._bloques[sucursal][0] + int(np.searchsorted(fechas, limite, side='left'))
+            if fin > inicio:
+                rangos.append((inicio, fin))
+
+        filtrada = bool(desde is not None or hasta is not None or sucursales or provincias)
+        return Seleccion(self, rangos, sorted(elegidas), desde, hasta, filtrada)
+
+
+class Seleccion:
+    """Rangos de filas de un filtro; las tablas filtradas se arman una sola vez"""
+
+    def __init__(self, indice, rangos, sucursales, desde, hasta, filtrada):
+        self.indice = indice
+        self.rangos = rangos
+        self.sucursales = sucursales
+        self.desde = desde
+        self.hasta = hasta
+        self.filtrada = filtrada
+        self._facturas = None
+        self._detalles = None
+
+    def clave(self):
+        """Estado del filtro, utilizable como clave de cache"""
+        if not self.filtrada:
+            return None
+        return (tuple(self.sucursales), str(self.desde), str(self.hasta))
+
+    def cantidad_filas(self):
+        return sum(fin - inicio for inicio, fin in self.rangos)
+
+    def facturas(self):
+        """Facturas (con sucursal y tipo de IVA) dentro del filtro"""
+        if self._facturas is None:
+            if not self.filtrada:
+                self._facturas = self.indice.facturas
+            else:
+                inicios = np.array([r[0] for r in self.rangos], dtype='int64')
+                fines = np.array([r[1] for r in self.rangos], dtype='int64')
+                self._facturas = self.indice.facturas.iloc[_posiciones(inicios, fines)]
+        return self._facturas
+
+    def detalles(self):
+        """Líneas de las facturas del filtro (con producto y rubro)"""
+        if self._detalles is None:
+            if not self.filtrada:
+                self._detalles = self.indice.detalles
+            else:
+                ids = self.facturas()['id_factura'].to_numpy()
+                ids_detalle = self.indice._ids_detalle
+                inicios = np.searchsorted(ids_detalle, ids, side='left')
+                fines = np.searchsorted(ids_detalle, ids, side='right')
+                self._detalles = self.indice.detalles.iloc[_posiciones(inicios, fines)]
+        return self._detalles
@@ -0,0 +1,151 @@
+# proyecto4/paquete_exportacion.py
+
+import os
+import io
+import glob
+import hashlib
+import threading
+import zipfile
+import itertools
+import importlib.util
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+# =============================================
+# CONFIGURACIÓN DEL PAQUETE
+# =============================================
+
+CARPETA_PAQUETES = '.paquetes'
+PAQUETES_A_CONSERVAR = 3
+TAMANIO_BLOQUE = 1024 * 1024
+
+# Métodos de compresión soportados por zipfile (zstd requiere Python 3.14+)
+COMPRESIONES = {
+    'deflate': (zipfile.ZIP_DEFLATED, 6),
+    'zstd': (getattr(zipfile, 'ZIP_ZSTANDARD', None), 3),
+    'lzma': (zipfile.ZIP_LZMA, None),
+    'sin compresión': (zipfile.ZIP_STORED, None),
+}
+
+FORMATOS = ['csv', 'json', 'parquet']
+
+# =============================================
+# DISPONIBILIDAD DE FORMATOS Y COMPRESIONES
+# =============================================
+
+def parquet_disponible():
+    """Indica si hay un motor Parquet (pyarrow o fastparquet) instalado"""
+    return any(importlib.util.find_spec(motor) is not None for motor in ('pyarrow', 'fastparquet'))
+
+def compresiones_disponibles():
+    """Lista las compresiones que soporta esta versión de Python"""
+    return [nombre for nombre, (metodo, _) in COMPRESIONES.items() if metodo is not None]
+
+def formatos_disponibles():
+    """Lista los formatos de miembro que se pueden generar"""
+    return [formato for formato in FORMATOS if formato != 'parquet' or parquet_disponible()]
+
+# =============================================
+# SERIALIZACIÓN DE TABLAS
+# =============================================
+
+def serializar_tabla(clave_tabla, df, formato):
+    """Serializa una tabla en el formato pedido y devuelve (nombre_miembro, bytes)"""
+    if formato == 'csv':
+        contenido = df.to_csv(index=False).encode('utf-8')
+    elif formato == 'json':
+        contenido = df.to_json(orient="records", indent=4, force_ascii=False).encode('utf-8')
+    elif formato == 'parquet':
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        contenido = buffer.getvalue()
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+    return f"{clave_tabla}.{formato}", contenido
+
+def huella_paquete(datos, claves_tablas, formatos, compresion):
+    """Huella de los datos y opciones del paquete; cambia solo si cambia algún dato"""
+    huella = hashlib.sha256()
+    huella.update(repr((sorted(formatos), compresion)).encode('utf-8'))
+    for clave_tabla in claves_tablas:
+        df = datos[clave_tabla]
+        huella.update(clave_tabla.encode('utf-8'))
+        huella.update(repr([(str(col), str(tipo)) for col, tipo in df.dtypes.items()]).encode('utf-8'))
+        huella.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return huella.hexdigest()[:16]
+
+# =============================================
+# CONSTRUCCIÓN DEL PAQUETE
+# =============================================
+
+def _escribir_miembro(zip_file, nombre_miembro, contenido, formato):
+    """Escribe un miembro al ZIP en bloques para no duplicar el buffer"""
+    destino = nombre_miembro
+    # Parquet ya viene comprimido: recomprimirlo solo gasta CPU
+    if formato == 'parquet':
+        destino = zipfile.ZipInfo(nombre_miembro)
+        destino.compress_type = zipfile.ZIP_STORED
+    vista = memoryview(contenido)
+    with zip_file.open(destino, 'w', force_zip64=True) as miembro:
+        for inicio in range(0, len(vista), TAMANIO_BLOQUE):
+            miembro.write(vista[inicio:inicio + TAMANIO_BLOQUE])
+
+def _limpiar_paquetes_viejos(carpeta):
+    """Borra los paquetes más antiguos dejando solo los más recientes"""
+    paquetes = sorted(glob.glob(os.path.join(carpeta, 'paquete_*.zip')), key=os.path.getmtime, reverse=True)
+    for ruta in paquetes[PAQUETES_A_CONSERVAR:]:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+def construir_paquete(datos, claves_tablas, formatos=('csv', 'json'), compresion='deflate',
+                      carpeta=CARPETA_PAQUETES, max_workers=None):
+    """Genera el ZIP del sistema en disco y devuelve (ruta, reutilizado).
+
+    Las tablas se serializan en paralelo y cada resultado se vuelca al archivo
+    apenas está listo. Hay a lo sumo una serialización en curso por hilo, así
+    que en memoria solo conviven esos resultados. Si ya existe un paquete con la misma huella de datos y
+    opciones se reutiliza sin volver a serializar nada.
+    """
+    if compresion not in compresiones_disponibles():
+        raise ValueError(f"Compresión no disponible: {compresion}")
+    if 'parquet' in formatos and not parquet_disponible():
+        raise ValueError("Parquet requiere tener instalado pyarrow o fastparquet")
+
+    os.makedirs(carpeta, exist_ok=True)
+    huella = huella_paquete(datos, claves_tablas, formatos, compresion)
+    ruta_paquete = os.path.join(carpeta, f"paquete_{huella}.zip")
+    if os.path.exists(ruta_paquete):
+        return ruta_paquete, True
+
+    # Escribir a un temporal y renombrar para no dejar paquetes a medias
+    ruta_temporal = f"{ruta_paquete}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        metodo, nivel = COMPRESIONES[compresion]
+        # Mismo valor por defecto que ThreadPoolExecutor
+        hilos = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        pendientes = ((clave_tabla, formato) for clave_tabla in claves_tablas for formato in formatos)
+        with zipfile.ZipFile(ruta_temporal, 'w', compression=metodo, compresslevel=nivel) as zip_file, \
+                ThreadPoolExecutor(max_workers=hilos) as executor:
+            futuros = {}
+            while True:
+                for clave_tabla, formato in itertools.islice(pendientes, hilos - len(futuros)):
+                    futuros[executor.submit(serializar_tabla, clave_tabla, datos[clave_tabla], formato)] = formato
+                if not futuros:
+                    break
+                listos, _ = wait(futuros, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    # Se escribe y se suelta: el contenido no queda vivo en futuros
+                    formato = futuros.pop(futuro)
+                    nombre_miembro, contenido = futuro.result()
+                    _escribir_miembro(zip_file, nombre_miembro, contenido, formato)
+                    del futuro, contenido
+        os.replace(ruta_temporal, ruta_paquete)
+    finally:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+
+    _limpiar_paquetes_viejos(carpeta)
+    return ruta_paquete, False
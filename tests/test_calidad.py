@@ -0,0 +1,43 @@
+# tests/test_calidad.py
+# Validación de calidad: las filas con valores inválidos van a cuarentena y
+# las limpias quedan con los tipos del registro (una fecha inválida dejaba
+# toda la columna como texto).
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.calidad import ORDEN, validar
+from comun.esquemas import aplicar_esquema
+
+DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'proyecto4', 'datos')
+
+
+def _crudas():
+    """Tablas como las lee el cargador: con el esquema aplicado sobre el CSV"""
+    return {nombre: pd.read_csv(os.path.join(DATOS, f"{nombre}.csv")) for nombre in ORDEN}
+
+
+def test_limpias_recuperan_los_tipos():
+    crudas = _crudas()
+    crudas['facturas_encabezado'].loc[3, 'fecha'] = 'xx'
+    crudas['clientes'] = crudas['clientes'].astype({'id_localidad': 'object'})
+    crudas['clientes'].loc[0, 'id_localidad'] = 'abc'
+    datos = {nombre: aplicar_esquema(df, nombre) for nombre, df in crudas.items()}
+    assert not pd.api.types.is_datetime64_any_dtype(datos['facturas_encabezado']['fecha'])
+
+    resultado = validar(datos)
+    encabezado = resultado.limpias['facturas_encabezado']
+    assert pd.api.types.is_datetime64_any_dtype(encabezado['fecha'])
+    assert resultado.limpias['clientes']['id_localidad'].dtype == 'int32'
+    assert len(resultado.cuarentena['facturas_encabezado']) >= 1
+    assert set(resultado.violaciones['regla']) >= {'fecha inválida', 'id_localidad sin fila válida en localidades'}
+
+
+def test_sin_violaciones_deja_las_tablas_como_estaban():
+    datos = {nombre: aplicar_esquema(df, nombre) for nombre, df in _crudas().items()}
+    resultado = validar(datos)
+    assert resultado.violaciones.empty
+    assert all(resultado.limpias[nombre] is datos[nombre] for nombre in datos)
@@ -0,0 +1,55 @@
+# tests/test_caracteristicas_clientes.py
+# Almacén de características: bloques desordenados contra la marca previa al
+# recorrido tienen que dar lo mismo que el encabezado entero de una vez.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.caracteristicas_clientes import AlmacenCaracteristicas
+from comun.esquemas import aplicar_esquema
+
+DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'proyecto4', 'datos')
+
+
+def _encabezado():
+    df = pd.read_csv(os.path.join(DATOS, 'facturas_encabezado.csv'))
+    return aplicar_esquema(df, 'facturas_encabezado')
+
+
+def test_bloques_desordenados_con_marca_fija():
+    encabezado = _encabezado()
+    esperado = AlmacenCaracteristicas()
+    esperado.actualizar(encabezado)
+
+    # Primera carga parcial; después el archivo completo mezclado en bloques de 3
+    obtenido = AlmacenCaracteristicas()
+    obtenido.actualizar(encabezado[encabezado['id_factura'] <= 4])
+    desordenado = encabezado.sample(frac=1, random_state=7)
+    desde = obtenido.ultima_factura
+    for inicio in range(0, len(desordenado), 3):
+        obtenido.actualizar(desordenado.iloc[inicio:inicio + 3], desde=desde)
+    assert obtenido.ultima_factura == desde
+    obtenido.ultima_factura = int(desordenado['id_factura'].max())
+
+    pd.testing.assert_frame_equal(obtenido.exportar(), esperado.exportar())
+    assert obtenido.ultima_factura == esperado.ultima_factura
+    assert np.array_equal(obtenido.monto_centavos[:len(esperado.monto_centavos)], esperado.monto_centavos)
+
+
+def test_facturas_sin_fecha_se_ignoran():
+    encabezado = _encabezado()
+    esperado = AlmacenCaracteristicas()
+    esperado.actualizar(encabezado.iloc[1:])
+
+    # Una fecha vacía no puede contar como 1970-01-01 en primera_compra
+    con_vacia = encabezado.astype({'fecha': 'object'})
+    con_vacia.loc[0, 'fecha'] = ''
+    obtenido = AlmacenCaracteristicas()
+    assert obtenido.actualizar(con_vacia) == len(encabezado) - 1
+
+    pd.testing.assert_frame_equal(obtenido.exportar(), esperado.exportar())
+    assert obtenido.ultima_factura == int(encabezado['id_factura'].max())
@@ -0,0 +1,52 @@
+# tests/test_indice_claves.py
+# Índices CSR por clave: las búsquedas (con filas agregadas en el tramo
+# pendiente y después de consolidar) dan las mismas filas que una máscara, y
+# agregar sobre una tabla que se reemplazó reconstruye el índice.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.indice_claves import IndiceCSR, IndicesClaves
+
+
+def test_busquedas_iguales_a_una_mascara():
+    rng = np.random.default_rng(5)
+    valores = rng.integers(0, 200, 5000)
+    indice = IndiceCSR(valores)
+    # Lotes chicos quedan pendientes; el último supera el tramo y se consolida
+    for largo in [10, 300, 2000]:
+        lote = rng.integers(0, 250, largo)
+        indice.agregar(lote)
+        valores = np.concatenate([valores, lote])
+        for clave in [0, 7, 199, 230, 999]:
+            assert np.array_equal(np.sort(indice.buscar(clave)), np.flatnonzero(valores == clave))
+        claves = [3, 3, 150, 240, 999]
+        assert np.array_equal(indice.buscar_varias(claves), np.flatnonzero(np.isin(valores, claves)))
+
+
+def _encabezado(ids, clientes):
+    return pd.DataFrame({'id_factura': ids, 'id_cliente': clientes, 'id_sucursal': 1})
+
+
+def test_agregar_sobre_tabla_reemplazada_reconstruye():
+    indices = IndicesClaves({'facturas_encabezado': ['id_factura', 'id_cliente']})
+    a = _encabezado([1, 2, 3], [10, 11, 12])
+    indices.sincronizar({'facturas_encabezado': a})
+
+    # La tabla se reemplaza (recarga del CSV) sin que nadie consulte el índice
+    b = _encabezado([1, 2], [11, 11])
+    con_alta = pd.concat([b, _encabezado([4], [10])], ignore_index=True)
+    indices.agregar('facturas_encabezado', con_alta, 1, b)
+
+    filas = indices.filas('facturas_encabezado', 'id_cliente', 10)
+    assert filas['id_factura'].tolist() == [4]
+    assert indices.filas('facturas_encabezado', 'id_cliente', 11)['id_factura'].tolist() == [1, 2]
+
+    # Sobre la misma tabla, el alta se agrega al índice existente
+    otra = pd.concat([con_alta, _encabezado([5], [12])], ignore_index=True)
+    indices.agregar('facturas_encabezado', otra, 1, con_alta)
+    assert indices.filas('facturas_encabezado', 'id_cliente', 12)['id_factura'].tolist() == [5]
@@ -0,0 +1,124 @@
+# tests/test_registro_cambios.py
+# Registro de cambios: la edición de una sesión se compara con la tabla de la
+# que partió, así no deshace lo que otra sesión confirmó mientras tanto; los
+# deltas conservan los tipos de la tabla y se guardan y reaplican desde SQLite;
+# una edición con referencias inexistentes no pasa la validación.
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.calidad import CLAVES, ORDEN, tablas_relacionadas, validar
+from comun.esquemas import aplicar_esquema, sin_categorias
+from comun.registro_cambios import RegistroCambios, aplicar_delta, calcular_delta, conflictos
+from comun.servicio_datos import VistaDatos
+
+DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'proyecto4', 'datos')
+
+
+def _tabla(nombre):
+    return aplicar_esquema(pd.read_csv(os.path.join(DATOS, f"{nombre}.csv")), nombre)
+
+
+def _confirmar(compartidos, vista, nombre, clave):
+    """Lo que hace el dashboard al confirmar: delta contra la base y chequeo de conflictos"""
+    base = vista.base(nombre)
+    delta = calcular_delta(base, vista[nombre], clave)
+    chocan = conflictos(base, compartidos[nombre], delta)
+    if not chocan:
+        compartidos[nombre] = aplicar_delta(compartidos[nombre], delta)
+        del vista[nombre]
+    return chocan
+
+
+def test_confirmar_no_deshace_lo_de_otra_sesion():
+    compartidos = {'clientes': _tabla('clientes')}
+    sesion_a, sesion_b = VistaDatos(compartidos), VistaDatos(compartidos)
+
+    # A empieza a editar el primer cliente
+    editada_a = sin_categorias(sesion_a['clientes']).copy()
+    editada_a.loc[0, 'email'] = 'a@ejemplo.com'
+    sesion_a['clientes'] = editada_a
+
+    # Mientras tanto B cambia el segundo cliente, agrega uno y confirma
+    editada_b = sin_categorias(sesion_b['clientes']).copy()
+    editada_b.loc[1, 'email'] = 'b@ejemplo.com'
+    nueva = editada_b.iloc[[2]].assign(id_cliente=999)
+    sesion_b['clientes'] = pd.concat([editada_b, nueva], ignore_index=True)
+    assert _confirmar(compartidos, sesion_b, 'clientes', 'id_cliente') == []
+
+    # A confirma sobre la versión vieja: no elimina el alta de B ni revierte su cambio
+    assert _confirmar(compartidos, sesion_a, 'clientes', 'id_cliente') == []
+    final = compartidos['clientes'].set_index('id_cliente')
+    assert final.loc[999, 'nombre'] == nueva['nombre'].iloc[0]
+    assert final.loc[editada_b.loc[1, 'id_cliente'], 'email'] == 'b@ejemplo.com'
+    assert final.loc[editada_a.loc[0, 'id_cliente'], 'email'] == 'a@ejemplo.com'
+    assert len(final) == len(editada_b) + 1
+
+
+def test_conflicto_en_la_misma_clave():
+    compartidos = {'clientes': _tabla('clientes')}
+    sesion_a, sesion_b = VistaDatos(compartidos), VistaDatos(compartidos)
+    for sesion, email in [(sesion_a, 'a@ejemplo.com'), (sesion_b, 'b@ejemplo.com')]:
+        editada = sin_categorias(sesion['clientes']).copy()
+        editada.loc[0, 'email'] = email
+        sesion['clientes'] = editada
+
+    id_cliente = sesion_a['clientes'].loc[0, 'id_cliente']
+    assert _confirmar(compartidos, sesion_b, 'clientes', 'id_cliente') == []
+    assert _confirmar(compartidos, sesion_a, 'clientes', 'id_cliente') == [id_cliente]
+    # La edición de A sigue en su sesión y la de B quedó confirmada
+    assert sesion_a.editadas() == ['clientes']
+    assert compartidos['clientes'].set_index('id_cliente').loc[id_cliente, 'email'] == 'b@ejemplo.com'
+
+
+def test_alta_con_entero_vacio_queda_nullable():
+    clientes = _tabla('clientes')
+    editada = sin_categorias(clientes).copy()
+    nueva = editada.iloc[[0]].assign(id_cliente=999, id_localidad='')
+    delta = calcular_delta(clientes, pd.concat([editada, nueva], ignore_index=True), 'id_cliente')
+
+    resultado = aplicar_delta(clientes, delta)
+    assert str(resultado['id_localidad'].dtype) == 'Int32'
+    assert resultado['id_localidad'].isna().sum() == 1
+    assert resultado['id_cliente'].dtype == clientes['id_cliente'].dtype
+    assert isinstance(resultado['nombre'].dtype, pd.CategoricalDtype)
+
+
+def test_registro_guarda_y_reaplica(tmp_path):
+    clientes = _tabla('clientes')
+    registro = RegistroCambios(str(tmp_path / 'cambios.sqlite'))
+    editada = sin_categorias(clientes).copy()
+    editada.loc[0, 'email'] = 'nuevo@ejemplo.com'
+    primero = calcular_delta(clientes, editada, 'id_cliente')
+    segundo = calcular_delta(clientes, editada.drop(index=3), 'id_cliente')
+    assert registro.confirmar({'clientes': primero}) == 1
+    assert registro.confirmar({'clientes': segundo}) == 2
+
+    # Recarga: el registro acumulado sobre la tabla original da la misma tabla
+    esperado = aplicar_delta(aplicar_delta(clientes, primero), segundo)
+    recargado = aplicar_delta(clientes, registro.delta_acumulado('clientes'))
+    pd.testing.assert_frame_equal(
+        recargado.sort_values('id_cliente', ignore_index=True),
+        esperado.sort_values('id_cliente', ignore_index=True),
+    )
+    assert registro.resumen() == {'lotes': 2, 'cambios': 3}
+
+
+def test_validacion_rechaza_referencias_inexistentes():
+    datos = {nombre: _tabla(nombre) for nombre in ORDEN}
+    # Un cliente con una localidad que no existe y otro con facturas, eliminado
+    usado = datos['facturas_encabezado']['id_cliente'].iloc[0]
+    clientes = sin_categorias(datos['clientes'])
+    clientes = clientes[clientes['id_cliente'] != usado].copy()
+    clientes.iloc[0, clientes.columns.get_loc('id_localidad')] = 9999
+    candidata = aplicar_delta(datos['clientes'], calcular_delta(datos['clientes'], clientes, CLAVES['clientes']))
+
+    relacionadas = tablas_relacionadas(['clientes'])
+    assert {'clientes', 'localidades', 'facturas_encabezado', 'ventas'} <= set(relacionadas)
+    revision = validar({nombre: candidata if nombre == 'clientes' else datos[nombre] for nombre in relacionadas})
+    reglas = set(revision.violaciones['regla'])
+    assert 'id_localidad sin fila válida en localidades' in reglas
+    assert 'id_cliente sin fila válida en clientes' in reglas
@@ -0,0 +1,51 @@
+# tests/test_reportes.py
+# Reportes incrementales: un archivo desordenado recorrido en bloques chicos
+# tiene que dar lo mismo que el archivo ordenado leído de una vez.
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.reportes import actualizar_reportes
+
+DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'proyecto4', 'datos')
+TABLAS = ['clientes', 'facturas_encabezado', 'facturas_detalle']
+
+
+def _copiar_desordenado(destino):
+    os.makedirs(destino)
+    for tabla in TABLAS:
+        df = pd.read_csv(os.path.join(DATOS, f"{tabla}.csv"))
+        if tabla != 'clientes':
+            df = df.sample(frac=1, random_state=7)
+        df.to_csv(os.path.join(destino, f"{tabla}.csv"), index=False)
+
+
+def test_bloques_desordenados_no_pierden_filas(tmp_path):
+    desordenados = tmp_path / 'datos'
+    _copiar_desordenado(desordenados)
+    esperados = actualizar_reportes(DATOS, tmp_path / 'ordenado', completo=True)
+    obtenidos = actualizar_reportes(desordenados, tmp_path / 'bloques', completo=True, filas_bloque=3)
+    for nombre, df in esperados.items():
+        pd.testing.assert_frame_equal(
+            obtenidos[nombre].sort_values(list(df.columns)).reset_index(drop=True),
+            df.sort_values(list(df.columns)).reset_index(drop=True),
+            check_dtype=False, obj=nombre,
+        )
+
+
+def test_incremental_con_filas_nuevas_desordenadas(tmp_path):
+    datos = tmp_path / 'datos'
+    _copiar_desordenado(datos)
+    encabezado = pd.read_csv(datos / 'facturas_encabezado.csv')
+    completo = encabezado.copy()
+    # Primera corrida sin las dos últimas facturas; después llegan mezcladas con el resto
+    encabezado[encabezado['id_factura'] <= 6].to_csv(datos / 'facturas_encabezado.csv', index=False)
+    actualizar_reportes(datos, tmp_path / 'salida', filas_bloque=3)
+    completo.to_csv(datos / 'facturas_encabezado.csv', index=False)
+    obtenidos = actualizar_reportes(datos, tmp_path / 'salida', filas_bloque=3)
+    esperados = actualizar_reportes(DATOS, tmp_path / 'ordenado', completo=True)
+    por_mes = obtenidos['ventas_por_mes'].sort_values('mes').reset_index(drop=True)
+    pd.testing.assert_frame_equal(por_mes, esperados['ventas_por_mes'], check_dtype=False)